@@ -6,6 +6,10 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
 from app.services.bert_service import bert_service
+from app.services.inference_executor import ServerBusyError
+from app.services.long_document import POOLING_METHODS
+from app.services.record_store import make_record
+from app.services.record_writer import record_writer
 
 router = APIRouter()
 
@@ -22,6 +26,21 @@ class ClassifyRequest(BaseModel):
         }
 
 
+class ClassifyBatchRequest(BaseModel):
+    """批量分类请求模型"""
+    texts: list[str]
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "texts": [
+                    "Apple Inc. reported strong quarterly earnings...",
+                    "Central bank signals further rate hikes amid inflation concerns..."
+                ]
+            }
+        }
+
+
 class ClassificationBlock(BaseModel):
     market_direction: str
     event_type: str
@@ -56,18 +75,88 @@ class ClassifyResponse(BaseModel):
         }
 
 
+def _to_record(text: str, mapped: dict) -> dict:
+    """分类结果转历史记录：label 为事件类型，confidence 为其概率。"""
+    top = mapped["top_k"][0] if mapped["top_k"] else {"score": 0.0}
+    return make_record(text, mapped["classification"]["event_type"], top["score"], mapped["classification"])
+
+
 @router.post("/classify", response_model=ClassifyResponse)
-async def classify_news(request: ClassifyRequest, temperature: float = 1.2, top_k: int = 5):
+async def classify_news(
+    request: ClassifyRequest,
+    temperature: float = 1.2,
+    top_k: int = 5,
+    long_document: bool = False,
+    pooling: str = "mean",
+    persist: bool = False,
+):
     if not request.text or not request.text.strip():
         raise HTTPException(status_code=400, detail="文本不能为空")
+    if pooling not in POOLING_METHODS:
+        raise HTTPException(status_code=400, detail=f"pooling 必须为 {', '.join(POOLING_METHODS)} 之一")
     try:
-        mapped = bert_service.classify_text(request.text, temperature=temperature, top_k=top_k)
+        if long_document:
+            # 长文档模式：按重叠窗口推理并池化，覆盖全文而非仅前 512 个 token
+            mapped = await bert_service.classify_document_async(
+                request.text, temperature=temperature, top_k=top_k, pooling=pooling
+            )
+        else:
+            mapped = await bert_service.classify_text_async(request.text, temperature=temperature, top_k=top_k)
+        if persist:
+            record_writer.submit(_to_record(request.text, mapped))
         return ClassifyResponse(
             input=request.text,
             result=ClassificationBlock(**mapped["classification"]),
             top_k=[TopKItem(**item) for item in mapped["top_k"]]
         )
+    except ServerBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except RuntimeError as e:
         raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"分类失败: {str(e)}")
+
+
+# 单次批量请求允许的最大文本条数
+MAX_BATCH_TEXTS = 2048
+
+
+@router.post("/classify/batch", response_model=list[ClassifyResponse])
+async def classify_news_batch(
+    request: ClassifyBatchRequest,
+    temperature: float = 1.2,
+    top_k: int = 5,
+    persist: bool = False,
+):
+    if not request.texts:
+        raise HTTPException(status_code=400, detail="文本列表不能为空")
+    if len(request.texts) > MAX_BATCH_TEXTS:
+        raise HTTPException(status_code=400, detail=f"单次最多 {MAX_BATCH_TEXTS} 条文本")
+    if any(not text or not text.strip() for text in request.texts):
+        raise HTTPException(status_code=400, detail="文本不能为空")
+    try:
+        mapped_list = await bert_service.classify_batch_async(request.texts, temperature=temperature, top_k=top_k)
+        if persist:
+            record_writer.submit_many([_to_record(text, mapped) for text, mapped in zip(request.texts, mapped_list)])
+        return [
+            ClassifyResponse(
+                input=text,
+                result=ClassificationBlock(**mapped["classification"]),
+                top_k=[TopKItem(**item) for item in mapped["top_k"]]
+            )
+            for text, mapped in zip(request.texts, mapped_list)
+        ]
+    except ServerBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"批量分类失败: {str(e)}")
+
+
+@router.get("/classify/stats")
+async def get_inference_stats():
+    """推理队列深度、等待时间与微批统计"""
+    stats = bert_service.get_inference_stats()
+    stats["record_writer"] = record_writer.stats()
+    return stats
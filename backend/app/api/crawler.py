@@ -1,7 +1,10 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, BackgroundTasks, HTTPException
 from pydantic import BaseModel
 from typing import List
+from app.services.columnar_store import columnar_store, should_convert
 from app.services.crawler_service import crawler_service
+from app.services.dataset_catalog import dataset_catalog
+from app.services.news_pipeline import news_pipeline
 
 router = APIRouter()
 
@@ -17,23 +20,64 @@ class SaveRequest(BaseModel):
 
 class CrawlRequest(BaseModel):
     source: str = "yahoo"
+    dedup: bool = True
+    # 只返回自上次爬取以来新增或变化的文章
+    incremental: bool = True
+    # 0 表示不限篇数
+    max_articles: int = 0
 
 @router.post("/crawl", response_model=List[NewsItem])
 async def start_crawl(request: CrawlRequest = CrawlRequest()):
     """启动爬虫获取新闻"""
     try:
-        headlines = crawler_service.crawl(source=request.source)
+        headlines = await crawler_service.crawl_async(
+            source=request.source,
+            dedup=request.dedup,
+            max_articles=request.max_articles,
+            incremental=request.incremental,
+        )
         return headlines
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/crawl/save")
-async def save_crawled_data(request: SaveRequest):
+async def save_crawled_data(request: SaveRequest, background_tasks: BackgroundTasks):
     """保存爬取结果为数据集"""
     try:
         # Convert Pydantic models to dicts
         headlines_dicts = [item.dict() for item in request.headlines]
         filename = crawler_service.save_to_dataset(headlines_dicts, request.filename)
+        dataset_catalog.refresh(filename)
+        # 后台转换为 Parquet，后续预览与批处理无需重复解析 CSV
+        if should_convert():
+            background_tasks.add_task(columnar_store.convert_quietly, filename)
         return {"message": "Dataset saved successfully", "filename": filename}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/crawl/pipeline")
+async def get_pipeline_stats():
+    """爬取 → 分类 → 入库流水线的运行状态与各阶段吞吐 / 积压"""
+    return news_pipeline.stats()
+
+@router.post("/crawl/pipeline/start")
+async def start_pipeline():
+    """启动定时流水线"""
+    from app.services.bert_service import bert_service
+    news_pipeline.start(bert_service)
+    return news_pipeline.stats()
+
+@router.post("/crawl/pipeline/stop")
+async def stop_pipeline():
+    """停止流水线（处理完已入队的文章）"""
+    await news_pipeline.stop()
+    return news_pipeline.stats()
+
+@router.post("/crawl/pipeline/run")
+async def run_pipeline_once():
+    """立即执行一轮爬取，新文章进入流水线分类入库"""
+    from app.services.bert_service import bert_service
+    if not news_pipeline.is_running:
+        news_pipeline.start(bert_service, schedule=False)
+    enqueued = await news_pipeline.run_once()
+    return {"enqueued": enqueued, **news_pipeline.stats()}
@@ -3,9 +3,9 @@
 负责数据集上传、列表查看和触发训练
 """
 import os
-import shutil
-from typing import List
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from typing import Dict, List, Optional
+from fastapi import APIRouter, BackgroundTasks, UploadFile, File, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from pathlib import Path
 
@@ -19,6 +19,11 @@ os.makedirs(DATASET_DIR, exist_ok=True)
 class DatasetInfo(BaseModel):
     filename: str
     size: int
+    mtime: Optional[float] = None
+    row_count: Optional[int] = None
+    columns: Optional[List[str]] = None
+    content_hash: Optional[str] = None
+    label_distribution: Optional[Dict[str, int]] = None
 
 @router.post("/datasets/open_folder")
 async def open_dataset_folder():
@@ -33,58 +38,132 @@ async def open_dataset_folder():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to open folder: {e}")
 
-@router.post("/upload_dataset")
-async def upload_dataset(file: UploadFile = File(...)):
-    """上传 CSV 数据集"""
-    if not file.filename or not file.filename.endswith('.csv'):
-        raise HTTPException(status_code=400, detail="Only CSV files are allowed")
-    
-    file_path = os.path.join(DATASET_DIR, file.filename)
-    
+def _schedule_columnar(background_tasks: BackgroundTasks, filename: str):
+    """上传 / 保存后在后台转换为 Parquet（未安装 pyarrow 或已关闭时跳过）"""
+    from app.services.columnar_store import columnar_store, should_convert
+    if should_convert():
+        background_tasks.add_task(columnar_store.convert_quietly, filename)
+
+async def _ingest(filename: Optional[str], chunks, background_tasks: BackgroundTasks) -> dict:
+    """流式写入数据集：边接收边哈希、校验与统计，内容不合法时立即中止"""
+    from app.services.dataset_catalog import dataset_catalog
+    from app.services.dataset_upload import DatasetUpload, InvalidDatasetError
+
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        upload = DatasetUpload(filename, DATASET_DIR, catalog=dataset_catalog)
+    except InvalidDatasetError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        async for chunk in chunks:
+            if chunk:
+                await run_in_threadpool(upload.feed, chunk)
+        result = await run_in_threadpool(upload.finish)
+    except InvalidDatasetError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
+        upload.abort()
         raise HTTPException(status_code=500, detail=f"Failed to save file: {e}")
-        
-    return {"filename": file.filename, "message": "Upload successful"}
+
+    if result["duplicate_of"]:
+        result["message"] = "Identical dataset already exists"
+    else:
+        result["message"] = "Upload successful"
+        _schedule_columnar(background_tasks, result["filename"])
+    return result
+
+@router.post("/upload_dataset")
+async def upload_dataset(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
+    """上传 CSV 数据集（multipart 表单）"""
+    async def chunks():
+        from app.services.dataset_upload import UPLOAD_CHUNK_BYTES
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                return
+            yield chunk
+
+    return await _ingest(file.filename, chunks(), background_tasks)
+
+@router.put("/datasets/{filename}")
+async def put_dataset(filename: str, request: Request, background_tasks: BackgroundTasks):
+    """以原始请求体流式上传 CSV 数据集，内容不合法时在读完请求体前即返回 400"""
+    return await _ingest(filename, request.stream(), background_tasks)
 
 @router.get("/datasets", response_model=List[DatasetInfo])
-async def list_datasets():
-    """获取已上传的数据集列表"""
-    datasets = []
-    if not os.path.exists(DATASET_DIR):
-        return []
-        
-    # Get all CSV files
-    files = [f for f in os.listdir(DATASET_DIR) if f.endswith('.csv')]
-    
-    # Sort by modification time (newest first)
-    files.sort(key=lambda x: os.path.getmtime(os.path.join(DATASET_DIR, x)), reverse=True)
-    
-    for filename in files:
-        file_path = os.path.join(DATASET_DIR, filename)
-        size = os.path.getsize(file_path)
-        datasets.append(DatasetInfo(filename=filename, size=size))
-    return datasets
+async def list_datasets(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    sort: str = Query("mtime", description="mtime / size / filename / row_count"),
+    order: str = Query("desc", description="asc / desc"),
+):
+    """获取已上传的数据集列表（来自元数据目录，默认按修改时间倒序），总数见响应头 X-Total-Count"""
+    from app.services.dataset_catalog import dataset_catalog
+
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order 必须为 asc 或 desc")
+    try:
+        items, total = await run_in_threadpool(
+            dataset_catalog.list, limit, offset, sort, order == "desc"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    response.headers["X-Total-Count"] = str(total)
+    return items
 
 @router.get("/datasets/{filename}/preview")
-async def preview_dataset(filename: str):
-    """预览数据集前20行"""
+async def preview_dataset(
+    filename: str,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=1000),
+    columns: Optional[str] = Query(None, description="逗号分隔的列名，仅返回这些列"),
+):
+    """分页预览数据集（默认前20行）；已转换为 Parquet 时只读取所需行组与列"""
+    from app.services.columnar_store import columnar_store
+
     file_path = os.path.join(DATASET_DIR, filename)
     if not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="Dataset not found")
-    
+    selected = [c.strip() for c in columns.split(",") if c.strip()] if columns else None
+
+    meta = columnar_store.meta(filename)
+    if meta is not None:
+        try:
+            rows = await run_in_threadpool(columnar_store.read_page, filename, offset, limit, selected)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        response.headers["X-Total-Count"] = str(meta["num_rows"])
+        return rows
+
+    # 尚未转换（或 CSV 已变化）：回退到 CSV，并在后台重新转换
+    _schedule_columnar(background_tasks, filename)
     try:
         import pandas as pd
-        # Increase preview limit to 20 rows
-        df = pd.read_csv(file_path, nrows=20)
+        df = pd.read_csv(file_path, skiprows=range(1, offset + 1), nrows=limit, usecols=selected)
         # Replace NaN with empty string to ensure JSON serializability
         df = df.fillna("")
         return df.to_dict(orient="records")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to read dataset: {e}")
 
+@router.get("/datasets/{filename}/stats")
+async def dataset_stats(filename: str):
+    """数据集行数与各列统计（来自 Parquet 转换元数据，必要时先转换）"""
+    from app.services.columnar_store import columnar_store
+
+    if not os.path.exists(os.path.join(DATASET_DIR, filename)):
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    try:
+        return await run_in_threadpool(columnar_store.convert, filename)
+    except RuntimeError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to convert dataset: {e}")
+
 @router.delete("/datasets/{filename}")
 async def delete_dataset(filename: str):
     """删除数据集"""
@@ -93,13 +172,80 @@ async def delete_dataset(filename: str):
         raise HTTPException(status_code=404, detail="Dataset not found")
     
     try:
+        from app.services.columnar_store import columnar_store
+        from app.services.dataset_catalog import dataset_catalog
         os.remove(file_path)
+        columnar_store.remove(filename)
+        dataset_catalog.remove(filename)
         return {"message": "Dataset deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete dataset: {e}")
 
+@router.post("/datasets/{filename}/classify")
+async def classify_dataset(filename: str, temperature: float = 1.2):
+    """启动数据集批量分类后台任务（中断后再次调用会从检查点续跑）"""
+    from app.services.bert_service import bert_service
+    from app.services.dataset_jobs import dataset_job_manager
+
+    if not bert_service.is_loaded:
+        raise HTTPException(status_code=503, detail="模型未加载")
+    if temperature <= 0:
+        raise HTTPException(status_code=400, detail="temperature 必须 > 0")
+    try:
+        job = dataset_job_manager.start(filename, bert_service, temperature=temperature)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    return job.to_dict()
+
+@router.get("/datasets/jobs")
+async def list_classify_jobs():
+    """列出数据集分类任务"""
+    from app.services.dataset_jobs import dataset_job_manager
+    return dataset_job_manager.list()
+
+@router.get("/datasets/jobs/{job_id}")
+async def get_classify_job(job_id: str):
+    """查询数据集分类任务进度"""
+    from app.services.dataset_jobs import dataset_job_manager
+    job = dataset_job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@router.post("/datasets/jobs/{job_id}/cancel")
+async def cancel_classify_job(job_id: str):
+    """取消数据集分类任务（保留检查点，可续跑）"""
+    from app.services.dataset_jobs import dataset_job_manager
+    job = dataset_job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    job.cancel()
+    return job.to_dict()
+
+@router.post("/datasets/{filename}/dedupe")
+async def dedupe_dataset(filename: str, background_tasks: BackgroundTasks, threshold: Optional[float] = None):
+    """去除数据集内的近似重复新闻，结果另存为 <数据集名>.dedup.csv"""
+    from app.services.dataset_catalog import dataset_catalog
+    from app.services.near_duplicate import NEAR_DUP_THRESHOLD, dedupe_csv
+
+    file_path = DATASET_DIR / filename
+    if not file_path.exists():
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    threshold = threshold or NEAR_DUP_THRESHOLD
+    if not 0 < threshold <= 1:
+        raise HTTPException(status_code=400, detail="threshold 必须在 (0, 1] 之间")
+
+    target = f"{Path(filename).stem}.dedup.csv"
+    try:
+        result = await run_in_threadpool(dedupe_csv, file_path, DATASET_DIR / target, threshold=threshold)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to dedupe dataset: {e}")
+    dataset_catalog.refresh(target)
+    _schedule_columnar(background_tasks, target)
+    return {"filename": target, **result}
+
 @router.post("/train")
-async def train_model(dataset_name: str):
+async def train_model(dataset_name: str, dedupe: bool = True):
     """触发模型训练"""
     from app.services.bert_service import bert_service
     
@@ -108,7 +254,7 @@ async def train_model(dataset_name: str):
         raise HTTPException(status_code=404, detail="Dataset not found")
     
     try:
-        result = bert_service.start_training(file_path)
+        result = bert_service.start_training(file_path, dedupe=dedupe)
         return result
     except RuntimeError as e:
         raise HTTPException(status_code=400, detail=str(e))
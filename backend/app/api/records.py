@@ -1,18 +1,16 @@
 """
 历史记录 API 路由
-负责管理新闻分类的历史记录 (CRUD)
+负责管理新闻分类的历史记录 (CRUD)，数据保存在 SQLite 记录库中
+记录库调用是同步的（加锁的 SQLite 读写与 FTS 查询），处理函数声明为普通 def，
+由 FastAPI 在线程池中执行，不阻塞事件循环
 """
-import json
-import os
-import uuid
 from typing import List, Optional
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Response
 from pydantic import BaseModel
-from datetime import datetime
 
-router = APIRouter()
+from app.services.record_store import TAXONOMY_FIELDS, record_store
 
-DATA_FILE = "app/data/records.json"
+router = APIRouter()
 
 class NewsRecord(BaseModel):
     id: Optional[str] = None
@@ -20,49 +18,83 @@ class NewsRecord(BaseModel):
     label: str
     confidence: float
     timestamp: Optional[str] = None
+    market_direction: Optional[str] = None
+    event_type: Optional[str] = None
+    impact_strength: Optional[str] = None
+    risk_signal: Optional[str] = None
 
-def _load_records() -> List[dict]:
-    if not os.path.exists(DATA_FILE):
-        return []
-    try:
-        with open(DATA_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        return []
-
-def _save_records(records: List[dict]):
-    os.makedirs(os.path.dirname(DATA_FILE), exist_ok=True)
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(records, f, ensure_ascii=False, indent=2)
+class SearchResult(NewsRecord):
+    score: float
 
 @router.get("/records", response_model=List[NewsRecord])
-async def get_records():
-    """获取所有历史记录"""
-    return _load_records()
+def get_records(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    label: Optional[str] = None,
+    min_confidence: Optional[float] = None,
+    max_confidence: Optional[float] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    q: Optional[str] = None,
+):
+    """分页获取历史记录（最新在前）
+
+    下一页游标通过响应头 X-Next-Cursor 返回，作为 cursor 参数传回即可继续翻页；没有更多数据时不返回该头。
+    """
+    try:
+        items, next_cursor = record_store.query(
+            limit=limit,
+            cursor=cursor,
+            label=label,
+            min_confidence=min_confidence,
+            max_confidence=max_confidence,
+            since=since,
+            until=until,
+            text=q,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return items
+
+@router.get("/records/search", response_model=List[SearchResult])
+def search_records(
+    q: str,
+    limit: int = Query(50, ge=1, le=500),
+    market_direction: Optional[str] = None,
+    event_type: Optional[str] = None,
+    impact_strength: Optional[str] = None,
+    risk_signal: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+):
+    """全文检索历史记录，按相关度排序，可结合四大分类字段与时间窗口过滤"""
+    try:
+        return record_store.search(
+            q,
+            limit=limit,
+            since=since,
+            until=until,
+            market_direction=market_direction,
+            event_type=event_type,
+            impact_strength=impact_strength,
+            risk_signal=risk_signal,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/records", response_model=NewsRecord)
-async def add_record(record: NewsRecord):
+def add_record(record: NewsRecord):
     """添加一条新记录"""
-    records = _load_records()
-    
-    new_record = record.model_dump()
-    new_record["id"] = str(uuid.uuid4())
-    new_record["timestamp"] = datetime.now().isoformat()
-    
-    records.insert(0, new_record) # 最新在最前
-    _save_records(records)
-    
-    return new_record
+    classification = {field: getattr(record, field) for field in TAXONOMY_FIELDS}
+    return record_store.add(record.text, record.label, record.confidence, classification)
 
 @router.delete("/records/{record_id}")
-async def delete_record(record_id: str):
+def delete_record(record_id: str):
     """删除指定记录"""
-    records = _load_records()
-    initial_len = len(records)
-    records = [r for r in records if r["id"] != record_id]
-    
-    if len(records) == initial_len:
+    if not record_store.delete(record_id):
         raise HTTPException(status_code=404, detail="Record not found")
         
-    _save_records(records)
     return {"status": "success", "message": "Record deleted"}
@@ -7,6 +7,10 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.api import classify, records, datasets, crawler
 from app.services.bert_service import bert_service
+from app.services.record_store import record_store
+from app.services.record_writer import record_writer
+from app.services.dataset_jobs import dataset_job_manager
+from app.services.news_pipeline import PIPELINE_ENABLED, news_pipeline
 
 # 创建 FastAPI 应用实例
 app = FastAPI(
@@ -27,6 +31,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count"],
 )
 
 # 添加中间件以确保所有响应都包含 UTF-8 字符集
@@ -61,17 +66,30 @@ async def ping():
 async def startup_event():
     """应用启动时的初始化操作"""
     print("🚀 FastAPI 服务启动中...")
+    # 一次性迁移旧版 records.json 到 SQLite 记录库
+    record_store.migrate_legacy_json()
     # 加载 FinBERT 模型
     try:
         bert_service.load_model()
     except Exception as e:
         print(f"⚠️ 模型加载失败 (可能是首次运行或网络问题): {e}")
+    # 定时爬取 → 分类 → 入库流水线（PIPELINE_ENABLED=1 时自动启动）
+    if PIPELINE_ENABLED:
+        news_pipeline.start(bert_service)
     print("✅ 服务启动成功")
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """应用关闭时的清理操作"""
+    # 先停止流水线，已入队的文章在推理线程池关闭前处理完
+    await news_pipeline.stop()
+    # 停止数据集分类任务（检查点保留，下次启动可续跑）
+    dataset_job_manager.cancel_all()
+    await bert_service.batcher.stop()
+    bert_service.executor.shutdown(wait=False, cancel_futures=True)
+    # 写完缓冲中的分类结果
+    record_writer.stop()
     print("👋 FastAPI 服务关闭")
 
 
@@ -0,0 +1,165 @@
+"""异步 HTTP 抓取层
+
+爬虫的网络请求统一经过 AsyncFetcher（基于 httpx.AsyncClient）:
+1. 单次爬取共用一个连接池，同一主机的请求复用 TCP/TLS 连接
+2. 全局并发上限 + 每个主机的并发上限与令牌桶限速（rps / burst）
+3. 超时；网络错误、429 与 5xx 按指数退避（含抖动）重试，429/503 优先遵循 Retry-After
+4. 单个 URL 失败只体现在其结果中（error 字段），不会中断整批抓取
+
+用法:
+    async with AsyncFetcher() as fetcher:
+        results = await fetcher.fetch_all(urls)
+"""
+import asyncio
+import os
+import random
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+MAX_CONCURRENCY = int(os.getenv("CRAWLER_MAX_CONCURRENCY", "64"))
+HOST_CONCURRENCY = int(os.getenv("CRAWLER_HOST_CONCURRENCY", "16"))
+HOST_RPS = float(os.getenv("CRAWLER_HOST_RPS", "50"))
+HOST_BURST = int(os.getenv("CRAWLER_HOST_BURST", "16"))
+TIMEOUT_SECONDS = float(os.getenv("CRAWLER_TIMEOUT_SECONDS", "10"))
+MAX_RETRIES = int(os.getenv("CRAWLER_MAX_RETRIES", "2"))
+BACKOFF_SECONDS = float(os.getenv("CRAWLER_BACKOFF_SECONDS", "0.5"))
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+RETRY_STATUS = {429, 500, 502, 503, 504}
+MAX_RETRY_AFTER = 30.0
+
+
+class _HostLimiter:
+    """单个主机的并发上限与令牌桶。"""
+
+    def __init__(self, concurrency: int, rps: float, burst: int):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.rps = rps
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def wait_for_token(self):
+        if self.rps <= 0:
+            return
+        # 持锁等待，等待者按到达顺序依次取得令牌
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rps)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rps)
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    try:
+        return min(MAX_RETRY_AFTER, max(0.0, float(value))) if value is not None else None
+    except ValueError:
+        return None
+
+
+class AsyncFetcher:
+    """带连接池、并发上限、按主机限速与重试的异步抓取器。"""
+
+    def __init__(
+        self,
+        max_concurrency: int = MAX_CONCURRENCY,
+        host_concurrency: int = HOST_CONCURRENCY,
+        host_rps: float = HOST_RPS,
+        host_burst: int = HOST_BURST,
+        timeout: float = TIMEOUT_SECONDS,
+        max_retries: int = MAX_RETRIES,
+        backoff: float = BACKOFF_SECONDS,
+        headers: Optional[Dict[str, str]] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        if max_concurrency < 1 or host_concurrency < 1:
+            raise ValueError("concurrency limits must be >= 1")
+        self.max_concurrency = max_concurrency
+        self.host_concurrency = host_concurrency
+        self.host_rps = host_rps
+        self.host_burst = host_burst
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._client = httpx.AsyncClient(
+            headers=headers or DEFAULT_HEADERS,
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+            transport=transport,
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._hosts: Dict[str, _HostLimiter] = {}
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        await self._client.aclose()
+
+    def _limiter(self, url: str) -> _HostLimiter:
+        host = urlparse(url).netloc
+        if host not in self._hosts:
+            self._hosts[host] = _HostLimiter(self.host_concurrency, self.host_rps, self.host_burst)
+        return self._hosts[host]
+
+    async def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> Dict:
+        """抓取单个 URL，返回 {url, status, text, headers, error, attempts, elapsed}；不抛出网络异常。"""
+        limiter = self._limiter(url)
+        started = time.monotonic()
+        result = {"url": url, "status": None, "text": "", "headers": {}, "error": None, "attempts": 0}
+        for attempt in range(self.max_retries + 1):
+            result["attempts"] = attempt + 1
+            delay = None
+            try:
+                async with self._semaphore, limiter.semaphore:
+                    await limiter.wait_for_token()
+                    self.requests += 1
+                    response = await self._client.get(url, headers=headers)
+                result.update(status=response.status_code, headers=dict(response.headers), error=None)
+                if response.status_code not in RETRY_STATUS:
+                    result["text"] = response.text
+                    break
+                result["error"] = f"HTTP {response.status_code}"
+                delay = _retry_after(response)
+            except httpx.HTTPError as e:
+                result["error"] = f"{type(e).__name__}: {e}"
+            if attempt == self.max_retries:
+                break
+            self.retries += 1
+            if delay is None:
+                delay = self.backoff * (2 ** attempt) + random.uniform(0, self.backoff)
+            await asyncio.sleep(delay)
+
+        if result["error"]:
+            self.failures += 1
+        result["elapsed"] = time.monotonic() - started
+        return result
+
+    async def fetch_all(self, urls: List[str]) -> List[Dict]:
+        """并发抓取，结果顺序与输入一致。"""
+        return list(await asyncio.gather(*(self.fetch(url) for url in urls)))
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "failures": self.failures,
+            "hosts": len(self._hosts),
+        }
@@ -0,0 +1,124 @@
+"""动态微批调度器
+
+将并发到达的单条推理请求汇聚到共享 asyncio 队列，满足以下任一条件即合并为一个批次执行:
+1. 批次已满 (max_batch_size)
+2. 自首条请求入队起已等待 max_wait_ms
+
+批量推理函数在线程池中执行，避免阻塞事件循环；每个调用方仅取回属于自己的那一行结果。
+队列长度受 max_pending 限制，饱和时 submit 立即抛出 ServerBusyError。
+"""
+import asyncio
+from concurrent.futures import Executor
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from .inference_executor import ServerBusyError
+
+
+class MicroBatcher:
+    """按 "批满或超时" 策略聚合请求的异步批处理器。"""
+
+    def __init__(
+        self,
+        infer_fn: Callable[[List[Any]], Sequence[Any]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 8.0,
+        executor: Optional[Executor] = None,
+        max_pending: int = 0,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms must be >= 0")
+        self.infer_fn = infer_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.executor = executor
+        self.max_pending = max_pending
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._batches = 0
+        self._items = 0
+
+    async def submit(self, item: Any) -> Any:
+        """提交单条输入，等待所在批次完成后返回对应的输出行。"""
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((item, future))
+        except asyncio.QueueFull:
+            raise ServerBusyError("推理请求排队已满，请稍后重试")
+        return await future
+
+    def stats(self) -> dict:
+        return {
+            "batches": self._batches,
+            "items": self._items,
+            "avg_batch_size": round(self._items / self._batches, 3) if self._batches else 0.0,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+        }
+
+    async def stop(self):
+        """停止后台调度协程，并使尚未处理的请求失败返回。"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, future = self._queue.get_nowait()
+                if not future.done():
+                    future.set_exception(RuntimeError("批处理器已停止"))
+            self._queue = None
+        self._loop = None
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # 事件循环发生切换（如测试客户端重建）时，丢弃绑定在旧循环上的队列
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+            self._worker = None
+        if self._worker is None or self._worker.done():
+            self._worker = loop.create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[Tuple[Any, asyncio.Future]]):
+        # 调用方已取消（如客户端断开）的请求不再参与推理
+        batch = [(item, future) for item, future in batch if not future.done()]
+        if not batch:
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            outputs = await loop.run_in_executor(self.executor, self.infer_fn, [item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self._batches += 1
+        self._items += len(batch)
+        for (_, future), row in zip(batch, outputs):
+            if not future.done():
+                future.set_result(row)
+
+
+__all__ = ["MicroBatcher"]
@@ -4,10 +4,73 @@ FinBERT 模型服务
 """
 import torch
 import torch.nn.functional as F
-from transformers import BertTokenizer, BertForSequenceClassification
-from typing import Dict
-import time
+from torch.utils.data import DataLoader
+from transformers import AutoTokenizer, BertTokenizer, BertForSequenceClassification, get_linear_schedule_with_warmup
+from typing import Dict, List
+import asyncio
+import copy
+import functools
+import math
+import os
 import threading
+from datetime import datetime
+from pathlib import Path
+
+from .batcher import MicroBatcher
+from .long_document import POOLING_METHODS, pool_logits, split_windows
+from .near_duplicate import INDEX_DIR, NearDuplicateIndex
+from .inference_backends import EagerBackend, check_parity, create_backend
+from .inference_executor import InferenceExecutor, configure_torch_threads
+from .result_cache import LogitsCache, text_key, weights_fingerprint
+from .single_flight import SingleFlight
+from .token_cache import TokenizationCache, length_buckets, pad_batch
+from .token_dataset import LengthBucketSampler, TokenDataset, build_token_cache, collate_tokens
+
+# 动态微批参数：批满或等待超时即触发一次批量推理
+BATCH_MAX_SIZE = int(os.getenv("FINBERT_BATCH_MAX_SIZE", "16"))
+BATCH_MAX_WAIT_MS = float(os.getenv("FINBERT_BATCH_MAX_WAIT_MS", "8"))
+# 推理线程池参数：工作线程数、待处理任务上限，以及 torch 线程数（0 表示使用 torch 默认值）
+INFERENCE_THREADS = int(os.getenv("FINBERT_INFERENCE_THREADS", "1"))
+INFERENCE_MAX_PENDING = int(os.getenv("FINBERT_INFERENCE_MAX_PENDING", "64"))
+TORCH_INTRA_OP_THREADS = int(os.getenv("FINBERT_TORCH_THREADS", "0"))
+TORCH_INTER_OP_THREADS = int(os.getenv("FINBERT_TORCH_INTEROP_THREADS", "0"))
+# logits 结果缓存：条目上限（0 表示禁用）与过期秒数（0 表示不过期）
+CACHE_MAX_ENTRIES = int(os.getenv("FINBERT_CACHE_MAX_ENTRIES", "10000"))
+CACHE_TTL_SECONDS = float(os.getenv("FINBERT_CACHE_TTL_SECONDS", "0"))
+# 分词：优先使用 Rust 实现的 fast tokenizer；分词结果缓存条目上限（0 表示禁用）
+USE_FAST_TOKENIZER = os.getenv("FINBERT_USE_FAST_TOKENIZER", "1") == "1"
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("FINBERT_TOKEN_CACHE_MAX_ENTRIES", "50000"))
+MAX_SEQ_LENGTH = 512
+# 单次前向推理补齐后的 token 总数上限（条数 × 批内最长长度），0 表示不限制
+MAX_BATCH_TOKENS = int(os.getenv("FINBERT_MAX_BATCH_TOKENS", "8192"))
+# 长文档模式：相邻窗口重叠的 token 数与单篇文档的最大窗口数
+DOC_WINDOW_OVERLAP = int(os.getenv("FINBERT_DOC_WINDOW_OVERLAP", "64"))
+DOC_MAX_WINDOWS = int(os.getenv("FINBERT_DOC_MAX_WINDOWS", "8"))
+# 推理后端：eager / int8 / onnx；启用前与 eager 结果比对，容差为空时使用各后端默认值
+INFERENCE_BACKEND = os.getenv("FINBERT_BACKEND", "eager")
+BACKEND_PARITY_TOLERANCE = os.getenv("FINBERT_BACKEND_PARITY_TOL", "")
+# 近似重复复用：与已分类文本的 MinHash 相似度不低于阈值时直接复用其 logits（默认关闭）
+NEAR_DUP_REUSE = os.getenv("FINBERT_NEAR_DUP_REUSE", "0") == "1"
+NEAR_DUP_REUSE_THRESHOLD = float(os.getenv("FINBERT_NEAR_DUP_REUSE_THRESHOLD", "0.9"))
+# 模型名称或本地目录（例如训练后保存的目录）
+MODEL_NAME = os.getenv("FINBERT_MODEL_NAME", "ProsusAI/finbert")
+# 训练：每批条数、梯度累积步数（等效批大小 = 两者之积）、学习率，以及每批补齐后 token 总数上限（0 表示不限制）
+TRAIN_BATCH_SIZE = int(os.getenv("FINBERT_TRAIN_BATCH_SIZE", "16"))
+TRAIN_GRAD_ACCUM_STEPS = int(os.getenv("FINBERT_TRAIN_GRAD_ACCUM_STEPS", "2"))
+TRAIN_LEARNING_RATE = float(os.getenv("FINBERT_TRAIN_LEARNING_RATE", "2e-5"))
+TRAIN_MAX_BATCH_TOKENS = int(os.getenv("FINBERT_TRAIN_MAX_BATCH_TOKENS", "0"))
+# DataLoader 工作进程数：默认 0（训练线程直接读取内存映射缓存）；> 0 时以 spawn 方式启动，
+# 避免在含推理线程池的多线程服务进程中 fork
+TRAIN_WORKERS = int(os.getenv("FINBERT_TRAIN_WORKERS", "0"))
+# 训练完成的模型保存目录（每次训练一个子目录）
+TRAIN_OUTPUT_DIR = Path(__file__).resolve().parent.parent / "data" / "models"
+
+# 后端一致性校验使用的样例文本
+_PARITY_TEXTS = [
+    "Apple Inc. reported strong quarterly earnings, beating analyst estimates.",
+    "Shares of the regional bank plunged after it disclosed a liquidity shortfall.",
+    "The central bank left interest rates unchanged.",
+]
 
 class FinBERTService:
     """FinBERT 模型服务类"""
@@ -15,8 +78,45 @@ class FinBERTService:
     def __init__(self):
         self.model = None
         self.tokenizer = None
-        self.model_name = "ProsusAI/finbert"
+        self.model_name = MODEL_NAME
         self.is_loaded = False
+        # 当前推理后端（加载模型后初始化）与其相对 eager 的概率最大偏差
+        self.backend_name = INFERENCE_BACKEND
+        self.backend = None
+        self.backend_parity_diff = 0.0
+        # 模型版本号：模型名 + 权重摘要 + 推理后端，作为缓存键与近似重复 logits 复用的一部分；
+        # 权重摘要不依赖进程内计数，重启后不同的微调结果不会被误认为同一版本
+        self.model_version = f"{self.model_name}@0"
+        self.weights_fingerprint = "0"
+        self.cache = LogitsCache(max_entries=CACHE_MAX_ENTRIES, ttl_seconds=CACHE_TTL_SECONDS)
+        # 相同文本的并发请求共享同一次前向推理
+        self.inflight = SingleFlight()
+        # 近似重复文本的 logits 索引（持久化，跨重启复用）
+        self.near_dup = (
+            NearDuplicateIndex(INDEX_DIR / "classified.db", threshold=NEAR_DUP_REUSE_THRESHOLD)
+            if NEAR_DUP_REUSE else None
+        )
+        self.near_dup_reused = 0
+        # 在线推理的分词缓存（训练使用 token_dataset 的磁盘分词缓存，不经过此缓存）
+        self.token_cache = TokenizationCache(max_entries=TOKEN_CACHE_MAX_ENTRIES, max_length=MAX_SEQ_LENGTH)
+        # 单次前向推理的最大批量，超出部分自动切片
+        self.max_batch_size = 32
+        # 推理线程池：所有前向推理都在这里执行，不占用事件循环
+        configure_torch_threads(TORCH_INTRA_OP_THREADS, TORCH_INTER_OP_THREADS)
+        # onnx 后端的 intra-op 线程数（0 表示 onnxruntime 默认值）；离线多进程分类按进程覆盖
+        self.torch_threads = TORCH_INTRA_OP_THREADS
+        self.executor = InferenceExecutor(
+            num_threads=INFERENCE_THREADS,
+            max_pending=INFERENCE_MAX_PENDING,
+        )
+        # 并发单条请求的微批调度器
+        self.batcher = MicroBatcher(
+            self._infer_logits,
+            max_batch_size=BATCH_MAX_SIZE,
+            max_wait_ms=BATCH_MAX_WAIT_MS,
+            executor=self.executor,
+            max_pending=INFERENCE_MAX_PENDING * BATCH_MAX_SIZE,
+        )
         self.training_status = {
             "is_training": False,
             "progress": 0,
@@ -45,16 +145,22 @@ class FinBERTService:
             print(f"📦 正在加载模型: {self.model_name}")
             print("⏳ 首次加载可能需要下载模型文件，请稍候...")
             
-            # 加载分词器
-            self.tokenizer = BertTokenizer.from_pretrained(self.model_name)
+            # 加载分词器（优先 fast tokenizer，不可用时回退到纯 Python 实现）
+            self.tokenizer = self._load_tokenizer()
+            self.token_cache.clear()
             
             # 加载模型（用于序列分类）
             self.model = BertForSequenceClassification.from_pretrained(self.model_name)
             
             # 设置为评估模式（关闭 dropout 等训练特性）
             self.model.eval()
+
+            # 初始化推理后端（未通过一致性校验时回退到 eager）
+            self._init_backend()
             
             self.is_loaded = True
+            self.weights_fingerprint = weights_fingerprint(self.model)
+            self._invalidate_cache()
             print("✅ 模型加载成功！")
             
         except Exception as e:
@@ -62,6 +168,45 @@ class FinBERTService:
             self.is_loaded = False
             raise
     
+    def set_backend(self, name: str):
+        """切换推理后端；新后端未通过一致性校验时抛出异常并保持原后端。"""
+        if not self.is_loaded:
+            raise RuntimeError("模型未加载，请先调用 load_model()")
+        self.backend, self.backend_parity_diff = self._build_backend(name)
+        self.backend_name = name
+        self._invalidate_cache()
+
+    def _init_backend(self):
+        try:
+            self.backend, self.backend_parity_diff = self._build_backend(self.backend_name)
+        except Exception as e:
+            print(f"⚠️  推理后端 {self.backend_name} 不可用，回退到 eager: {e}")
+            self.backend, self.backend_parity_diff = EagerBackend(self.model), 0.0
+            self.backend_name = EagerBackend.name
+        print(f"⚙️  推理后端: {self.backend_name}")
+
+    def _build_backend(self, name: str):
+        eager = EagerBackend(self.model)
+        if name == EagerBackend.name:
+            return eager, 0.0
+        kwargs = {"intra_op_threads": self.torch_threads} if name == "onnx" else {}
+        backend = create_backend(name, self.model, **kwargs)
+        inputs = self.tokenizer(_PARITY_TEXTS, return_tensors="pt", padding=True, truncation=True, max_length=MAX_SEQ_LENGTH)
+        inputs = {"input_ids": inputs["input_ids"], "attention_mask": inputs["attention_mask"]}
+        tolerance = float(BACKEND_PARITY_TOLERANCE) if BACKEND_PARITY_TOLERANCE else None
+        diff = check_parity(backend, eager, inputs, tolerance=tolerance)
+        return backend, diff
+
+    def _load_tokenizer(self):
+        if USE_FAST_TOKENIZER:
+            try:
+                tokenizer = AutoTokenizer.from_pretrained(self.model_name, use_fast=True)
+                if tokenizer.is_fast:
+                    return tokenizer
+            except Exception as e:
+                print(f"⚠️  fast tokenizer 加载失败，回退到 BertTokenizer: {e}")
+        return BertTokenizer.from_pretrained(self.model_name)
+
     def classify_text(self, text: str, temperature: float = 1.2, top_k: int = 5) -> Dict[str, any]:
         """执行标准化财经分类推理并返回结构化结果。"""
         if not self.is_loaded:
@@ -70,24 +215,15 @@ class FinBERTService:
         if not text or not text.strip():
             raise ValueError("输入文本不能为空")
 
-        try:
-            inputs = self.tokenizer(
-                text,
-                return_tensors="pt",
-                padding=True,
-                truncation=True,
-                max_length=512
-            )
-
-            with torch.no_grad():
-                outputs = self.model(**inputs)
+        if temperature <= 0:
+            raise ValueError("temperature 必须 > 0")
 
-            logits = outputs.logits[0]  # shape [3]
+        try:
+            key = text_key(text, self.model_version)
+            logits = self.inflight.do(key, lambda: self._cached_logits([text])[0])  # shape [3]
 
             # 显式温度缩放与 softmax（满足规范要求）——结果仅用于内部验证，不直接返回
-            if temperature <= 0:
-                raise ValueError("temperature 必须 > 0")
-            scaled_logits = logits / temperature
+            scaled_logits = torch.tensor(logits) / temperature
             _ = F.softmax(scaled_logits, dim=-1)  # 计算后不外露，最终映射交由 label_mapper
 
             from .label_mapper import map_finbert_logits_to_labels
@@ -98,52 +234,364 @@ class FinBERTService:
             print(f"❌ 分类过程出错: {str(e)}")
             raise
 
+    async def classify_text_async(self, text: str, temperature: float = 1.2, top_k: int = 5) -> Dict[str, any]:
+        """异步分类：经微批调度器与其他并发请求合并推理，不阻塞事件循环。"""
+        if not self.is_loaded:
+            raise RuntimeError("模型未加载，请先调用 load_model()")
+
+        if not text or not text.strip():
+            raise ValueError("输入文本不能为空")
+
+        if temperature <= 0:
+            raise ValueError("temperature 必须 > 0")
+
+        key = text_key(text, self.model_version)
+        logits = self.cache.get(key)
+        if logits is None:
+            logits = await self.inflight.do_async(key, lambda: self._submit_to_batcher(key, text))
+
+        from .label_mapper import map_finbert_logits_to_labels
+        return map_finbert_logits_to_labels(logits, top_k=top_k, temperature=temperature)
+
+    def classify_document(self, text: str, temperature: float = 1.2, top_k: int = 5, pooling: str = "mean") -> Dict[str, any]:
+        """长文档分类：全文切分为重叠窗口批量推理，池化 logits 后再映射，避免只看前 512 个 token。"""
+        if not self.is_loaded:
+            raise RuntimeError("模型未加载，请先调用 load_model()")
+
+        if not text or not text.strip():
+            raise ValueError("输入文本不能为空")
+
+        if temperature <= 0:
+            raise ValueError("temperature 必须 > 0")
+
+        if pooling not in POOLING_METHODS:
+            raise ValueError(f"pooling 必须为 {POOLING_METHODS} 之一")
+
+        try:
+            key = text_key(text, f"{self.model_version}|doc:{pooling}")
+            logits = self.cache.get(key)
+            if logits is None:
+                logits = self.inflight.do(key, lambda: self._document_logits(text, pooling))
+                self.cache.put(key, logits)
+
+            from .label_mapper import map_finbert_logits_to_labels
+            return map_finbert_logits_to_labels(logits, top_k=top_k, temperature=temperature)
+
+        except Exception as e:
+            print(f"❌ 长文档分类过程出错: {str(e)}")
+            raise
+
+    async def classify_document_async(self, text: str, temperature: float = 1.2, top_k: int = 5, pooling: str = "mean") -> Dict[str, any]:
+        """在推理线程池中执行 classify_document。"""
+        return await self.executor.run(self.classify_document, text, temperature=temperature, top_k=top_k, pooling=pooling)
+
+    def classify_documents(self, texts: List[str], temperature: float = 1.2, top_k: int = 5,
+                           pooling: str = "mean") -> List[Dict[str, any]]:
+        """批量长文档分类：所有文档的窗口合并后按长度分桶推理，再按文档池化；结果顺序与输入一致。"""
+        if not self.is_loaded:
+            raise RuntimeError("模型未加载，请先调用 load_model()")
+
+        if not texts:
+            return []
+        if any(not t or not t.strip() for t in texts):
+            raise ValueError("输入文本不能为空")
+        if temperature <= 0:
+            raise ValueError("temperature 必须 > 0")
+        if pooling not in POOLING_METHODS:
+            raise ValueError(f"pooling 必须为 {POOLING_METHODS} 之一")
+
+        try:
+            version = f"{self.model_version}|doc:{pooling}"
+            keys = [text_key(t, version) for t in texts]
+            results = [self.cache.get(k) for k in keys]
+            pending: Dict[str, List[int]] = {}
+            for i, r in enumerate(results):
+                if r is None:
+                    pending.setdefault(keys[i], []).append(i)
+            if pending:
+                missing = [positions[0] for positions in pending.values()]
+                for i, row in zip(missing, self._documents_logits([texts[i] for i in missing], pooling)):
+                    self._fill_results(keys[i], row, pending, results)
+
+            from .label_mapper import map_finbert_logits_batch
+            return map_finbert_logits_batch(results, top_k=top_k, temperature=temperature)
+
+        except Exception as e:
+            print(f"❌ 批量长文档分类过程出错: {str(e)}")
+            raise
+
+    async def classify_documents_async(self, texts: List[str], temperature: float = 1.2, top_k: int = 5,
+                                       pooling: str = "mean") -> List[Dict[str, any]]:
+        """在推理线程池中执行 classify_documents；线程池饱和时抛出 ServerBusyError。"""
+        return await self.executor.run(self.classify_documents, texts, temperature=temperature, top_k=top_k,
+                                       pooling=pooling)
+
+    def classify_batch(self, texts: List[str], temperature: float = 1.2, top_k: int = 5) -> List[Dict[str, any]]:
+        """批量分类：整批 tokenize（padding 对齐）后执行批量前向推理，结果顺序与输入一致。"""
+        if not self.is_loaded:
+            raise RuntimeError("模型未加载，请先调用 load_model()")
+
+        if not texts:
+            return []
+        if any(not t or not t.strip() for t in texts):
+            raise ValueError("输入文本不能为空")
+        if temperature <= 0:
+            raise ValueError("temperature 必须 > 0")
+
+        try:
+            from .label_mapper import map_finbert_logits_batch
+            logits = self._cached_logits(texts)
+            return map_finbert_logits_batch(logits, top_k=top_k, temperature=temperature)
+
+        except Exception as e:
+            print(f"❌ 批量分类过程出错: {str(e)}")
+            raise
+
+    def compute_logits(self, texts: List[str], use_cache: bool = True) -> List[List[float]]:
+        """返回每条文本的原始 logits（[Positive, Negative, Neutral]），供离线批处理自行映射或落盘。
+
+        一次性的大批量任务可传 use_cache=False，避免冲掉在线请求的结果缓存。
+        """
+        if not self.is_loaded:
+            raise RuntimeError("模型未加载，请先调用 load_model()")
+
+        if not texts:
+            return []
+        return self._cached_logits(texts) if use_cache else self._infer_logits(texts)
+
+    async def classify_batch_async(self, texts: List[str], temperature: float = 1.2, top_k: int = 5) -> List[Dict[str, any]]:
+        """在推理线程池中执行 classify_batch；线程池饱和时抛出 ServerBusyError。"""
+        return await self.executor.run(self.classify_batch, texts, temperature=temperature, top_k=top_k)
+
+    def get_inference_stats(self) -> Dict[str, any]:
+        """推理线程池与微批调度器的运行指标。"""
+        return {
+            "executor": self.executor.stats(),
+            "batcher": self.batcher.stats(),
+            "cache": self.cache.stats(),
+            "inflight": self.inflight.stats(),
+            "token_cache": self.token_cache.stats(),
+            "model_version": self.model_version,
+            "backend": self.backend_name,
+            "backend_parity_diff": self.backend_parity_diff,
+            "near_dup": {**self.near_dup.stats(), "reused": self.near_dup_reused} if self.near_dup else None,
+        }
+
+    async def _submit_to_batcher(self, key: str, text: str) -> List[float]:
+        # 近似重复索引为 SQLite 查询，放到线程中执行，不阻塞事件循环
+        logits = await asyncio.to_thread(self._near_duplicate_logits, text) if self.near_dup is not None else None
+        if logits is None:
+            logits = await self.batcher.submit(text)
+            if self.near_dup is not None:
+                await asyncio.to_thread(self._remember_logits, text, logits)
+        self.cache.put(key, logits)
+        return logits
+
+    def _near_duplicate_logits(self, text: str):
+        """复用同一模型版本下近似重复文本的 logits；未启用或没有足够相似的文本时返回 None。"""
+        if self.near_dup is None:
+            return None
+        match = self.near_dup.query(text)
+        payload = match["payload"] if match else None
+        if payload and payload.get("model_version") == self.model_version:
+            self.near_dup_reused += 1
+            return payload["logits"]
+        return None
+
+    def _remember_logits(self, text: str, logits: List[float]):
+        if self.near_dup is not None:
+            self.near_dup.add(text, payload={"logits": logits, "model_version": self.model_version})
+
+    def _invalidate_cache(self):
+        """模型权重或推理后端变化后更新版本号并清空缓存。"""
+        self.model_version = f"{self.model_name}@{self.weights_fingerprint}:{self.backend_name}"
+        self.cache.clear()
+
+    def _cached_logits(self, texts: List[str]) -> List[List[float]]:
+        """返回每条文本的 logits：命中缓存的直接复用，其余批量推理后写入缓存。"""
+        version = self.model_version
+        keys = [text_key(t, version) for t in texts]
+        results = [self.cache.get(k) for k in keys]
+        # 同一批次内重复的文本只推理一次
+        pending: Dict[str, List[int]] = {}
+        for i, r in enumerate(results):
+            if r is None:
+                pending.setdefault(keys[i], []).append(i)
+        missing = [positions[0] for positions in pending.values()]
+        inferred = []
+        for i in missing:
+            row = self._near_duplicate_logits(texts[i])
+            if row is None:
+                inferred.append(i)
+            else:
+                self._fill_results(keys[i], row, pending, results)
+        if inferred:
+            for i, row in zip(inferred, self._infer_logits([texts[i] for i in inferred])):
+                self._remember_logits(texts[i], row)
+                self._fill_results(keys[i], row, pending, results)
+        return results
+
+    def _fill_results(self, key: str, row: List[float], pending: Dict[str, List[int]], results: List):
+        self.cache.put(key, row)
+        for j in pending[key]:
+            results[j] = row
+
+    def _infer_logits(self, texts: List[str]) -> List[List[float]]:
+        """不经结果缓存直接推理，返回与输入顺序一致的 python 列表形式 logits。
+
+        先整体分词，再按 token 长度分桶（每桶不超过 max_batch_size 条、MAX_BATCH_TOKENS 个补齐后 token），
+        避免短标题被补齐到长文章的长度。
+        """
+        ids = self.token_cache.encode_ids(self.tokenizer, texts)
+        results: List = [None] * len(texts)
+        pad_id = self.tokenizer.pad_token_id or 0
+        for bucket in length_buckets([len(row) for row in ids], self.max_batch_size, MAX_BATCH_TOKENS):
+            logits = self._forward_inputs(pad_batch([ids[i] for i in bucket], pad_id))
+            for i, row in zip(bucket, logits.tolist()):
+                results[i] = row
+        return results
+
+    def _document_logits(self, text: str, pooling: str) -> List[float]:
+        return self._documents_logits([text], pooling)[0]
+
+    def _documents_logits(self, texts: List[str], pooling: str) -> List[List[float]]:
+        """切分各文档的窗口，所有窗口按长度分桶批量推理后按文档池化。"""
+        all_ids = self.tokenizer(texts, add_special_tokens=False, truncation=False, verbose=False)["input_ids"]
+        windows, owners = [], []
+        for i, ids in enumerate(all_ids):
+            for window in split_windows(
+                ids,
+                cls_id=self.tokenizer.cls_token_id,
+                sep_id=self.tokenizer.sep_token_id,
+                max_length=MAX_SEQ_LENGTH,
+                overlap=DOC_WINDOW_OVERLAP,
+                max_windows=DOC_MAX_WINDOWS,
+            ):
+                windows.append(window)
+                owners.append(i)
+        pad_id = self.tokenizer.pad_token_id or 0
+        rows: List[List[List[float]]] = [[] for _ in texts]
+        window_logits: List = [None] * len(windows)
+        for bucket in length_buckets([len(w) for w in windows], self.max_batch_size, MAX_BATCH_TOKENS):
+            for j, row in zip(bucket, self._forward_inputs(pad_batch([windows[j] for j in bucket], pad_id)).tolist()):
+                window_logits[j] = row
+        for owner, row in zip(owners, window_logits):
+            rows[owner].append(row)
+        return [pool_logits(r, pooling) for r in rows]
+
+    def _forward_inputs(self, inputs: Dict[str, torch.Tensor]) -> torch.Tensor:
+        """对已补齐的模型输入执行单次前向推理，返回 [N, 3] logits。"""
+        return self.backend.forward(inputs)
+
     def get_training_status(self):
         return self.training_status
 
-    def start_training(self, dataset_path: str, epochs: int = 3):
-        """启动训练线程"""
+    def start_training(self, dataset_path: str, epochs: int = 3, dedupe: bool = True):
+        """启动训练线程；dedupe 为 True 时先去除数据集内的近似重复新闻"""
+        if not self.is_loaded:
+            raise RuntimeError("模型未加载，请先调用 load_model()")
         if self.training_status["is_training"]:
             raise RuntimeError("Training is already in progress")
-        
-        thread = threading.Thread(target=self._training_loop, args=(dataset_path, epochs))
+        if epochs < 1:
+            raise RuntimeError("epochs 必须 >= 1")
+
+        # 在启动线程前置位，避免并发请求重复启动
+        self.training_status["is_training"] = True
+        thread = threading.Thread(target=self._training_loop, args=(dataset_path, epochs, dedupe), daemon=True)
         thread.start()
         return {"status": "started", "message": "Training started in background"}
 
-    def _training_loop(self, dataset_path: str, epochs: int):
-        """模拟训练循环"""
+    def _training_loop(self, dataset_path: str, epochs: int, dedupe: bool = True):
+        """CPU 微调：读取分词缓存（首次训练时构建），按长度分桶成批并累积梯度。
+
+        在模型副本上训练，训练期间在线推理不受影响；完成后替换模型并使推理缓存失效。
+        """
         print(f"Starting training on {dataset_path} for {epochs} epochs")
-        self.training_status["is_training"] = True
-        self.training_status["total_epochs"] = epochs
-        self.training_status["message"] = "Initializing training..."
-        self.training_status["progress"] = 0
-        
+        self.training_status.update(
+            is_training=True, total_epochs=epochs, epoch=0, progress=0, loss=0.0, message="Tokenizing dataset...", saved_to=None
+        )
+
         try:
-            # 模拟数据加载
-            time.sleep(2)
-            
+            # 分词缓存：同一数据集 / 分词器再次训练时直接复用，不再分词；
+            # 转载新闻的近似重复会放大同一样本的权重，构建缓存时先去重
+            label2id = {name.lower(): idx for idx, name in self.labels_map.items()}
+            cache_path, meta = build_token_cache(
+                dataset_path, self.tokenizer, label2id, max_length=MAX_SEQ_LENGTH, dedupe=dedupe
+            )
+            if meta["from_cache"]:
+                print(f"♻️  复用分词缓存 {meta['key']}（{meta['num_rows']} 条）")
+            else:
+                print(f"🧹 训练数据去除近似重复 {meta['removed_duplicates']} 条，"
+                      f"跳过无法识别的标签 {meta['skipped_labels']} 条，分词 {meta['num_rows']} 条")
+            self.training_status["samples"] = meta["num_rows"]
+            self.training_status["token_cache"] = {"key": meta["key"], "from_cache": meta["from_cache"]}
+            if not meta["num_rows"]:
+                raise ValueError(f"数据集中没有可用于训练的带标签样本（label 可为 {', '.join(sorted(label2id))} 或类别编号）")
+
+            dataset = TokenDataset(cache_path)
+            sampler = LengthBucketSampler(dataset, TRAIN_BATCH_SIZE, max_batch_tokens=TRAIN_MAX_BATCH_TOKENS)
+            loader = DataLoader(
+                dataset,
+                batch_sampler=sampler,
+                num_workers=TRAIN_WORKERS,
+                collate_fn=functools.partial(collate_tokens, pad_token_id=self.tokenizer.pad_token_id or 0),
+                persistent_workers=TRAIN_WORKERS > 0,
+                multiprocessing_context="spawn" if TRAIN_WORKERS > 0 else None,
+            )
+
+            model = copy.deepcopy(self.model)
+            model.train()
+            optimizer = torch.optim.AdamW(model.parameters(), lr=TRAIN_LEARNING_RATE, weight_decay=0.01)
+            updates_per_epoch = math.ceil(len(sampler) / TRAIN_GRAD_ACCUM_STEPS)
+            total_updates = updates_per_epoch * epochs
+            scheduler = get_linear_schedule_with_warmup(optimizer, int(total_updates * 0.1), total_updates)
+
+            updates = 0
             for epoch in range(1, epochs + 1):
                 self.training_status["epoch"] = epoch
                 self.training_status["message"] = f"Training Epoch {epoch}/{epochs}"
-                
-                # 模拟每个 epoch 的 steps
-                steps = 10
-                for step in range(steps):
-                    time.sleep(0.5) # 模拟计算时间
-                    progress = ((epoch - 1) * steps + step + 1) / (epochs * steps) * 100
-                    self.training_status["progress"] = int(progress)
-                    # 模拟 loss 下降
-                    self.training_status["loss"] = max(0.1, 2.0 * (1 - progress/100) + (0.1 * (step % 2)))
-            
-            self.training_status["message"] = "Training completed successfully!"
+                sampler.set_epoch(epoch)
+                num_batches = len(sampler)
+                running_loss, window = 0.0, 0
+                optimizer.zero_grad()
+                for i, batch in enumerate(loader):
+                    loss = model(**batch).loss
+                    (loss / TRAIN_GRAD_ACCUM_STEPS).backward()
+                    running_loss += loss.item()
+                    window += 1
+                    if (i + 1) % TRAIN_GRAD_ACCUM_STEPS == 0 or i + 1 == num_batches:
+                        torch.nn.utils.clip_grad_norm_(model.parameters(), 1.0)
+                        optimizer.step()
+                        scheduler.step()
+                        optimizer.zero_grad()
+                        updates += 1
+                        self.training_status["loss"] = running_loss / window
+                        self.training_status["progress"] = min(99, int(updates / total_updates * 100))
+                        running_loss, window = 0.0, 0
+
+            model.eval()
+            # 保存到磁盘，否则微调结果只存在于内存中，重启后丢失
+            save_dir = TRAIN_OUTPUT_DIR / f"finbert-finetuned-{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            model.save_pretrained(save_dir)
+            self.tokenizer.save_pretrained(save_dir)
+
+            self.model = model
+            self.weights_fingerprint = weights_fingerprint(model)
+            self._init_backend()
+            self._invalidate_cache()
+            self.training_status["saved_to"] = str(save_dir)
+            self.training_status["message"] = (
+                f"Training completed successfully! Saved to {save_dir}; "
+                f"set FINBERT_MODEL_NAME to this directory to load it after a restart."
+            )
             self.training_status["progress"] = 100
-            self.training_status["is_training"] = False
-            print("Training completed")
-            
+            print(f"💾 训练完成，模型已保存到 {save_dir}")
+
         except Exception as e:
             print(f"Training failed: {e}")
-            self.training_status["is_training"] = False
             self.training_status["message"] = f"Error: {str(e)}"
+        finally:
+            self.training_status["is_training"] = False
 
 
 # 创建全局服务实例
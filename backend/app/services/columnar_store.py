@@ -0,0 +1,272 @@
+"""数据集列式存储 (Parquet)
+
+上传或保存的 CSV 数据集可转换为 app/data/columnar/<数据集名>.parquet（需安装 pyarrow）:
+1. 流式读取 CSV、按 row_group_rows 行一个行组写出，内存占用与文件大小无关；所有列按字符串存储
+2. 转换时一并计算行数与各列统计（空值数、最大/平均长度），写入同名 .meta.json，查询时无需再扫描
+3. 按行组元数据定位任意页，只读取涉及的行组与所需列（随机访问预览 + 列投影）
+4. 元数据记录源 CSV 的大小与修改时间，CSV 变化后视为过期，调用方回退到 CSV 并重新转换
+"""
+import csv
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+BASE_DIR = Path(__file__).resolve().parent.parent  # app/
+DATASET_DIR = BASE_DIR / "data" / "datasets"
+COLUMNAR_DIR = BASE_DIR / "data" / "columnar"
+
+# 上传 / 保存数据集后是否自动转换为 Parquet（未安装 pyarrow 时自动跳过）
+CONVERT_ON_SAVE = os.getenv("DATASET_COLUMNAR", "1") == "1"
+ROW_GROUP_ROWS = int(os.getenv("DATASET_ROW_GROUP_ROWS", "10000"))
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.compute  # noqa: F401
+        import pyarrow.csv  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as e:
+        raise RuntimeError("列式存储需要安装 pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+
+def is_available() -> bool:
+    try:
+        _require_pyarrow()
+        return True
+    except RuntimeError:
+        return False
+
+
+def should_convert() -> bool:
+    """上传 / 保存数据集后是否应转换为 Parquet。"""
+    return CONVERT_ON_SAVE and is_available()
+
+
+def _rechunk(batches, chunk_rows: int) -> Iterator[List[Dict]]:
+    chunk: List[Dict] = []
+    for batch in batches:
+        for row in batch.to_pylist():
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+class ColumnarStore:
+    """CSV 数据集的 Parquet 副本与统计缓存。"""
+
+    def __init__(self, dataset_dir: Path = DATASET_DIR, columnar_dir: Path = COLUMNAR_DIR,
+                 row_group_rows: int = ROW_GROUP_ROWS):
+        if row_group_rows < 1:
+            raise ValueError("row_group_rows must be >= 1")
+        self.dataset_dir = Path(dataset_dir)
+        self.columnar_dir = Path(columnar_dir)
+        self.row_group_rows = row_group_rows
+        self._lock = threading.Lock()
+        self._converting: Dict[str, threading.Lock] = {}
+
+    def parquet_path(self, filename: str) -> Path:
+        return self.columnar_dir / f"{Path(filename).stem}.parquet"
+
+    def meta_path(self, filename: str) -> Path:
+        return self.columnar_dir / f"{Path(filename).stem}.meta.json"
+
+    def _source_signature(self, filename: str) -> Optional[Dict]:
+        try:
+            st = os.stat(self.dataset_dir / filename)
+        except FileNotFoundError:
+            return None
+        return {"source_size": st.st_size, "source_mtime_ns": st.st_mtime_ns}
+
+    def meta(self, filename: str) -> Optional[Dict]:
+        """返回与当前 CSV 一致的转换元数据；未转换或已过期时返回 None。"""
+        signature = self._source_signature(filename)
+        if signature is None or not self.parquet_path(filename).exists():
+            return None
+        try:
+            with open(self.meta_path(filename), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if any(meta.get(k) != v for k, v in signature.items()):
+            return None
+        return meta
+
+    def is_fresh(self, filename: str) -> bool:
+        return self.meta(filename) is not None
+
+    def convert(self, filename: str) -> Dict:
+        """将 CSV 转换为 Parquet 并返回元数据；同一数据集的并发转换只执行一次。"""
+        pa = _require_pyarrow()
+        with self._lock:
+            lock = self._converting.setdefault(filename, threading.Lock())
+        with lock:
+            meta = self.meta(filename)
+            if meta is not None:
+                return meta
+            return self._convert(pa, filename)
+
+    def _convert(self, pa, filename: str) -> Dict:
+        pc, pacsv, pq = pa.compute, pa.csv, pa.parquet
+        source = self.dataset_dir / filename
+        signature = self._source_signature(filename)
+        if signature is None:
+            raise FileNotFoundError(filename)
+
+        # 与 pyarrow 一致去掉 UTF-8 BOM，否则首列列名带 \ufeff
+        with open(source, "r", newline="", encoding="utf-8-sig") as f:
+            names = next(csv.reader(f), [])
+        if not names:
+            raise ValueError("数据集为空或缺少表头")
+
+        os.makedirs(self.columnar_dir, exist_ok=True)
+        target = self.parquet_path(filename)
+        tmp = target.with_name(target.name + ".tmp")
+        schema = pa.schema([(name, pa.string()) for name in names])
+        stats = {name: {"empty_count": 0, "max_length": 0, "total_length": 0} for name in names}
+        num_rows = 0
+        num_row_groups = 0
+
+        reader = pacsv.open_csv(
+            source,
+            read_options=pacsv.ReadOptions(block_size=1 << 22),
+            parse_options=pacsv.ParseOptions(newlines_in_values=True),
+            convert_options=pacsv.ConvertOptions(
+                column_types={name: pa.string() for name in names},
+                strings_can_be_null=False,
+                quoted_strings_can_be_null=False,
+            ),
+        )
+        pending, pending_rows = [], 0
+        with pq.ParquetWriter(tmp, schema, compression="zstd") as writer:
+            def write_pending():
+                nonlocal num_row_groups
+                table = pa.Table.from_batches(pending, schema=schema)
+                writer.write_table(table, row_group_size=self.row_group_rows)
+                num_row_groups += -(-table.num_rows // self.row_group_rows)
+
+            for batch in reader:
+                for name, column in zip(batch.schema.names, batch.columns):
+                    lengths = pc.utf8_length(column)
+                    col_stats = stats[name]
+                    col_stats["empty_count"] += pc.sum(pc.equal(lengths, 0)).as_py() or 0
+                    col_stats["max_length"] = max(col_stats["max_length"], pc.max(lengths).as_py() or 0)
+                    col_stats["total_length"] += pc.sum(lengths).as_py() or 0
+                num_rows += batch.num_rows
+                pending.append(batch)
+                pending_rows += batch.num_rows
+                # 攒满整数个行组再写，避免 CSV 分块边界产生碎小行组
+                if pending_rows >= self.row_group_rows:
+                    write_pending()
+                    pending, pending_rows = [], 0
+            if pending:
+                write_pending()
+        os.replace(tmp, target)
+
+        meta = {
+            "filename": filename,
+            **signature,
+            "num_rows": num_rows,
+            "num_row_groups": num_row_groups,
+            "columns": [
+                {
+                    "name": name,
+                    "type": "string",
+                    "empty_count": s["empty_count"],
+                    "max_length": s["max_length"],
+                    "avg_length": round(s["total_length"] / num_rows, 2) if num_rows else 0.0,
+                }
+                for name, s in stats.items()
+            ],
+            "converted_at": datetime.now().isoformat(),
+        }
+        meta_tmp = self.meta_path(filename).with_suffix(".tmp")
+        with open(meta_tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(meta_tmp, self.meta_path(filename))
+        print(f"🗜️  数据集已转换为 Parquet: {filename} ({num_rows} 行, {num_row_groups} 个行组)")
+        return meta
+
+    def convert_quietly(self, filename: str):
+        """后台任务入口：转换失败只记录日志，不影响原 CSV 的使用。"""
+        try:
+            self.convert(filename)
+        except Exception as e:
+            print(f"⚠️  数据集 Parquet 转换失败 ({filename}): {e}")
+
+    def _check_columns(self, meta: Dict, columns: Optional[List[str]]):
+        if columns:
+            known = {c["name"] for c in meta["columns"]}
+            unknown = [c for c in columns if c not in known]
+            if unknown:
+                raise ValueError(f"未知列: {unknown}")
+
+    def read_page(self, filename: str, offset: int = 0, limit: int = 20,
+                  columns: Optional[List[str]] = None) -> List[Dict]:
+        """读取 [offset, offset + limit) 行；只读取与该区间相交的行组。"""
+        pq = _require_pyarrow().parquet
+        meta = self.meta(filename)
+        if meta is None:
+            raise FileNotFoundError(filename)
+        self._check_columns(meta, columns)
+        if offset < 0 or limit < 1:
+            raise ValueError("offset must be >= 0 and limit >= 1")
+
+        pf = pq.ParquetFile(self.parquet_path(filename))
+        groups, first_start, start = [], None, 0
+        for i in range(pf.metadata.num_row_groups):
+            rows = pf.metadata.row_group(i).num_rows
+            if start + rows > offset and start < offset + limit:
+                groups.append(i)
+                if first_start is None:
+                    first_start = start
+            start += rows
+        if not groups:
+            return []
+        table = pf.read_row_groups(groups, columns=columns)
+        return table.slice(offset - first_start, limit).to_pylist()
+
+    def iter_rows(self, filename: str, skip_rows: int = 0, chunk_rows: int = 256,
+                  columns: Optional[List[str]] = None) -> Iterator[List[Dict]]:
+        """跳过前 skip_rows 行后按 chunk_rows 行分块迭代（跳过的整行组不会被读取）。"""
+        pq = _require_pyarrow().parquet
+        meta = self.meta(filename)
+        if meta is None:
+            raise FileNotFoundError(filename)
+        self._check_columns(meta, columns)
+
+        pf = pq.ParquetFile(self.parquet_path(filename))
+        groups, start = [], 0
+        for i in range(pf.metadata.num_row_groups):
+            rows = pf.metadata.row_group(i).num_rows
+            if groups or start + rows > skip_rows:
+                groups.append(i)
+            else:
+                start += rows
+        if not groups:
+            return iter(())
+        batches = pf.iter_batches(batch_size=chunk_rows, row_groups=groups, columns=columns)
+        return _rechunk(self._skip(batches, skip_rows - start), chunk_rows)
+
+    @staticmethod
+    def _skip(batches, n: int):
+        for batch in batches:
+            if n >= batch.num_rows:
+                n -= batch.num_rows
+                continue
+            yield batch.slice(n) if n else batch
+            n = 0
+
+    def remove(self, filename: str):
+        for path in (self.parquet_path(filename), self.meta_path(filename)):
+            path.unlink(missing_ok=True)
+
+
+columnar_store = ColumnarStore()
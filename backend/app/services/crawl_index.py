@@ -0,0 +1,138 @@
+"""爬虫增量索引
+
+以 SQLite 持久化已爬取的 URL，使后续爬取只抓取新增或变化的页面:
+1. 每个 URL 记录 ETag / Last-Modified，再次访问时发送 If-None-Match / If-Modified-Since，
+   服务端返回 304 即视为未变化，不再下载与解析
+2. 记录正文内容哈希 (sha256)；重新下载后哈希不变的文章同样视为未变化
+3. 已爬取但服务端不提供校验头的文章默认不再重新抓取（revisit=True 时强制重新下载比较哈希）
+4. 首次访问时才打开数据库，导入模块不会创建文件
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+BASE_DIR = Path(__file__).resolve().parent.parent  # app/
+DEFAULT_DB_PATH = BASE_DIR / "data" / "crawl_index.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    content_hash TEXT,
+    first_seen TEXT NOT NULL,
+    last_checked TEXT NOT NULL,
+    last_changed TEXT NOT NULL
+);
+"""
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CrawlIndex:
+    """已爬取 URL 的持久化索引（线程安全）。"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = str(db_path)
+        self._lock = threading.Lock()
+        self._open_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """首次访问时打开数据库。"""
+        if self._db is None:
+            with self._open_lock:
+                if self._db is None:
+                    self._db = self._open()
+        return self._db
+
+    def _open(self) -> sqlite3.Connection:
+        if self.db_path != ":memory:":
+            os.makedirs(Path(self.db_path).parent, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        if self.db_path != ":memory:":
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        conn.commit()
+        return conn
+
+    def get(self, url: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM pages WHERE url = ?", (url,)).fetchone()
+        return dict(row) if row else None
+
+    def get_many(self, urls: Iterable[str]) -> Dict[str, Dict]:
+        """批量查询，返回 {url: 记录}（未爬取过的 URL 不在结果中）。"""
+        urls = list(dict.fromkeys(urls))
+        found = {}
+        with self._lock:
+            # 分批查询，避免超出 SQLite 参数个数上限
+            for i in range(0, len(urls), 500):
+                batch = urls[i:i + 500]
+                placeholders = ", ".join("?" for _ in batch)
+                for row in self._conn.execute(f"SELECT * FROM pages WHERE url IN ({placeholders})", batch):
+                    found[row["url"]] = dict(row)
+        return found
+
+    @staticmethod
+    def conditional_headers(entry: Optional[Dict]) -> Dict[str, str]:
+        """由已有记录生成条件请求头；没有校验信息时返回空字典。"""
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def record(self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None,
+               text_hash: Optional[str] = None) -> bool:
+        """记录一次成功抓取，返回内容是否为新增或已变化。
+
+        text_hash 为 None（例如 304 响应）时保留原有哈希，只更新校验头与检查时间。
+        """
+        now = datetime.now().isoformat()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, content_hash FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                self._conn.execute(
+                    "INSERT INTO pages (url, etag, last_modified, content_hash, first_seen, last_checked, last_changed) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (url, etag, last_modified, text_hash, now, now, now),
+                )
+                return True
+            changed = text_hash is not None and text_hash != row["content_hash"]
+            self._conn.execute(
+                "UPDATE pages SET etag = ?, last_modified = ?, content_hash = ?, last_checked = ?, "
+                "last_changed = CASE WHEN ? THEN ? ELSE last_changed END WHERE url = ?",
+                (etag or row["etag"], last_modified or row["last_modified"],
+                 text_hash if text_hash is not None else row["content_hash"], now, changed, now, url),
+            )
+            return changed
+
+    def remove(self, url: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+crawl_index = CrawlIndex()
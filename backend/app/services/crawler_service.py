@@ -1,11 +1,89 @@
-import requests
-from bs4 import BeautifulSoup
+import asyncio
 import csv
 import os
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 from pathlib import Path
 
+from .async_fetcher import AsyncFetcher
+from .crawl_index import CrawlIndex, content_hash, crawl_index
+from .html_extract import get_extractor
+from .near_duplicate import NearDuplicateIndex, news_index
+
+# 单次爬取的文章数上限（0 表示不限，抓取自上次爬取以来的全部新文章）
+MAX_ARTICLES = int(os.getenv("CRAWLER_MAX_ARTICLES", "0"))
+# 沿 rel="next" 翻页的最大列表页数
+MAX_PAGES = int(os.getenv("CRAWLER_MAX_PAGES", "10"))
+
+# 模拟来源的新闻 (headline, body)，各来源互不相同
+MOCK_STORIES = {
+    "reuters": [
+        ("Euro zone bond yields climb as ECB officials push back on rate cut bets",
+         "Germany's ten-year Bund yield rose to a three-week high after two policymakers said markets were "
+         "pricing easing too early, while Italian spreads widened ahead of a debt auction."),
+        ("Copper hits two-month peak on Chilean mine disruption",
+         "Benchmark copper on the London Metal Exchange gained 2.1 percent after a strike halted output at a "
+         "large Chilean mine, tightening an already low inventory picture in Shanghai warehouses."),
+        ("Japanese automakers cut full-year profit forecasts on weaker yuan demand",
+         "Three of the country's largest carmakers lowered guidance, citing slowing sales in China and higher "
+         "battery material costs that offset gains from the weak yen."),
+        ("Brazil central bank holds Selic steady, signals pause may last",
+         "Policymakers in Brasilia kept the benchmark rate unchanged for a second meeting and warned that fiscal "
+         "uncertainty and sticky services inflation argue for caution through the first half of next year."),
+        ("Saudi Aramco prices Asian crude higher for next month",
+         "The state oil producer raised its official selling price for Arab Light to Asia by 40 cents a barrel, "
+         "more than refiners had expected, after strong margins in Singapore."),
+    ],
+    "bloomberg": [
+        ("Hedge funds pile into short dollar trades before payrolls",
+         "Leveraged funds built their largest bearish position on the greenback since March, options data show, "
+         "betting that softer hiring will pull Treasury yields lower into the December meeting."),
+        ("Private credit lenders step up financing of leveraged buyouts",
+         "Direct lenders provided more than half of buyout debt this quarter as banks stayed cautious, with "
+         "several unitranche loans topping two billion dollars for software deals."),
+        ("Chinese developers' dollar bonds slump after missed coupon",
+         "Notes issued by a mid-sized Shenzhen builder fell below twenty cents on the dollar once the grace "
+         "period lapsed, reviving contagion worries across high-yield property credit."),
+        ("Gold extends record run as central banks keep buying",
+         "Bullion climbed for a sixth session to an all-time high near 2,450 dollars an ounce, supported by "
+         "purchases from emerging-market reserve managers and falling real yields."),
+        ("Nvidia supplier shares jump on surging AI server orders",
+         "A Taiwanese contract manufacturer said monthly revenue doubled from a year earlier on demand for "
+         "accelerated computing racks, lifting chip equipment stocks across Asia."),
+    ],
+    "cnbc": [
+        ("Dow futures rise as investors await Fed minutes",
+         "Stock futures tied to the blue-chip index edged up overnight while traders looked to the minutes "
+         "for clues on how long officials intend to keep policy restrictive."),
+        ("Retail sales beat estimates as holiday spending starts early",
+         "Consumer spending at stores and online increased 0.7 percent last month, topping forecasts as "
+         "shoppers took advantage of discounts on electronics and apparel."),
+        ("Regional bank stocks slide after commercial real estate warning",
+         "Shares of several lenders fell more than 5 percent after one disclosed rising delinquencies in its "
+         "office loan book and set aside additional reserves for credit losses."),
+        ("Tesla shares fall as delivery numbers miss Wall Street forecasts",
+         "The electric vehicle maker reported quarterly deliveries below analyst estimates, citing factory "
+         "upgrades and softer demand in Europe amid intensifying price competition."),
+        ("Mortgage rates drop to lowest level since spring",
+         "The average thirty-year fixed rate fell to 6.6 percent, according to a weekly survey, giving a modest "
+         "lift to refinancing applications and homebuilder sentiment."),
+    ],
+    # 未知来源：通用模板，标题后附来源名
+    "default": [
+        ("Market rally continues on strong sector growth",
+         "Equities advanced for a third day as cyclical sectors led gains on upbeat earnings."),
+        ("Central bank considers rate adjustments",
+         "Officials signalled that policy could change if inflation keeps moderating."),
+        ("Tech stocks surge in early trading",
+         "Semiconductor and software names rallied at the open on renewed AI optimism."),
+        ("Global supply chain issues persist",
+         "Shipping delays and elevated freight costs continue to weigh on manufacturers."),
+        ("Investors eye upcoming earnings reports",
+         "Analysts expect mixed results as margins come under pressure from higher wages."),
+    ],
+}
+
+
 class CrawlerService:
     def __init__(self):
         self.sources = {
@@ -18,117 +96,204 @@ class CrawlerService:
         self.base_dir = Path(__file__).resolve().parent.parent # app/
         self.dataset_dir = self.base_dir / "data" / "datasets"
         os.makedirs(self.dataset_dir, exist_ok=True)
+        # 跨来源、跨批次的近似重复索引（持久化）
+        self.near_dup: NearDuplicateIndex = news_index
+        # 已爬取 URL 的校验头与内容哈希（持久化），用于增量爬取
+        self.crawl_index: CrawlIndex = crawl_index
+        # 列表页 / 文章页的 HTML 提取实现（CRAWLER_HTML_PARSER）
+        self.extractor = get_extractor()
+
+    async def crawl_async(self, source: str = "yahoo", dedup: bool = True, max_articles: int = MAX_ARTICLES,
+                          incremental: bool = True, revisit: bool = False,
+                          fetcher: Optional[AsyncFetcher] = None) -> List[Dict[str, str]]:
+        """爬取新闻；dedup 为 True 时丢弃与已爬取新闻近似重复的条目（例如不同来源转载的同一报道）。
+
+        文章页通过 AsyncFetcher 并发抓取（连接池、按主机限速、失败重试），单篇失败不影响整批。
+        incremental 为 True 时只返回新增或内容已变化的文章：已爬取的页面发送条件请求，
+        没有校验头的已爬取文章不再抓取（revisit=True 时重新下载并比较内容哈希）。
+        max_articles 为 0 时不限篇数，沿列表页的 rel="next" 翻页直到没有新链接。
+        """
+        headlines = await self._fetch_async(source, max_articles, fetcher, incremental, revisit)
+        if not dedup:
+            return headlines
+        return await asyncio.to_thread(self.drop_near_duplicates, headlines)
+
+    def crawl(self, source: str = "yahoo", dedup: bool = True, max_articles: int = MAX_ARTICLES,
+              incremental: bool = True) -> List[Dict[str, str]]:
+        """同步入口（脚本等非异步环境使用）；在事件循环中请直接 await crawl_async。"""
+        return asyncio.run(self.crawl_async(source, dedup=dedup, max_articles=max_articles, incremental=incremental))
+
+    def drop_near_duplicates(self, headlines: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """查询近似重复索引，保留新的条目并将其加入索引。"""
+        kept = []
+        for h in headlines:
+            match = self.near_dup.check_and_add(h['text'], payload={'source': h.get('source', ''), 'crawled_at': h.get('crawled_at', '')})
+            if match is None:
+                kept.append(h)
+            else:
+                first_source = (match['payload'] or {}).get('source', '')
+                print(f"Skipping near-duplicate article (similarity {match['similarity']:.2f}, first seen from {first_source})")
+        if len(kept) < len(headlines):
+            print(f"Dropped {len(headlines) - len(kept)} near-duplicate articles")
+        return kept
+
+    def release(self, articles: List[Dict[str, str]]):
+        """撤销文章的已爬取标记（近似重复索引与增量索引），用于爬取后未能入库的文章，下次爬取时重新抓取。"""
+        for article in articles:
+            self.near_dup.remove(article['text'])
+            if article.get('url'):
+                self.crawl_index.remove(article['url'])
+
+    def _mock_news(self, source: str) -> List[Dict[str, str]]:
+        # Mock data for other sources: each source has its own stories so that the
+        # cross-source near-duplicate filter does not collapse the demo feeds
+        stories = MOCK_STORIES.get(source) or [(f"{headline} - {source.upper()}", body) for headline, body in MOCK_STORIES["default"]]
+        mock_images = [
+            "https://images.unsplash.com/photo-1611974765270-ca1258634369?w=800&q=80",
+            "https://images.unsplash.com/photo-1590283603385-17ffb3a7f29f?w=800&q=80",
+            "https://images.unsplash.com/photo-1535320903710-d9cf11df87e2?w=800&q=80",
+            "https://images.unsplash.com/photo-1642543492481-44e81e3914a7?w=800&q=80",
+            "https://images.unsplash.com/photo-1614028674026-a65e31bfd27c?w=800&q=80"
+        ]
+        return [{
+            'text': f"{headline}. {body} (Simulated {source.upper()} article for offline demos.)",
+            'source': source.upper(),
+            'crawled_at': datetime.now().isoformat(),
+            'label': '',
+            'image_url': mock_images[i % len(mock_images)]
+        } for i, (headline, body) in enumerate(stories)]
+
+    def parse_listing(self, html: str, page_url: str) -> Tuple[List[str], Optional[str]]:
+        """解析列表页，返回 (同主机的文章链接（保持页面顺序、去重）, 下一页链接或 None)。"""
+        return self.extractor.extract_listing(html, page_url)
+
+    def parse_article(self, html: str) -> Optional[Dict[str, str]]:
+        """解析文章页，正文过短时返回 None。"""
+        extracted = self.extractor.extract_article(html)
+
+        # Combine title and content
+        full_text = f"{extracted['title'] or 'No Title'}. {extracted['content']}"
+
+        # Filter short or irrelevant content
+        if len(full_text) < 200:
+            return None
+
+        return {
+            'text': full_text[:5000], # Limit length
+            'source': 'Yahoo Finance',
+            'crawled_at': datetime.now().isoformat(),
+            'label': '',
+            'image_url': extracted['image_url']
+        }
+
+    def _plan_articles(self, links: List[str], index: Optional[CrawlIndex], revisit: bool,
+                       planned: set) -> Tuple[List[Tuple[str, Dict[str, str]]], int]:
+        """决定本次要抓取的文章及其请求头，返回 ([(url, headers)], 从未爬取过的链接数)。"""
+        links = [link for link in links if link not in planned]
+        seen = index.get_many(links) if index else {}
+        plan, unseen = [], 0
+        for link in links:
+            entry = seen.get(link)
+            headers = CrawlIndex.conditional_headers(entry)
+            if entry is None:
+                unseen += 1
+            elif not headers and not revisit:
+                continue
+            planned.add(link)
+            plan.append((link, headers))
+        return plan, unseen
 
-    def crawl(self, source: str = "yahoo") -> List[Dict[str, str]]:
+    def _process_article(self, result: Dict, index: Optional[CrawlIndex]) -> Tuple[Optional[Dict[str, str]], bool]:
+        """解析抓取结果并更新增量索引，返回 (文章或 None, 是否为新增/已变化)。"""
+        etag, last_modified = result["headers"].get("etag"), result["headers"].get("last-modified")
+        if result["status"] == 304:
+            if index:
+                index.record(result["url"], etag, last_modified)
+            return None, False
+        article = self.parse_article(result["text"])
+        if article is not None:
+            article['url'] = result["url"]
+        changed = True
+        if index:
+            # 正文哈希基于提取后的文本，页面上广告等动态部分的变化不算作文章变化
+            text_hash = content_hash(article['text'] if article else result["text"])
+            changed = index.record(result["url"], etag, last_modified, text_hash)
+        return article, changed
+
+    async def _fetch_async(self, source: str, max_articles: int, fetcher: Optional[AsyncFetcher] = None,
+                           incremental: bool = True, revisit: bool = False) -> List[Dict[str, str]]:
         target_url = self.sources.get(source, self.sources["yahoo"])
         print(f"Starting crawl of {target_url} ({source})...")
-        
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        
-        headlines = []
+
+        if source != "yahoo":
+            return self._mock_news(source)
+
+        index = self.crawl_index if incremental else None
+        owns_fetcher = fetcher is None
+        fetcher = fetcher or AsyncFetcher()
         try:
-            if source != "yahoo":
-                 # Mock data for other sources
-                 import random
-                 mock_news = [
-                     f"Market rally continues as {source.upper()} reports strong sector growth",
-                     f"{source.upper()} Exclusive: Central bank considers rate adjustments",
-                     f"Tech stocks surge in early trading according to {source.upper()} analysts",
-                     f"Global supply chain issues persist, reports {source.upper()}",
-                     f"Investors eye upcoming earnings reports - {source.upper()}"
-                 ]
-                 mock_images = [
-                     "https://images.unsplash.com/photo-1611974765270-ca1258634369?w=800&q=80",
-                     "https://images.unsplash.com/photo-1590283603385-17ffb3a7f29f?w=800&q=80",
-                     "https://images.unsplash.com/photo-1535320903710-d9cf11df87e2?w=800&q=80",
-                     "https://images.unsplash.com/photo-1642543492481-44e81e3914a7?w=800&q=80",
-                     "https://images.unsplash.com/photo-1614028674026-a65e31bfd27c?w=800&q=80"
-                 ]
-                 for i, text in enumerate(mock_news):
-                     headlines.append({
-                        'text': text + ". This is a simulated full article content to demonstrate the layout. " * 5,
-                        'source': source.upper(),
-                        'crawled_at': datetime.now().isoformat(),
-                        'label': '',
-                        'image_url': mock_images[i % len(mock_images)]
-                    })
-                 return headlines
-
-            # Yahoo Finance Real Crawling
-            response = requests.get(target_url, headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Find article links
-            article_links = set()
-            # Look for links in main news stream
-            for a_tag in soup.find_all('a', href=True):
-                href = a_tag['href']
-                # Filter for likely article links (exclude ads, navigation, etc.)
-                if '/news/' in href or '/m/' in href or (href.startswith('/') and len(href) > 30):
-                    full_url = "https://finance.yahoo.com" + href if href.startswith('/') else href
-                    if "finance.yahoo.com" in full_url:
-                        article_links.add(full_url)
-            
-            print(f"Found {len(article_links)} potential article links. Fetching top 5...")
-            
-            count = 0
-            for link in list(article_links):
-                if count >= 5: break
-                
-                try:
-                    print(f"Fetching article: {link}")
-                    art_response = requests.get(link, headers=headers, timeout=5)
-                    art_soup = BeautifulSoup(art_response.text, 'html.parser')
-                    
-                    # Extract Title
-                    title_tag = art_soup.find('h1')
-                    title = title_tag.get_text(strip=True) if title_tag else "No Title"
-                    
-                    # Extract Content (Yahoo uses caas-body usually)
-                    content_div = art_soup.find('div', class_='caas-body')
-                    if content_div:
-                        paragraphs = content_div.find_all('p')
-                        text_content = " ".join([p.get_text(strip=True) for p in paragraphs])
-                    else:
-                        # Fallback to all paragraphs
-                        paragraphs = art_soup.find_all('p')
-                        text_content = " ".join([p.get_text(strip=True) for p in paragraphs if len(p.get_text(strip=True)) > 50])
-                    
-                    # Combine title and content
-                    full_text = f"{title}. {text_content}"
-                    
-                    # Filter short or irrelevant content
-                    if len(full_text) < 200:
+            # 1. 列表页：条件请求 + 沿 rel="next" 翻页，直到某页没有从未爬取过的链接
+            plan: List[Tuple[str, Dict[str, str]]] = []
+            planned: set = set()
+            listing_pages = []
+            page_url = target_url
+            while page_url and len(listing_pages) < MAX_PAGES:
+                entry = index.get(page_url) if index else None
+                page = await fetcher.fetch(page_url, headers=CrawlIndex.conditional_headers(entry))
+                if page["error"] or page["status"] >= 400:
+                    message = f"{page_url}: {page['error'] or 'HTTP ' + str(page['status'])}"
+                    if not listing_pages:
+                        raise RuntimeError(f"Crawling failed: {message}")
+                    print(f"Error fetching listing page {message}")
+                    break
+                if page["status"] == 304:
+                    print(f"Listing page not modified since last crawl: {page_url}")
+                    break
+                listing_pages.append(page)
+                # HTML 解析是 CPU 密集操作，放到线程中执行，不阻塞事件循环
+                links, next_url = await asyncio.to_thread(self.parse_listing, page["text"], page_url)
+                page_plan, unseen = await asyncio.to_thread(self._plan_articles, links, index, revisit, planned)
+                plan.extend(page_plan)
+                if index and not unseen:
+                    break  # 已翻到上次爬取的位置
+                page_url = next_url if next_url not in {p['url'] for p in listing_pages} else None
+            print(f"Found {len(plan)} new or re-checkable article links on {len(listing_pages)} listing page(s)")
+
+            # 2. 并发抓取；被过滤或失败的文章由后续链接补足，直到凑满 max_articles 或链接用完
+            headlines = []
+            pos = failures = unchanged = 0
+            while pos < len(plan) and (not max_articles or len(headlines) < max_articles):
+                size = max_articles - len(headlines) if max_articles else len(plan)
+                batch = plan[pos:pos + size]
+                pos += len(batch)
+                results = await asyncio.gather(*(fetcher.fetch(url, headers=headers) for url, headers in batch))
+                for result in results:
+                    if result["error"] or result["status"] >= 400:
+                        failures += 1
+                        print(f"Error fetching article {result['url']}: {result['error'] or 'HTTP ' + str(result['status'])}")
                         continue
-                        
-                    # Extract Image
-                    image_url = ""
-                    meta_image = art_soup.find("meta", property="og:image")
-                    if meta_image:
-                        image_url = meta_image["content"]
-                    
-                    headlines.append({
-                        'text': full_text[:5000], # Limit length
-                        'source': 'Yahoo Finance',
-                        'crawled_at': datetime.now().isoformat(),
-                        'label': '',
-                        'image_url': image_url
-                    })
-                    count += 1
-                    
-                except Exception as e:
-                    print(f"Error fetching article {link}: {e}")
-                    continue
-            
-            return headlines
+                    try:
+                        article, changed = await asyncio.to_thread(self._process_article, result, index)
+                    except Exception as e:
+                        failures += 1
+                        print(f"Error parsing article {result['url']}: {e}")
+                        continue
+                    if not changed:
+                        unchanged += 1
+                    elif article is not None and (not max_articles or len(headlines) < max_articles):
+                        headlines.append(article)
 
-        except Exception as e:
-            print(f"Crawling failed: {e}")
-            raise e
+            # 3. 全部文章处理完成后才记录列表页的校验头，否则下次 304 会漏掉本次失败或未抓取的文章
+            if index and failures == 0 and pos >= len(plan):
+                for page in listing_pages:
+                    await asyncio.to_thread(index.record, page["url"], page["headers"].get("etag"),
+                                            page["headers"].get("last-modified"), content_hash(page["text"]))
+            print(f"Crawl finished: {len(headlines)} new articles, {unchanged} unchanged, {failures} failed, "
+                  f"fetcher stats {fetcher.stats()}")
+            return headlines
+        finally:
+            if owns_fetcher:
+                await fetcher.close()
 
     def save_to_dataset(self, headlines: List[Dict[str, str]], filename: str = None) -> str:
         if not filename:
@@ -144,8 +309,8 @@ class CrawlerService:
             headlines_to_save = []
             for h in headlines:
                 h_copy = h.copy()
-                if 'image_url' in h_copy:
-                    del h_copy['image_url']
+                h_copy.pop('image_url', None)
+                h_copy.pop('url', None)
                 headlines_to_save.append(h_copy)
 
             with open(file_path, 'w', newline='', encoding='utf-8') as f:
@@ -0,0 +1,342 @@
+"""数据集元数据目录
+
+以 SQLite 持久化数据集的元数据，列表接口直接查询目录，不再每次扫描目录并逐个 stat:
+1. 每个数据集记录大小、修改时间、行数、列名、内容哈希 (sha256) 与标签分布
+2. 上传、保存、删除时同步更新；行数 / 哈希 / 标签分布由后台线程流式计算（单次读取）
+3. 与文件系统的对账是惰性的：距上次对账超过 reconcile_interval 秒时才扫描一次目录，
+   发现新增、变化或已删除的文件后更新目录（进程内首次对账同步执行，之后在后台执行）
+4. 支持按修改时间 / 大小 / 文件名 / 行数排序与分页
+5. 首次访问时才打开数据库，导入模块不会创建文件
+"""
+import csv
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+BASE_DIR = Path(__file__).resolve().parent.parent  # app/
+DEFAULT_DB_PATH = BASE_DIR / "data" / "catalog.db"
+DATASET_DIR = BASE_DIR / "data" / "datasets"
+
+RECONCILE_INTERVAL = float(os.getenv("DATASET_CATALOG_RECONCILE_SECONDS", "30"))
+# 标签分布最多记录的不同标签数，其余归入 "__other__"
+MAX_LABELS = 100
+
+SORT_FIELDS = ("mtime", "size", "filename", "row_count")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS datasets (
+    filename TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    row_count INTEGER,
+    columns TEXT,
+    content_hash TEXT,
+    label_distribution TEXT,
+    profiled_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_datasets_mtime ON datasets (mtime_ns);
+CREATE INDEX IF NOT EXISTS idx_datasets_size ON datasets (size);
+CREATE INDEX IF NOT EXISTS idx_datasets_row_count ON datasets (row_count);
+CREATE INDEX IF NOT EXISTS idx_datasets_content_hash ON datasets (content_hash);
+"""
+
+_SORT_COLUMNS = {"mtime": "mtime_ns", "size": "size", "filename": "filename", "row_count": "row_count"}
+
+
+class _HashingReader(io.RawIOBase):
+    """读取时顺带计算 sha256，使哈希与 CSV 解析共用一次 I/O。"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.sha256 = hashlib.sha256()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        n = self.raw.readinto(buffer)
+        if n:
+            self.sha256.update(memoryview(buffer)[:n])
+        return n
+
+
+def profile_csv(path: Path, label_column: str = "label") -> Dict:
+    """单次流式读取 CSV，返回行数、列名、内容哈希与标签分布。"""
+    with open(path, "rb", buffering=0) as raw:
+        hashing = _HashingReader(raw)
+        text = io.TextIOWrapper(io.BufferedReader(hashing, 1 << 20), encoding="utf-8-sig", newline="")
+        reader = csv.reader(text)
+        columns = next(reader, [])
+        label_idx = columns.index(label_column) if label_column in columns else None
+        labels: Counter = Counter()
+        rows = 0
+        for row in reader:
+            if not row:
+                continue  # 空行，与 csv.DictReader 一致不计入行数
+            rows += 1
+            if label_idx is not None and label_idx < len(row):
+                labels[row[label_idx]] += 1
+        # 读完剩余字节（例如末尾空行），保证哈希覆盖整个文件
+        text.read()
+    return build_profile(columns, rows, hashing.sha256.hexdigest(), labels)
+
+
+def build_profile(columns: List[str], row_count: int, content_hash: str, labels: Counter) -> Dict:
+    """组装目录所需的数据集元数据；标签超过 MAX_LABELS 个时其余归入 "__other__"。"""
+    if len(labels) <= MAX_LABELS:
+        distribution = dict(labels.most_common())
+    else:
+        distribution = dict(labels.most_common(MAX_LABELS))
+        distribution["__other__"] = sum(labels.values()) - sum(distribution.values())
+    return {
+        "row_count": row_count,
+        "columns": columns,
+        "content_hash": content_hash,
+        "label_distribution": distribution,
+    }
+
+
+def _row_to_dict(row: sqlite3.Row) -> Dict:
+    item = dict(row)
+    item["mtime"] = item.pop("mtime_ns") / 1e9
+    item["columns"] = json.loads(item["columns"]) if item["columns"] else None
+    item["label_distribution"] = json.loads(item["label_distribution"]) if item["label_distribution"] else None
+    return item
+
+
+class DatasetCatalog:
+    """数据集元数据目录。"""
+
+    def __init__(self, db_path: Optional[Path] = None, dataset_dir: Path = DATASET_DIR,
+                 reconcile_interval: float = RECONCILE_INTERVAL):
+        self.db_path = Path(db_path or DEFAULT_DB_PATH)
+        self.dataset_dir = Path(dataset_dir)
+        self.reconcile_interval = reconcile_interval
+        self._lock = threading.Lock()
+        self._open_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._last_reconcile: Optional[float] = None
+        self._reconciling = threading.Lock()
+        # 待计算行数 / 哈希 / 标签分布的数据集，由后台线程依次处理
+        self._pending: List[str] = []
+        self._cond = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        # 已出队、正在计算中的数据集数
+        self._in_flight = 0
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """首次访问时打开数据库。"""
+        if self._db is None:
+            with self._open_lock:
+                if self._db is None:
+                    self._db = self._open()
+        return self._db
+
+    def _open(self) -> sqlite3.Connection:
+        os.makedirs(self.db_path.parent, exist_ok=True)
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        conn.commit()
+        return conn
+
+    def refresh(self, filename: str, profile: Optional[Dict] = None) -> Optional[Dict]:
+        """按文件当前状态更新目录；文件不存在时删除条目。
+
+        调用方已算好 profile 时直接写入，否则大小或修改时间变化后交给后台线程重新计算。
+        """
+        try:
+            st = os.stat(self.dataset_dir / filename)
+        except FileNotFoundError:
+            self.remove(filename)
+            return None
+        return self._apply_stat(filename, st.st_size, st.st_mtime_ns, profile)
+
+    def _apply_stat(self, filename: str, size: int, mtime_ns: int, profile: Optional[Dict] = None) -> Dict:
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, profiled_at FROM datasets WHERE filename = ?", (filename,)
+            ).fetchone()
+            unchanged = row is not None and row["size"] == size and row["mtime_ns"] == mtime_ns
+            if profile is not None:
+                self._write_profile(filename, size, mtime_ns, profile)
+            elif not unchanged:
+                self._conn.execute(
+                    "INSERT INTO datasets (filename, size, mtime_ns) VALUES (?, ?, ?) "
+                    "ON CONFLICT(filename) DO UPDATE SET size = excluded.size, mtime_ns = excluded.mtime_ns, "
+                    "row_count = NULL, columns = NULL, content_hash = NULL, label_distribution = NULL, "
+                    "profiled_at = NULL",
+                    (filename, size, mtime_ns),
+                )
+            needs_profile = profile is None and not (unchanged and row["profiled_at"])
+        if needs_profile:
+            self._enqueue(filename)
+        return self.get(filename)
+
+    def _write_profile(self, filename: str, size: int, mtime_ns: int, profile: Dict):
+        # 调用方持有 self._lock 与事务
+        self._conn.execute(
+            "INSERT OR REPLACE INTO datasets "
+            "(filename, size, mtime_ns, row_count, columns, content_hash, label_distribution, profiled_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                filename, size, mtime_ns,
+                profile["row_count"],
+                json.dumps(profile["columns"], ensure_ascii=False),
+                profile["content_hash"],
+                json.dumps(profile["label_distribution"], ensure_ascii=False),
+                datetime.now().isoformat(),
+            ),
+        )
+
+    def remove(self, filename: str) -> bool:
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM datasets WHERE filename = ?", (filename,)).rowcount > 0
+
+    def get(self, filename: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM datasets WHERE filename = ?", (filename,)).fetchone()
+        return _row_to_dict(row) if row else None
+
+    def find_by_hash(self, content_hash: str) -> Optional[Dict]:
+        """按内容哈希查找仍存在且未被修改的数据集。"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM datasets WHERE content_hash = ? ORDER BY filename", (content_hash,)
+            ).fetchall()
+        for row in rows:
+            try:
+                st = os.stat(self.dataset_dir / row["filename"])
+            except FileNotFoundError:
+                continue
+            if (st.st_size, st.st_mtime_ns) == (row["size"], row["mtime_ns"]):
+                return _row_to_dict(row)
+        return None
+
+    def list(self, limit: int = 100, offset: int = 0, sort: str = "mtime",
+             descending: bool = True) -> Tuple[List[Dict], int]:
+        """分页列出数据集，返回 (当前页, 总数)。"""
+        if sort not in _SORT_COLUMNS:
+            raise ValueError(f"sort must be one of {SORT_FIELDS}")
+        self.maybe_reconcile()
+        order = "DESC" if descending else "ASC"
+        column = _SORT_COLUMNS[sort]
+        with self._lock:
+            total = self._conn.execute("SELECT COUNT(*) FROM datasets").fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT * FROM datasets ORDER BY {column} {order}, filename {order} LIMIT ? OFFSET ?",
+                (limit, offset),
+            ).fetchall()
+        return [_row_to_dict(r) for r in rows], total
+
+    def maybe_reconcile(self):
+        """距上次对账超过间隔时扫描目录；首次同步执行，之后在后台执行不阻塞查询。"""
+        if self._last_reconcile is None:
+            self.reconcile()
+        elif time.monotonic() - self._last_reconcile >= self.reconcile_interval:
+            threading.Thread(target=self.reconcile, name="dataset-catalog-reconcile", daemon=True).start()
+
+    def reconcile(self):
+        """扫描一次数据集目录，与目录中的条目对账。"""
+        if not self._reconciling.acquire(blocking=False):
+            return
+        try:
+            self._last_reconcile = time.monotonic()
+            seen = {}
+            if self.dataset_dir.exists():
+                with os.scandir(self.dataset_dir) as entries:
+                    for entry in entries:
+                        if entry.is_file() and entry.name.endswith(".csv"):
+                            st = entry.stat()
+                            seen[entry.name] = (st.st_size, st.st_mtime_ns)
+            with self._lock:
+                known = {r["filename"]: (r["size"], r["mtime_ns"])
+                         for r in self._conn.execute("SELECT filename, size, mtime_ns FROM datasets")}
+            for filename in known.keys() - seen.keys():
+                self.remove(filename)
+            for filename, (size, mtime_ns) in seen.items():
+                if known.get(filename) != (size, mtime_ns):
+                    self._apply_stat(filename, size, mtime_ns)
+        finally:
+            self._reconciling.release()
+
+    def _enqueue(self, filename: str):
+        with self._cond:
+            if filename not in self._pending:
+                self._pending.append(filename)
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="dataset-catalog", daemon=True)
+                self._worker.start()
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._pending:
+                    self._cond.wait(5.0)
+                    if not self._pending:
+                        # 在锁内退出，之后的 _enqueue 会重新启动线程
+                        self._worker = None
+                        return
+            self.profile_pending()
+
+    def profile_pending(self) -> int:
+        """计算所有待处理数据集的行数 / 哈希 / 标签分布，返回处理个数。
+
+        返回前会等待其他线程（例如后台线程）正在计算的数据集完成。
+        """
+        done = 0
+        while True:
+            with self._cond:
+                while not self._pending:
+                    if not self._in_flight:
+                        return done
+                    self._cond.wait()
+                filename = self._pending.pop(0)
+                self._in_flight += 1
+            try:
+                done += self._profile_one(filename)
+            finally:
+                with self._cond:
+                    self._in_flight -= 1
+                    self._cond.notify_all()
+
+    def _profile_one(self, filename: str) -> int:
+        path = self.dataset_dir / filename
+        try:
+            before = os.stat(path)
+            profile = profile_csv(path)
+            after = os.stat(path)
+        except FileNotFoundError:
+            self.remove(filename)
+            return 0
+        except Exception as e:
+            print(f"⚠️  数据集元数据计算失败 ({filename}): {e}")
+            return 0
+        if (before.st_size, before.st_mtime_ns) != (after.st_size, after.st_mtime_ns):
+            # 计算期间文件被修改，稍后重算
+            self._enqueue(filename)
+            return 0
+        with self._lock, self._conn:
+            self._write_profile(filename, after.st_size, after.st_mtime_ns, profile)
+        return 1
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+dataset_catalog = DatasetCatalog()
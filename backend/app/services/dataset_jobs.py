@@ -0,0 +1,272 @@
+"""数据集离线批量分类任务
+
+对 app/data/datasets 下的 CSV 在后台流式分类:
+1. 按 chunk_rows 行分块读取，内存占用与文件大小无关；已转换为 Parquet 的数据集直接读取列式副本
+2. 每块一次批量推理（经推理线程池，饱和时按 Retry-After 退避重试），映射后追加写入输出 CSV
+3. 每块写完后记录检查点（已处理行数 + 输出文件字节数），任务中断后再次启动会从检查点续跑；
+   检查点同时记录源文件的大小与修改时间以及 temperature，两者任一变化时丢弃检查点从头分类
+4. 提供进度、行/秒等状态查询
+
+输出文件位于 app/data/classified/<数据集名>.classified.csv，包含原始列、3 个 logits 列与四大分类列。
+"""
+import csv
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+from .columnar_store import ColumnarStore, columnar_store
+from .inference_executor import ServerBusyError
+from .label_mapper import map_finbert_logits_batch
+
+BASE_DIR = Path(__file__).resolve().parent.parent  # app/
+DATASET_DIR = BASE_DIR / "data" / "datasets"
+OUTPUT_DIR = BASE_DIR / "data" / "classified"
+
+LOGIT_COLUMNS = ["logit_positive", "logit_negative", "logit_neutral"]
+RESULT_COLUMNS = LOGIT_COLUMNS + ["market_direction", "event_type", "impact_strength", "risk_signal", "event_score"]
+CHUNK_ROWS = int(os.getenv("DATASET_JOB_CHUNK_ROWS", "256"))
+
+
+def _read_chunks(path: Path, skip_rows: int, chunk_rows: int) -> Iterator[List[Dict[str, str]]]:
+    with open(path, "r", newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        for _ in range(skip_rows):
+            if next(reader, None) is None:
+                return
+        chunk = []
+        for row in reader:
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def _count_rows(path: Path) -> int:
+    with open(path, "r", newline="", encoding="utf-8-sig") as f:
+        return max(0, sum(1 for _ in csv.reader(f)) - 1)
+
+
+def _as_text(value) -> str:
+    if value is None:
+        return ""
+    return value if isinstance(value, str) else str(value)
+
+
+def annotate_rows(rows: List[Dict], infer: Callable[[List[str]], List[List[float]]],
+                  temperature: float = 1.2, text_field: str = "text") -> List[Dict]:
+    """对含 text_field 字段的行批量推理，原地补充 logits 与分类列；空文本行原样保留。
+
+    JSONL / Parquet 中的非字符串文本（数字等）按 str() 转换后推理，None 视为空文本。
+    """
+    texts = [_as_text(row.get(text_field)) for row in rows]
+    positions = [i for i, text in enumerate(texts) if text.strip()]
+    if positions:
+        logits = infer([texts[i] for i in positions])
+        mapped = map_finbert_logits_batch(logits, top_k=1, temperature=temperature)
+        for i, row_logits, result in zip(positions, logits, mapped):
+            row = rows[i]
+            row.update(zip(LOGIT_COLUMNS, row_logits))
+            row.update(result["classification"])
+            row["event_score"] = result["top_k"][0]["score"]
+    return rows
+
+
+class DatasetClassifyJob:
+    """单个数据集的分类任务（以数据集文件名为任务 id）。"""
+
+    def __init__(self, filename: str, service, temperature: float = 1.2, chunk_rows: int = CHUNK_ROWS,
+                 dataset_dir: Path = DATASET_DIR, output_dir: Path = OUTPUT_DIR,
+                 columnar: Optional[ColumnarStore] = None):
+        self.filename = filename
+        self.columnar = columnar
+        self.service = service
+        self.temperature = temperature
+        self.chunk_rows = chunk_rows
+        self.input_path = Path(dataset_dir) / filename
+        self.output_path = Path(output_dir) / f"{Path(filename).stem}.classified.csv"
+        self.checkpoint_path = self.output_path.with_name(self.output_path.name + ".checkpoint.json")
+        self.status = "pending"
+        self.message = ""
+        self.total_rows = 0
+        self.rows_done = 0
+        self.rows_this_run = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._cancel = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self.is_running():
+            raise RuntimeError("任务已在运行")
+        self._cancel.clear()
+        self.status = "running"
+        self.message = ""
+        self._thread = threading.Thread(target=self._run, name=f"classify-{self.filename}", daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def join(self, timeout: Optional[float] = None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def to_dict(self) -> dict:
+        end = self.finished_at or time.time()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        return {
+            "job_id": self.filename,
+            "status": self.status,
+            "message": self.message,
+            "total_rows": self.total_rows,
+            "rows_done": self.rows_done,
+            "progress": round(self.rows_done / self.total_rows * 100, 2) if self.total_rows else 0.0,
+            "rows_per_sec": round(self.rows_this_run / elapsed, 2) if elapsed > 0 else 0.0,
+            "output_file": self.output_path.name,
+        }
+
+    def _source_signature(self) -> Dict:
+        stat = self.input_path.stat()
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def _load_checkpoint(self) -> Dict:
+        if self.checkpoint_path.exists() and self.output_path.exists():
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                checkpoint = json.load(f)
+            # 数据集被替换或 temperature 不同时，旧输出与本次结果不可拼接，从头开始
+            if (checkpoint.get("source") == self._source_signature()
+                    and checkpoint.get("temperature") == self.temperature):
+                return checkpoint
+            print(f"⚠️  {self.filename} 的源文件或 temperature 已变化，丢弃检查点重新分类")
+            self.checkpoint_path.unlink(missing_ok=True)
+        return {"rows_done": 0, "output_bytes": 0}
+
+    def _save_checkpoint(self, output_bytes: int):
+        tmp = self.checkpoint_path.with_name(self.checkpoint_path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "rows_done": self.rows_done,
+                "output_bytes": output_bytes,
+                "temperature": self.temperature,
+                "source": self._source_signature(),
+                "updated_at": datetime.now().isoformat(),
+            }, f)
+        os.replace(tmp, self.checkpoint_path)
+
+    def _infer(self, texts: List[str]) -> List[List[float]]:
+        # 经推理线程池执行，与在线请求共享背压；队列已满时按建议时间退避
+        while True:
+            try:
+                return self.service.executor.submit(self.service.compute_logits, texts, use_cache=False).result()
+            except ServerBusyError as e:
+                if self._cancel.wait(e.retry_after):
+                    raise InterruptedError("任务已取消")
+
+    def _run(self):
+        self.started_at = time.time()
+        self.finished_at = None
+        self.rows_this_run = 0
+        try:
+            os.makedirs(self.output_path.parent, exist_ok=True)
+            checkpoint = self._load_checkpoint()
+            self.rows_done = checkpoint["rows_done"]
+
+            # 已有最新的 Parquet 副本时直接读取，行数与列名来自转换元数据，无需重新解析 CSV
+            meta = self.columnar.meta(self.filename) if self.columnar else None
+            if meta is not None:
+                self.total_rows = meta["num_rows"]
+                fieldnames = [c["name"] for c in meta["columns"]]
+                chunks = self.columnar.iter_rows(self.filename, self.rows_done, self.chunk_rows)
+            else:
+                self.total_rows = _count_rows(self.input_path)
+                with open(self.input_path, "r", newline="", encoding="utf-8-sig") as f:
+                    fieldnames = csv.DictReader(f).fieldnames or []
+                chunks = _read_chunks(self.input_path, self.rows_done, self.chunk_rows)
+            if "text" not in fieldnames:
+                raise ValueError("数据集缺少 text 列")
+            out_fields = fieldnames + [c for c in RESULT_COLUMNS if c not in fieldnames]
+
+            # 截掉检查点之后可能写了一半的内容，再以追加方式续写
+            mode = "r+" if self.rows_done and self.output_path.exists() else "w"
+            with open(self.output_path, mode, newline="", encoding="utf-8") as out:
+                if mode == "r+":
+                    out.truncate(checkpoint["output_bytes"])
+                    out.seek(checkpoint["output_bytes"])
+                writer = csv.DictWriter(out, fieldnames=out_fields, extrasaction="ignore")
+                if mode == "w":
+                    writer.writeheader()
+
+                for chunk in chunks:
+                    if self._cancel.is_set():
+                        raise InterruptedError("任务已取消")
+                    self._process_chunk(chunk, writer)
+                    out.flush()
+                    os.fsync(out.fileno())
+                    self.rows_done += len(chunk)
+                    self.rows_this_run += len(chunk)
+                    self._save_checkpoint(out.tell())
+
+            self.status = "completed"
+            self.message = f"已完成 {self.rows_done} 行"
+            self.checkpoint_path.unlink(missing_ok=True)
+        except InterruptedError as e:
+            self.status = "cancelled"
+            self.message = f"{e}，已处理 {self.rows_done} 行，可重新启动续跑"
+        except Exception as e:
+            print(f"❌ 数据集分类任务失败 ({self.filename}): {e}")
+            self.status = "failed"
+            self.message = str(e)
+        finally:
+            self.finished_at = time.time()
+
+    def _process_chunk(self, chunk: List[Dict[str, str]], writer: csv.DictWriter):
+        writer.writerows(annotate_rows(chunk, self._infer, self.temperature))
+
+
+class DatasetJobManager:
+    """管理各数据集的分类任务。"""
+
+    def __init__(self, dataset_dir: Path = DATASET_DIR, output_dir: Path = OUTPUT_DIR,
+                 columnar: Optional[ColumnarStore] = None):
+        self.dataset_dir = Path(dataset_dir)
+        self.output_dir = Path(output_dir)
+        self.columnar = columnar
+        self._jobs: Dict[str, DatasetClassifyJob] = {}
+        self._lock = threading.Lock()
+
+    def start(self, filename: str, service, temperature: float = 1.2) -> DatasetClassifyJob:
+        """启动（或从检查点续跑）指定数据集的分类任务。"""
+        if not (self.dataset_dir / filename).exists():
+            raise FileNotFoundError(filename)
+        with self._lock:
+            job = self._jobs.get(filename)
+            if job is not None and job.is_running():
+                return job
+            job = DatasetClassifyJob(filename, service, temperature=temperature,
+                                     dataset_dir=self.dataset_dir, output_dir=self.output_dir,
+                                     columnar=self.columnar)
+            self._jobs[filename] = job
+            job.start()
+            return job
+
+    def get(self, job_id: str) -> Optional[DatasetClassifyJob]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[dict]:
+        return [job.to_dict() for job in self._jobs.values()]
+
+    def cancel_all(self):
+        for job in self._jobs.values():
+            job.cancel()
+
+
+dataset_job_manager = DatasetJobManager(columnar=columnar_store)
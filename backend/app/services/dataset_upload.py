@@ -0,0 +1,170 @@
+"""数据集流式上传
+
+上传内容按块流入，单次遍历内完成全部处理:
+1. 增量计算 sha256，内容与已有数据集相同时不再保存副本，直接返回已有文件名
+2. 增量 UTF-8 解码与 CSV 解析：校验表头（非空、无重复列、包含 text 列）与每行列数，
+   发现错误立即拒绝，不必等整个文件写完
+3. 同一遍中统计行数与标签分布，完成后直接写入数据集目录（无需后台再读一遍）
+4. 先写入同目录下的临时文件，校验通过后原子重命名为目标文件，失败时删除临时文件
+"""
+import codecs
+import csv
+import hashlib
+import os
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .dataset_catalog import DatasetCatalog, build_profile
+
+# 单个上传文件的字节数上限（0 表示不限制）
+UPLOAD_MAX_BYTES = int(os.getenv("DATASET_UPLOAD_MAX_BYTES", "0"))
+UPLOAD_CHUNK_BYTES = 1 << 20
+REQUIRED_COLUMNS = ("text",)
+
+
+class InvalidDatasetError(ValueError):
+    """上传内容不是合法的数据集 CSV。"""
+
+
+def validate_filename(filename: Optional[str]) -> str:
+    name = (filename or "").strip()
+    if not name.endswith(".csv"):
+        raise InvalidDatasetError("Only CSV files are allowed")
+    if name != os.path.basename(name) or name.startswith("."):
+        raise InvalidDatasetError("Invalid filename")
+    return name
+
+
+class DatasetUpload:
+    """单次上传的流式处理状态：依次调用 feed(chunk)，最后调用 finish() 或 abort()。"""
+
+    def __init__(self, filename: str, dataset_dir: Path, catalog: Optional[DatasetCatalog] = None,
+                 max_bytes: int = UPLOAD_MAX_BYTES, label_column: str = "label"):
+        self.filename = validate_filename(filename)
+        self.dataset_dir = Path(dataset_dir)
+        self.catalog = catalog
+        self.max_bytes = max_bytes
+        self.label_column = label_column
+        os.makedirs(self.dataset_dir, exist_ok=True)
+        self.tmp_path = self.dataset_dir / f".upload-{uuid.uuid4().hex}.tmp"
+        self._file = open(self.tmp_path, "wb")
+        self._sha256 = hashlib.sha256()
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._partial = ""           # 尚未遇到换行的半行
+        self._record: List[str] = []  # 引号未闭合、跨多行的当前记录
+        self._quotes = 0
+        self.bytes_received = 0
+        self.columns: Optional[List[str]] = None
+        self.row_count = 0
+        self.labels: Counter = Counter()
+        self._label_idx: Optional[int] = None
+
+    def feed(self, chunk: bytes):
+        """处理一块数据；内容不合法时抛出 InvalidDatasetError（临时文件已清理）。"""
+        try:
+            self.bytes_received += len(chunk)
+            if self.max_bytes and self.bytes_received > self.max_bytes:
+                raise InvalidDatasetError(f"文件超过上限 {self.max_bytes} 字节")
+            self._sha256.update(chunk)
+            self._file.write(chunk)
+            try:
+                text = self._decoder.decode(chunk)
+            except UnicodeDecodeError as e:
+                raise InvalidDatasetError(f"文件不是 UTF-8 编码: {e}") from e
+            self._parse(text, final=False)
+        except Exception:
+            self.abort()
+            raise
+
+    def finish(self) -> Dict:
+        """校验收尾、原子重命名并更新数据集目录；内容与已有数据集相同时不保存副本。"""
+        try:
+            try:
+                tail = self._decoder.decode(b"", final=True)
+            except UnicodeDecodeError as e:
+                raise InvalidDatasetError(f"文件不是 UTF-8 编码: {e}") from e
+            self._parse(tail, final=True)
+            if self.columns is None:
+                raise InvalidDatasetError("文件为空")
+            self._file.close()
+        except Exception:
+            self.abort()
+            raise
+
+        profile = build_profile(self.columns, self.row_count, self._sha256.hexdigest(), self.labels)
+        result = {
+            "filename": self.filename,
+            "rows": self.row_count,
+            "content_hash": profile["content_hash"],
+            "duplicate_of": None,
+        }
+        existing = self.catalog.find_by_hash(profile["content_hash"]) if self.catalog else None
+        if existing is not None:
+            os.remove(self.tmp_path)
+            result.update(filename=existing["filename"], duplicate_of=existing["filename"])
+            return result
+
+        os.replace(self.tmp_path, self.dataset_dir / self.filename)
+        if self.catalog is not None:
+            self.catalog.refresh(self.filename, profile=profile)
+        return result
+
+    def abort(self):
+        if not self._file.closed:
+            self._file.close()
+        try:
+            os.remove(self.tmp_path)
+        except FileNotFoundError:
+            pass
+
+    def _parse(self, text: str, final: bool):
+        # 以引号奇偶判断记录边界：换行前引号数为偶数时记录结束（"" 转义不改变奇偶）
+        parts = (self._partial + text).split("\n")
+        self._partial = "" if final else parts.pop()
+        lines = [p + "\n" for p in parts]
+        if final and lines and lines[-1] == "\n":
+            lines.pop()
+        complete: List[str] = []
+        for line in lines:
+            self._record.append(line)
+            self._quotes += line.count('"')
+            if self._quotes % 2 == 0:
+                complete.extend(self._record)
+                self._record, self._quotes = [], 0
+        if final and self._record:
+            raise InvalidDatasetError(f"第 {self.row_count + 2} 行引号未闭合")
+        if complete:
+            self._validate_rows(complete)
+
+    def _validate_rows(self, lines: List[str]):
+        try:
+            rows = list(csv.reader(lines))
+        except csv.Error as e:
+            raise InvalidDatasetError(f"CSV 格式错误（约第 {self.row_count + 2} 行）: {e}") from e
+        for row in rows:
+            if self.columns is None:
+                self._set_header(row)
+                continue
+            if not row:
+                continue  # 空行
+            if len(row) != len(self.columns):
+                raise InvalidDatasetError(
+                    f"第 {self.row_count + 2} 行有 {len(row)} 列，表头为 {len(self.columns)} 列"
+                )
+            self.row_count += 1
+            if self._label_idx is not None:
+                self.labels[row[self._label_idx]] += 1
+
+    def _set_header(self, header: List[str]):
+        if not header or any(not h.strip() for h in header):
+            raise InvalidDatasetError("表头为空或包含空列名")
+        duplicates = sorted({h for h in header if header.count(h) > 1})
+        if duplicates:
+            raise InvalidDatasetError(f"表头包含重复列: {duplicates}")
+        missing = [c for c in REQUIRED_COLUMNS if c not in header]
+        if missing:
+            raise InvalidDatasetError(f"缺少必需列: {missing}")
+        self.columns = header
+        self._label_idx = header.index(self.label_column) if self.label_column in header else None
@@ -0,0 +1,139 @@
+"""HTML 提取层
+
+爬虫只需要页面中的少量内容，提取实现可插拔，由 CRAWLER_HTML_PARSER 选择:
+1. lxml: C 实现的解析器 + XPath 直接定位 h1、caas-body 段落与 og:image，不构建 BeautifulSoup 对象树
+2. bs4: BeautifulSoup(html.parser)，列表页用 SoupStrainer 只保留 <a>/<link> 标签；无需额外依赖
+3. auto（默认）: 已安装 lxml 时使用 lxml，否则回退到 bs4
+
+两种实现的提取结果一致（文本按 get_text(strip=True) 的规则拼接，script / style / noscript / template
+内的文本不计入正文），可用
+python -m benchmarks.bench_extraction 对比吞吐。
+"""
+import os
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+HTML_PARSER = os.getenv("CRAWLER_HTML_PARSER", "auto")
+
+# 没有 caas-body 时，正文回退为全部长度超过该值的段落
+MIN_FALLBACK_PARAGRAPH = 50
+# 提取正文前整体移除的标签（其中的脚本、样式与占位文本不属于正文）
+SKIP_TAGS = ("script", "style", "noscript", "template")
+
+
+def is_article_link(href: str) -> bool:
+    # Filter for likely article links (exclude ads, navigation, etc.)
+    return '/news/' in href or '/m/' in href or (href.startswith('/') and len(href) > 30)
+
+
+def _same_host_links(hrefs, page_url: str) -> List[str]:
+    host = urlparse(page_url).netloc
+    links = {}
+    for href in hrefs:
+        if is_article_link(href):
+            full_url = urljoin(page_url, href)
+            if urlparse(full_url).netloc == host:
+                links[full_url] = None
+    return list(links)
+
+
+class SoupExtractor:
+    """BeautifulSoup 实现（html.parser，无额外依赖）。"""
+
+    name = "bs4"
+
+    def extract_article(self, html: str) -> Dict[str, str]:
+        soup = BeautifulSoup(html, 'html.parser')
+        for tag in soup.find_all(SKIP_TAGS):
+            tag.decompose()
+        title_tag = soup.find('h1')
+        title = title_tag.get_text(strip=True) if title_tag else ""
+
+        # Yahoo uses caas-body usually
+        content_div = soup.find('div', class_='caas-body')
+        if content_div:
+            paragraphs = [p.get_text(strip=True) for p in content_div.find_all('p')]
+        else:
+            paragraphs = [t for t in (p.get_text(strip=True) for p in soup.find_all('p'))
+                          if len(t) > MIN_FALLBACK_PARAGRAPH]
+
+        meta_image = soup.find("meta", property="og:image")
+        return {
+            'title': title,
+            'content': " ".join(paragraphs),
+            'image_url': meta_image.get("content", "") if meta_image else "",
+        }
+
+    def extract_listing(self, html: str, page_url: str) -> Tuple[List[str], Optional[str]]:
+        soup = BeautifulSoup(html, 'html.parser', parse_only=SoupStrainer(['a', 'link']))
+        links = _same_host_links((a['href'] for a in soup.find_all('a', href=True)), page_url)
+        next_tag = soup.find(['link', 'a'], rel='next', href=True)
+        return links, urljoin(page_url, next_tag['href']) if next_tag else None
+
+
+_CAAS_BODY = "//div[contains(concat(' ', normalize-space(@class), ' '), ' caas-body ')]"
+_REL_NEXT = "contains(concat(' ', normalize-space(@rel), ' '), ' next ')"
+
+
+class LxmlExtractor:
+    """lxml 实现：XPath 直接定位所需节点。"""
+
+    name = "lxml"
+
+    def __init__(self):
+        try:
+            import lxml.html
+        except ImportError as e:
+            raise RuntimeError("lxml 解析器需要安装 lxml: pip install lxml") from e
+        self._html = lxml.html
+
+    def _parse(self, html: str):
+        try:
+            return self._html.document_fromstring(html)
+        except (ValueError, self._html.etree.ParserError):
+            # 空文档或带编码声明的 str
+            return self._html.document_fromstring(html.encode("utf-8") or b"<html></html>")
+
+    @staticmethod
+    def _text(element) -> str:
+        # 与 BeautifulSoup get_text(strip=True) 相同：各文本片段去空白后直接拼接
+        return "".join(s.strip() for s in element.itertext())
+
+    def extract_article(self, html: str) -> Dict[str, str]:
+        doc = self._parse(html)
+        # 保留被移除元素之后的尾随文本，与 BeautifulSoup decompose() 一致
+        self._html.etree.strip_elements(doc, *SKIP_TAGS, with_tail=False)
+        h1 = doc.xpath("(//h1)[1]")
+        title = self._text(h1[0]) if h1 else ""
+
+        content_div = doc.xpath(f"({_CAAS_BODY})[1]")
+        if content_div:
+            paragraphs = [self._text(p) for p in content_div[0].iter("p")]
+        else:
+            paragraphs = [t for t in (self._text(p) for p in doc.iter("p")) if len(t) > MIN_FALLBACK_PARAGRAPH]
+
+        image = doc.xpath("(//meta[@property='og:image'])[1]/@content")
+        return {'title': title, 'content': " ".join(paragraphs), 'image_url': image[0] if image else ""}
+
+    def extract_listing(self, html: str, page_url: str) -> Tuple[List[str], Optional[str]]:
+        doc = self._parse(html)
+        links = _same_host_links(doc.xpath("//a/@href"), page_url)
+        next_href = doc.xpath(f"(//*[self::link or self::a][@href][{_REL_NEXT}])[1]/@href")
+        return links, urljoin(page_url, next_href[0]) if next_href else None
+
+
+def get_extractor(name: Optional[str] = None):
+    """按名称创建提取器（lxml / bs4 / auto）。"""
+    name = (name or HTML_PARSER).lower()
+    if name == "bs4":
+        return SoupExtractor()
+    if name == "lxml":
+        return LxmlExtractor()
+    if name == "auto":
+        try:
+            return LxmlExtractor()
+        except RuntimeError:
+            return SoupExtractor()
+    raise ValueError(f"未知的 HTML 解析器: {name}（可选 auto / lxml / bs4）")
@@ -0,0 +1,169 @@
+"""可插拔推理后端
+
+FinBERTService 的前向推理委托给以下后端之一（通过 FINBERT_BACKEND 选择）:
+- eager: 原始 FP32 PyTorch 模型
+- int8:  torch 动态量化，所有 nn.Linear 权重量化为 int8
+- onnx:  导出为 ONNX 后由 onnxruntime 执行（需安装 onnx / onnxruntime）
+
+所有后端输入均为补齐后的 input_ids / attention_mask 张量，输出 [N, 3] logits。
+启用非 eager 后端前应调用 check_parity 与 eager 结果比对，超出容差则不应启用。
+"""
+import os
+import uuid
+from pathlib import Path
+from typing import Dict, Optional
+
+import torch
+import torch.nn.functional as F
+
+# 各后端相对 eager 的默认容差：softmax 概率的最大绝对误差
+DEFAULT_PARITY_TOLERANCE = {
+    "eager": 0.0,
+    "int8": 0.05,
+    "onnx": 1e-4,
+}
+
+
+class InferenceBackend:
+    """推理后端基类。"""
+
+    name = "base"
+
+    def __init__(self, model):
+        self.model = model
+
+    def forward(self, inputs: Dict[str, torch.Tensor]) -> torch.Tensor:
+        raise NotImplementedError
+
+
+class EagerBackend(InferenceBackend):
+    """原始 PyTorch eager 推理。"""
+
+    name = "eager"
+
+    def forward(self, inputs: Dict[str, torch.Tensor]) -> torch.Tensor:
+        with torch.no_grad():
+            return self.model(**inputs).logits
+
+
+class QuantizedBackend(InferenceBackend):
+    """nn.Linear 动态 int8 量化；不修改原模型。"""
+
+    name = "int8"
+
+    def __init__(self, model):
+        super().__init__(model)
+        self.quantized = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.quantized.eval()
+
+    def forward(self, inputs: Dict[str, torch.Tensor]) -> torch.Tensor:
+        with torch.no_grad():
+            return self.quantized(**inputs).logits
+
+
+class _LogitsOnly(torch.nn.Module):
+    """导出 ONNX 用的包装：固定输入顺序，只输出 logits。"""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask).logits
+
+
+class OnnxBackend(InferenceBackend):
+    """导出 ONNX 并使用 onnxruntime CPUExecutionProvider 推理。"""
+
+    name = "onnx"
+
+    def __init__(self, model, export_path: Optional[Path] = None, intra_op_threads: int = 0):
+        super().__init__(model)
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise RuntimeError("onnx 后端需要安装 onnxruntime: pip install onnx onnxruntime") from e
+
+        self.export_path = Path(export_path or Path(__file__).resolve().parent.parent / "data" / "onnx" / "model.onnx")
+        os.makedirs(self.export_path.parent, exist_ok=True)
+        # 先导出到本进程独有的临时文件并由它创建会话，再原子替换为 export_path：
+        # 离线分类的多个工作进程同时导出时不会互相覆盖或读到写了一半的文件
+        tmp = self.export_path.with_name(f".{self.export_path.name}.{os.getpid()}.{uuid.uuid4().hex}.tmp")
+        try:
+            self._export(tmp)
+            options = ort.SessionOptions()
+            if intra_op_threads > 0:
+                options.intra_op_num_threads = intra_op_threads
+            self.session = ort.InferenceSession(str(tmp), options, providers=["CPUExecutionProvider"])
+            os.replace(tmp, self.export_path)
+        finally:
+            if tmp.exists():
+                os.remove(tmp)
+
+    def _export(self, path: Path):
+        # 每次加载都重新导出，保证与当前（可能刚训练过的）权重一致
+        dummy = torch.ones((2, 8), dtype=torch.long)
+        with torch.no_grad():
+            torch.onnx.export(
+                _LogitsOnly(self.model).eval(),
+                (dummy, dummy),
+                str(path),
+                input_names=["input_ids", "attention_mask"],
+                output_names=["logits"],
+                dynamic_axes={
+                    "input_ids": {0: "batch", 1: "sequence"},
+                    "attention_mask": {0: "batch", 1: "sequence"},
+                    "logits": {0: "batch"},
+                },
+                opset_version=14,
+                dynamo=False,
+            )
+
+    def forward(self, inputs: Dict[str, torch.Tensor]) -> torch.Tensor:
+        feeds = {
+            "input_ids": inputs["input_ids"].numpy(),
+            "attention_mask": inputs["attention_mask"].numpy(),
+        }
+        return torch.from_numpy(self.session.run(["logits"], feeds)[0])
+
+
+BACKENDS = {
+    EagerBackend.name: EagerBackend,
+    QuantizedBackend.name: QuantizedBackend,
+    OnnxBackend.name: OnnxBackend,
+}
+
+
+def create_backend(name: str, model, **kwargs) -> InferenceBackend:
+    if name not in BACKENDS:
+        raise ValueError(f"未知推理后端: {name}，可选 {sorted(BACKENDS)}")
+    return BACKENDS[name](model, **kwargs)
+
+
+def check_parity(
+    backend: InferenceBackend,
+    reference: InferenceBackend,
+    inputs: Dict[str, torch.Tensor],
+    tolerance: Optional[float] = None,
+) -> float:
+    """比较两个后端在相同输入上的 softmax 概率，返回最大绝对误差；超出容差时抛出 ValueError。"""
+    if tolerance is None:
+        tolerance = DEFAULT_PARITY_TOLERANCE.get(backend.name, 1e-4)
+    expected = F.softmax(reference.forward(inputs).float(), dim=-1)
+    actual = F.softmax(backend.forward(inputs).float(), dim=-1)
+    max_diff = (expected - actual).abs().max().item()
+    if max_diff > tolerance:
+        raise ValueError(f"{backend.name} 后端与 {reference.name} 结果偏差 {max_diff:.6f} 超出容差 {tolerance}")
+    return max_diff
+
+
+__all__ = [
+    "BACKENDS",
+    "DEFAULT_PARITY_TOLERANCE",
+    "EagerBackend",
+    "InferenceBackend",
+    "OnnxBackend",
+    "QuantizedBackend",
+    "check_parity",
+    "create_backend",
+]
@@ -0,0 +1,124 @@
+"""推理线程池
+
+将 CPU 密集的 torch 推理从事件循环中移出，放入固定大小的线程池执行:
+1. 可配置工作线程数与 torch 线程数 (intra-op / inter-op)
+2. 待处理任务数有上限，饱和时立即抛出 ServerBusyError（由 API 层转换为 503 + Retry-After），
+   避免排队延迟无限增长
+3. 统计排队深度、执行中任务数与排队等待时间，便于观测
+"""
+import asyncio
+import functools
+import math
+import threading
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+
+class ServerBusyError(RuntimeError):
+    """推理队列已满，调用方应在 retry_after 秒后重试。"""
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def configure_torch_threads(intra_op_threads: int = 0, inter_op_threads: int = 0):
+    """设置 torch 线程数；0 表示保持 torch 默认值。"""
+    try:
+        import torch
+    except Exception:
+        return
+    if intra_op_threads > 0:
+        torch.set_num_threads(intra_op_threads)
+    if inter_op_threads > 0:
+        try:
+            torch.set_num_interop_threads(inter_op_threads)
+        except RuntimeError:
+            # inter-op 线程数只能在首次并行计算前设置一次
+            pass
+
+
+class InferenceExecutor(Executor):
+    """带背压的有界推理线程池。"""
+
+    def __init__(self, num_threads: int = 1, max_pending: int = 64):
+        if num_threads < 1:
+            raise ValueError("num_threads must be >= 1")
+        if max_pending < 1:
+            raise ValueError("max_pending must be >= 1")
+        self.num_threads = num_threads
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=num_threads, thread_name_prefix="inference")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._total_run = 0.0
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        with self._lock:
+            if self._queued + self._running >= self.max_pending:
+                self._rejected += 1
+                raise ServerBusyError("推理队列已满，请稍后重试", retry_after=self._estimate_retry_after())
+            self._queued += 1
+
+        enqueued_at = time.perf_counter()
+
+        def task():
+            started_at = time.perf_counter()
+            with self._lock:
+                wait = started_at - enqueued_at
+                self._queued -= 1
+                self._running += 1
+                self._total_wait += wait
+                self._max_wait = max(self._max_wait, wait)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._completed += 1
+                    self._total_run += time.perf_counter() - started_at
+
+        try:
+            return self._pool.submit(task)
+        except Exception:
+            with self._lock:
+                self._queued -= 1
+            raise
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """在线程池中执行 fn 并异步等待结果。"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self, functools.partial(fn, *args, **kwargs))
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        self._pool.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    def stats(self) -> dict:
+        with self._lock:
+            started = self._completed + self._running
+            return {
+                "num_threads": self.num_threads,
+                "max_pending": self.max_pending,
+                "queue_depth": self._queued,
+                "running": self._running,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_wait_ms": round(self._total_wait / started * 1000, 3) if started else 0.0,
+                "max_wait_ms": round(self._max_wait * 1000, 3),
+                "avg_run_ms": round(self._total_run / self._completed * 1000, 3) if self._completed else 0.0,
+            }
+
+    def _estimate_retry_after(self) -> int:
+        # 按平均执行耗时估算清空当前积压所需秒数（调用方持有锁）
+        avg_run = self._total_run / self._completed if self._completed else 1.0
+        backlog = self._queued + self._running
+        return max(1, math.ceil(avg_run * backlog / self.num_threads))
+
+
+__all__ = ["InferenceExecutor", "ServerBusyError", "configure_torch_threads"]
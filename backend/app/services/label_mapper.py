@@ -16,6 +16,10 @@
          "top_k": [ {"label": str, "score": float}, ... ]
      }
 
+另提供 map_finbert_logits_batch: 对 (N, 3) logits 以数组运算完成同样的映射（需要 numpy），
+结果与逐行调用 map_finbert_logits_to_labels 完全一致（numpy 与 math.exp 存在末位误差，
+处于并列/阈值/舍入边界附近的极少数行会回退到逐行路径），适合大批量重算。
+
 具备: 高内聚、无外部服务依赖，可单元测试。
 """
 from typing import List, Dict, Any
@@ -187,4 +191,130 @@ def map_finbert_logits_to_labels(logits: Any, top_k: int = 5, temperature: float
         "top_k": top_k_list,
     }
 
-__all__ = ["map_finbert_logits_to_labels"]
+def _to_array(logits: Any) -> "np.ndarray":
+    """Convert incoming batch logits (tensor/ndarray/nested list) to a float64 (N, 3) array."""
+    if TORCH_AVAILABLE and isinstance(logits, torch.Tensor):
+        arr = logits.detach().cpu().to(torch.float64).numpy()
+    else:
+        arr = np.asarray(logits, dtype=np.float64)
+    if arr.ndim != 2 or arr.shape[1] != 3:
+        raise ValueError("Batch FinBERT logits must have shape (N, 3): [Positive, Negative, Neutral]")
+    return arr
+
+
+def _softmax_rows(values: "np.ndarray") -> "np.ndarray":
+    """Row-wise numerically stable softmax (same operation order as _softmax)."""
+    exps = np.exp(values - values.max(axis=1, keepdims=True))
+    return exps / exps.sum(axis=1, keepdims=True)
+
+
+def _rank_top_k(prob_event: "np.ndarray", top_k: int) -> "np.ndarray":
+    """Row-wise indices of the top_k largest probabilities, ordered by (-prob, index) like sorted()."""
+    if top_k >= prob_event.shape[1]:
+        return np.argsort(-prob_event, axis=1, kind="stable")
+    candidates = np.argpartition(-prob_event, top_k - 1, axis=1)[:, :top_k]
+    cand_probs = np.take_along_axis(prob_event, candidates, axis=1)
+    order = np.lexsort((candidates, -cand_probs), axis=1)
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+# Decisions closer than this to a tie / threshold / rounding half-step are re-run on the scalar path
+_BOUNDARY_EPS = 1e-9
+
+
+def _near_boundary_rows(prob_sent: "np.ndarray", prob_event: "np.ndarray") -> "np.ndarray":
+    """Rows whose outcome could flip under 1-ulp differences between numpy and math.exp."""
+    def near(values, threshold):
+        return np.abs(values - threshold) < _BOUNDARY_EPS
+
+    pos, neg, neu = prob_sent[:, 0], prob_sent[:, 1], prob_sent[:, 2]
+    top_sent = prob_sent.max(axis=1)
+    mask = near(top_sent, 0.70) | near(top_sent, 0.40)
+    for threshold in (0.65, 0.80, 0.75, 0.40):
+        mask |= near(neg, threshold)
+    mask |= near(neg - pos, 0.20) | near(neu, 0.50)
+
+    # Near-ties decide argmax and the top-k order
+    for probs in (prob_sent, prob_event):
+        ordered = np.sort(probs, axis=1)
+        mask |= (np.diff(ordered, axis=1) < _BOUNDARY_EPS).any(axis=1)
+
+    # Scores sitting on a round(x, 6) half-step
+    scaled = prob_event * 1e6
+    mask |= near(scaled - np.floor(scaled), 0.5).any(axis=1)
+    return mask
+
+
+def map_finbert_logits_batch(logits: Any, top_k: int = 5, temperature: float = 1.2) -> List[Dict[str, Any]]:
+    """Vectorized batch version of map_finbert_logits_to_labels.
+
+    Args:
+        logits: (N, 3) torch tensor / numpy ndarray / nested list, columns [Positive, Negative, Neutral].
+        top_k: Number of event_type labels to include in ranked output (<= 6).
+        temperature: Temperature for scaling BEFORE softmax.
+
+    Returns:
+        List of N dicts, identical to calling map_finbert_logits_to_labels row by row.
+    """
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError("numpy is required for batch label mapping")
+    if temperature <= 0:
+        raise ValueError("temperature must be > 0")
+    sent_logits = _to_array(logits)
+    if sent_logits.shape[0] == 0:
+        return []
+
+    # Temperature scaling & softmax for sentiment
+    prob_sent = _softmax_rows(sent_logits / temperature)
+
+    # 3x6 expansion written out row by row to keep the scalar path's summation order
+    weights = np.asarray(_EVENT_TYPE_WEIGHTS, dtype=np.float64)
+    expanded = 0.0 + sent_logits[:, 0:1] * weights[0] + sent_logits[:, 1:2] * weights[1] + sent_logits[:, 2:3] * weights[2]
+    prob_event = _softmax_rows(expanded / temperature)
+
+    # Market direction / impact strength
+    direction_idx = np.argmax(prob_sent, axis=1)
+    top_sent = prob_sent.max(axis=1)
+    impact_idx = np.where(top_sent >= 0.70, 0, np.where(top_sent >= 0.40, 1, 2))
+
+    # Risk signal (same heuristic as _infer_risk_signal)
+    pos, neg, neu = prob_sent[:, 0], prob_sent[:, 1], prob_sent[:, 2]
+    strong_neg = (neg >= 0.65) & (neg - pos >= 0.20)
+    operational = (direction_idx == 2) & (neu >= 0.50) & (neg >= 0.40)
+    risk_idx = np.select(
+        [strong_neg & (neg >= 0.80), strong_neg & (neg >= 0.75), strong_neg, operational],
+        [0, 1, 2, 3],
+        default=4,
+    )
+
+    # Event type & top-k ranking
+    event_idx = np.argmax(prob_event, axis=1)
+    top_k = max(1, min(top_k, len(EVENT_TYPE_LABELS)))
+    ranked = _rank_top_k(prob_event, top_k)
+    ranked_probs = np.take_along_axis(prob_event, ranked, axis=1)
+
+    fallback = set(np.flatnonzero(_near_boundary_rows(prob_sent, prob_event)).tolist())
+
+    results = []
+    for row, (d, e, i, r, idx_row, prob_row) in enumerate(zip(
+        direction_idx.tolist(), event_idx.tolist(), impact_idx.tolist(), risk_idx.tolist(),
+        ranked.tolist(), ranked_probs.tolist(),
+    )):
+        if row in fallback:
+            results.append(map_finbert_logits_to_labels(sent_logits[row], top_k=top_k, temperature=temperature))
+            continue
+        results.append({
+            "classification": {
+                "market_direction": MARKET_DIRECTION_LABELS[d],
+                "event_type": EVENT_TYPE_LABELS[e],
+                "impact_strength": IMPACT_STRENGTH_LABELS[i],
+                "risk_signal": RISK_SIGNAL_LABELS[r],
+            },
+            "top_k": [
+                {"label": EVENT_TYPE_LABELS[j], "score": round(p, 6)}
+                for j, p in zip(idx_row, prob_row)
+            ],
+        })
+    return results
+
+__all__ = ["map_finbert_logits_to_labels", "map_finbert_logits_batch"]
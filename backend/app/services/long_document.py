@@ -0,0 +1,74 @@
+"""长文档滑动窗口推理辅助
+
+爬取的正文最多 5000 字符，远超 FinBERT 的 512 token 上限。长文档模式:
+1. 将全文 token 切分为相互重叠的窗口（窗口数有上限，成本可控）
+2. 所有窗口作为一个批次推理
+3. 将各窗口 logits 池化为一行后再交给 label_mapper
+
+池化方式:
+- mean: 各窗口 logits 取平均
+- max: 逐列取最大值
+- attention: 以各窗口最大 logit 的 softmax 作为权重加权平均，突出判别信号更强的段落
+"""
+import math
+from typing import List, Sequence
+
+POOLING_METHODS = ("mean", "max", "attention")
+
+
+def split_windows(
+    ids: Sequence[int],
+    cls_id: int,
+    sep_id: int,
+    max_length: int = 512,
+    overlap: int = 64,
+    max_windows: int = 8,
+) -> List[List[int]]:
+    """把不含特殊符号的 token 序列切成带 [CLS]/[SEP] 的重叠窗口。
+
+    窗口超过 max_windows 时，在全文范围内均匀抽取窗口起点，保证开头与结尾都被覆盖。
+    """
+    body = max_length - 2
+    if body <= 0:
+        raise ValueError("max_length must be > 2")
+    if not 0 <= overlap < body:
+        raise ValueError("overlap must be in [0, max_length - 2)")
+    if max_windows < 1:
+        raise ValueError("max_windows must be >= 1")
+
+    stride = body - overlap
+    last_start = max(0, len(ids) - body)
+    starts = list(range(0, last_start, stride)) + [last_start]
+    if len(starts) > max_windows:
+        if max_windows == 1:
+            starts = [0]
+        else:
+            step = (len(starts) - 1) / (max_windows - 1)
+            starts = [starts[round(i * step)] for i in range(max_windows)]
+    return [[cls_id] + list(ids[s:s + body]) + [sep_id] for s in starts]
+
+
+def pool_logits(rows: Sequence[Sequence[float]], method: str = "mean") -> List[float]:
+    """将多窗口 logits 池化为单行。"""
+    if not rows:
+        raise ValueError("no window logits to pool")
+    if method not in POOLING_METHODS:
+        raise ValueError(f"pooling must be one of {POOLING_METHODS}")
+    if len(rows) == 1:
+        return list(rows[0])
+
+    n_cols = len(rows[0])
+    if method == "max":
+        return [max(row[c] for row in rows) for c in range(n_cols)]
+    if method == "mean":
+        weights = [1.0 / len(rows)] * len(rows)
+    else:
+        scores = [max(row) for row in rows]
+        top = max(scores)
+        exps = [math.exp(s - top) for s in scores]
+        total = sum(exps)
+        weights = [e / total for e in exps]
+    return [sum(w * row[c] for w, row in zip(weights, rows)) for c in range(n_cols)]
+
+
+__all__ = ["POOLING_METHODS", "split_windows", "pool_logits"]
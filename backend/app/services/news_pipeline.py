@@ -0,0 +1,312 @@
+"""爬取 → 分类 → 入库 流水线
+
+定时爬取新文章，经批量 FinBERT 推理后写入历史记录库，无需前端手动操作:
+1. crawl 阶段：每 interval 秒对各来源执行一次增量爬取（新增 / 变化且非近似重复的文章）
+2. classify 阶段：批满 (batch_size) 或等待超时 (batch_wait_ms) 即合并为一次批量推理；
+   文章最长 5000 字符，使用长文档模式（全文切分为窗口、池化 logits），不截断到前 512 个 token；
+   推理线程池饱和时按 Retry-After 退避重试，不丢弃文章
+3. store 阶段：批量事务写入记录库（在线程中执行，不阻塞事件循环）
+4. 阶段之间为有界 asyncio 队列，下游积压时上游的 put 阻塞，形成反压
+5. 分类或入库失败时按指数退避重试 max_retries 次；仍失败、或停止时未处理完的文章撤销其已爬取标记
+   （增量索引与近似重复索引），下次爬取时重新抓取，不会永久丢失
+6. 每个阶段统计处理条数、批次数、错误数、近一分钟吞吐与队列积压；另统计入队到入库的延迟
+
+非 yahoo 来源使用爬虫的模拟数据，可完全离线运行。
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from .crawler_service import CrawlerService, crawler_service
+from .inference_executor import ServerBusyError
+from .record_store import RecordStore, make_record, record_store
+
+PIPELINE_ENABLED = os.getenv("PIPELINE_ENABLED", "0") == "1"
+PIPELINE_SOURCES = [s.strip() for s in os.getenv("PIPELINE_SOURCES", "yahoo").split(",") if s.strip()]
+PIPELINE_INTERVAL_SECONDS = float(os.getenv("PIPELINE_INTERVAL_SECONDS", "60"))
+PIPELINE_QUEUE_MAX = int(os.getenv("PIPELINE_QUEUE_MAX", "1000"))
+PIPELINE_BATCH_SIZE = int(os.getenv("PIPELINE_BATCH_SIZE", "32"))
+PIPELINE_BATCH_WAIT_MS = float(os.getenv("PIPELINE_BATCH_WAIT_MS", "200"))
+PIPELINE_STORE_BATCH = 200
+# 分类 / 入库失败后的重试次数与首次退避秒数（之后每次翻倍，上限 PIPELINE_MAX_BACKOFF）
+PIPELINE_MAX_RETRIES = int(os.getenv("PIPELINE_MAX_RETRIES", "3"))
+PIPELINE_RETRY_BACKOFF_SECONDS = float(os.getenv("PIPELINE_RETRY_BACKOFF_SECONDS", "1"))
+PIPELINE_MAX_BACKOFF = 30.0
+
+# 吞吐统计的滑动窗口（秒）
+THROUGHPUT_WINDOW = 60.0
+
+
+class _StageStats:
+    """单个阶段的计数与滑动窗口吞吐。"""
+
+    def __init__(self):
+        self.items = 0
+        self.batches = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self._window: deque = deque()
+
+    def record(self, items: int, elapsed: float):
+        now = time.monotonic()
+        self.items += items
+        self.batches += 1
+        self.busy_seconds += elapsed
+        self._window.append((now, items))
+        while self._window and now - self._window[0][0] > THROUGHPUT_WINDOW:
+            self._window.popleft()
+
+    def snapshot(self, backlog: Optional[int] = None) -> dict:
+        now = time.monotonic()
+        recent = sum(n for t, n in self._window if now - t <= THROUGHPUT_WINDOW)
+        return {
+            "items": self.items,
+            "batches": self.batches,
+            "errors": self.errors,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "items_per_sec": round(recent / THROUGHPUT_WINDOW, 3),
+            "backlog": backlog,
+        }
+
+
+async def _get_batch(queue: asyncio.Queue, max_items: int, max_wait: float) -> List:
+    """取回一批：阻塞等待首条，之后在 max_wait 内尽量凑满 max_items。"""
+    loop = asyncio.get_running_loop()
+    batch = [await queue.get()]
+    deadline = loop.time() + max_wait
+    while len(batch) < max_items:
+        if not queue.empty():
+            batch.append(queue.get_nowait())
+            continue
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(await asyncio.wait_for(queue.get(), remaining))
+        except asyncio.TimeoutError:
+            break
+    return batch
+
+
+class NewsPipeline:
+    """定时爬取并流式分类入库的后台流水线（运行在 FastAPI 事件循环中）。"""
+
+    def __init__(
+        self,
+        crawler: CrawlerService,
+        store: RecordStore,
+        sources: Optional[List[str]] = None,
+        interval: float = PIPELINE_INTERVAL_SECONDS,
+        queue_max: int = PIPELINE_QUEUE_MAX,
+        batch_size: int = PIPELINE_BATCH_SIZE,
+        batch_wait_ms: float = PIPELINE_BATCH_WAIT_MS,
+        temperature: float = 1.2,
+        max_retries: int = PIPELINE_MAX_RETRIES,
+        retry_backoff: float = PIPELINE_RETRY_BACKOFF_SECONDS,
+    ):
+        if batch_size < 1 or queue_max < 1:
+            raise ValueError("batch_size and queue_max must be >= 1")
+        self.crawler = crawler
+        self.store = store
+        self.sources = list(sources or PIPELINE_SOURCES)
+        self.interval = interval
+        self.queue_max = queue_max
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait_ms / 1000.0
+        self.temperature = temperature
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.service = None
+        self.stages = {"crawl": _StageStats(), "classify": _StageStats(), "store": _StageStats()}
+        # 撤销已爬取标记、留待下次重新爬取的文章数
+        self.released = 0
+        self.cycles = 0
+        self.last_cycle_at: Optional[str] = None
+        self._classify_queue: Optional[asyncio.Queue] = None
+        self._store_queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._scheduler: Optional[asyncio.Task] = None
+        self._cycle_lock: Optional[asyncio.Lock] = None
+        self._latencies: deque = deque(maxlen=1000)
+        # 各阶段正在处理的批次（停止时撤销其中未入库的文章）
+        self._in_flight: Dict[str, List[Dict]] = {"classify": [], "store": []}
+
+    @property
+    def is_running(self) -> bool:
+        return any(not t.done() for t in self._workers)
+
+    def start(self, service, schedule: bool = True):
+        """启动分类与入库协程；schedule 为 True 时同时启动定时爬取（需在事件循环中调用）。"""
+        self.service = service
+        loop = asyncio.get_running_loop()
+        if not self.is_running:
+            self._classify_queue = asyncio.Queue(maxsize=self.queue_max)
+            self._store_queue = asyncio.Queue(maxsize=self.queue_max)
+            self._cycle_lock = asyncio.Lock()
+            self._workers = [loop.create_task(self._classify_loop()), loop.create_task(self._store_loop())]
+            print(f"🚰 新闻流水线已启动: sources={self.sources}, interval={self.interval}s")
+        if schedule and (self._scheduler is None or self._scheduler.done()):
+            self._scheduler = loop.create_task(self._schedule_loop())
+
+    async def stop(self, drain_timeout: float = 10.0):
+        """停止定时爬取，在 drain_timeout 秒内处理完队列中的文章后停止各阶段；
+        超时未处理完的文章撤销已爬取标记，下次爬取时重新抓取。"""
+        if self._scheduler is not None:
+            self._scheduler.cancel()
+            await asyncio.gather(self._scheduler, return_exceptions=True)
+            self._scheduler = None
+        if self.is_running:
+            try:
+                await asyncio.wait_for(self.drain(), drain_timeout)
+            except asyncio.TimeoutError:
+                print(f"⚠️  新闻流水线停止时仍有 {self._classify_queue.qsize() + self._store_queue.qsize()} 条未处理")
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        unfinished = self._in_flight["classify"] + self._in_flight["store"]
+        self._in_flight = {"classify": [], "store": []}
+        for queue in (self._classify_queue, self._store_queue):
+            while queue is not None and not queue.empty():
+                unfinished.append(queue.get_nowait()[0])
+                queue.task_done()
+        if unfinished:
+            await self._release(unfinished)
+
+    async def drain(self):
+        """等待已入队的文章全部分类并入库。"""
+        await self._classify_queue.join()
+        await self._store_queue.join()
+
+    async def run_once(self) -> int:
+        """立即执行一轮爬取并将新文章送入流水线，返回入队条数（需先 start）。"""
+        if not self.is_running:
+            raise RuntimeError("流水线未启动")
+        async with self._cycle_lock:
+            enqueued = 0
+            for source in self.sources:
+                started = time.perf_counter()
+                try:
+                    articles = await self.crawler.crawl_async(source, dedup=True)
+                except Exception as e:
+                    self.stages["crawl"].errors += 1
+                    print(f"❌ 流水线爬取失败 ({source}): {e}")
+                    continue
+                self.stages["crawl"].record(len(articles), time.perf_counter() - started)
+                for article in articles:
+                    # 下游积压时在此阻塞（反压）
+                    await self._classify_queue.put((article, time.monotonic()))
+                    enqueued += 1
+            self.cycles += 1
+            self.last_cycle_at = datetime.now().isoformat()
+            return enqueued
+
+    def stats(self) -> dict:
+        latencies = sorted(self._latencies)
+        return {
+            "running": self.is_running,
+            "scheduled": self._scheduler is not None and not self._scheduler.done(),
+            "sources": self.sources,
+            "interval_seconds": self.interval,
+            "cycles": self.cycles,
+            "released": self.released,
+            "last_cycle_at": self.last_cycle_at,
+            "stages": {
+                "crawl": self.stages["crawl"].snapshot(),
+                "classify": self.stages["classify"].snapshot(
+                    self._classify_queue.qsize() if self._classify_queue else 0),
+                "store": self.stages["store"].snapshot(self._store_queue.qsize() if self._store_queue else 0),
+            },
+            # 文章入队到写入记录库的延迟（最近 1000 条）
+            "latency_seconds": {
+                "p50": round(latencies[len(latencies) // 2], 3) if latencies else None,
+                "max": round(latencies[-1], 3) if latencies else None,
+            },
+        }
+
+    async def _schedule_loop(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"❌ 流水线本轮执行失败: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def _with_retries(self, stage: str, fn):
+        """执行 fn()，失败后按指数退避重试 max_retries 次；推理线程池饱和不计入重试次数。"""
+        attempt = 0
+        while True:
+            try:
+                return await fn()
+            except ServerBusyError as e:
+                # 与在线请求共用推理线程池，饱和时退避而不是丢弃
+                await asyncio.sleep(e.retry_after)
+            except Exception as e:
+                self.stages[stage].errors += 1
+                if attempt >= self.max_retries:
+                    raise
+                delay = min(PIPELINE_MAX_BACKOFF, self.retry_backoff * (2 ** attempt))
+                attempt += 1
+                print(f"⚠️  流水线{stage}失败，{delay:.1f}s 后第 {attempt} 次重试: {e}")
+                await asyncio.sleep(delay)
+
+    async def _release(self, articles: List[Dict]):
+        """撤销未入库文章的已爬取标记，下次爬取时重新抓取。"""
+        try:
+            await asyncio.to_thread(self.crawler.release, articles)
+        except Exception as e:
+            print(f"❌ 撤销 {len(articles)} 条文章的爬取标记失败: {e}")
+            return
+        self.released += len(articles)
+        print(f"↩️  {len(articles)} 条文章未能入库，已撤销爬取标记，下次爬取时重新抓取")
+
+    async def _classify_loop(self):
+        while True:
+            batch = await _get_batch(self._classify_queue, self.batch_size, self.batch_wait)
+            articles = [article for article, _ in batch]
+            self._in_flight["classify"] = articles
+            started = time.perf_counter()
+            try:
+                mapped_list = await self._with_retries("classify", lambda: self.service.classify_documents_async(
+                    [article['text'] for article in articles], temperature=self.temperature, top_k=1))
+            except Exception as e:
+                print(f"❌ 流水线分类失败（已重试 {self.max_retries} 次）: {e}")
+                await self._release(articles)
+                for _ in batch:
+                    self._classify_queue.task_done()
+                self._in_flight["classify"] = []
+                continue
+            self.stages["classify"].record(len(batch), time.perf_counter() - started)
+            for (article, enqueued_at), mapped in zip(batch, mapped_list):
+                top = mapped["top_k"][0] if mapped["top_k"] else {"score": 0.0}
+                record = make_record(article['text'], mapped["classification"]["event_type"], top["score"],
+                                     mapped["classification"])
+                await self._store_queue.put((article, record, enqueued_at))
+                self._classify_queue.task_done()
+            self._in_flight["classify"] = []
+
+    async def _store_loop(self):
+        while True:
+            batch = await _get_batch(self._store_queue, PIPELINE_STORE_BATCH, self.batch_wait)
+            self._in_flight["store"] = [article for article, _, _ in batch]
+            started = time.perf_counter()
+            try:
+                await self._with_retries(
+                    "store", lambda: asyncio.to_thread(self.store.add_many, [record for _, record, _ in batch]))
+            except Exception as e:
+                print(f"❌ 流水线入库失败（已重试 {self.max_retries} 次）: {e}")
+                await self._release(self._in_flight["store"])
+            else:
+                self.stages["store"].record(len(batch), time.perf_counter() - started)
+                now = time.monotonic()
+                self._latencies.extend(now - enqueued_at for _, _, enqueued_at in batch)
+            # 被取消时不清空，由 stop() 撤销这一批
+            self._in_flight["store"] = []
+            for _ in batch:
+                self._store_queue.task_done()
+
+
+news_pipeline = NewsPipeline(crawler_service, record_store)
@@ -0,0 +1,210 @@
+"""离线多进程批量分类（命令行）
+
+用于夜间回填等大批量任务，绕开 Web 服务直接调用 FinBERTService:
+1. 输入 CSV、JSONL（每行一个 JSON 对象）或 Parquet，按 chunk_rows 行分块，动态分发给 N 个工作进程
+2. 每个工作进程只加载一次模型，torch 线程数 = CPU 核数 / 进程数，避免多进程争抢核心
+3. 按输入顺序合并结果，同时在途的分块数有上限，内存占用与文件大小无关
+4. 输出格式由输出文件扩展名决定（.csv / .jsonl），包含原始字段、3 个 logits 列与四大分类列
+
+用法 (在 backend 目录下):
+    python -m app.services.offline_classify news.csv news.classified.csv --workers 8
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from .dataset_jobs import RESULT_COLUMNS, annotate_rows
+from .inference_executor import configure_torch_threads
+
+CHUNK_ROWS = 256
+
+# 工作进程内的模型服务（由 _init_worker 初始化）
+_service = None
+_options: Dict = {}
+
+
+def available_cpus() -> int:
+    """当前进程可用的 CPU 核数（考虑 taskset / cgroup 亲和性）。"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _is_jsonl(path: Path) -> bool:
+    return path.suffix.lower() in (".jsonl", ".ndjson")
+
+
+def read_rows(path: Path) -> Iterator[Dict]:
+    """逐行读取 CSV / JSONL / Parquet。"""
+    path = Path(path)
+    if path.suffix.lower() == ".parquet":
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=CHUNK_ROWS):
+            yield from batch.to_pylist()
+        return
+    with open(path, "r", newline="", encoding="utf-8-sig") as f:
+        if _is_jsonl(path):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+def iter_chunks(rows: Iterator[Dict], chunk_rows: int) -> Iterator[List[Dict]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_rows:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class _RowWriter:
+    """按输出扩展名写 CSV / JSONL；CSV 表头取自第一块数据。"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.jsonl = _is_jsonl(self.path)
+        self._file = open(self.path, "w", newline="", encoding="utf-8")
+        self._writer = None
+
+    def write(self, rows: List[Dict]):
+        if self.jsonl:
+            for row in rows:
+                self._file.write(json.dumps(row, ensure_ascii=False) + "\n")
+            return
+        if self._writer is None:
+            fields = list(rows[0].keys()) if rows else []
+            fields += [c for c in RESULT_COLUMNS if c not in fields]
+            self._writer = csv.DictWriter(self._file, fieldnames=fields, extrasaction="ignore")
+            self._writer.writeheader()
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._file.close()
+
+
+def _init_worker(model_name: Optional[str], torch_threads: int, temperature: float, text_field: str):
+    """工作进程初始化：设置每个进程的 torch 线程数，再加载一次模型。"""
+    global _service
+    _options.update(temperature=temperature, text_field=text_field)
+    if _service is not None:
+        return
+
+    # 构造 bert_service 时会按 FINBERT_TORCH_THREADS 设置线程数，须在导入之后再覆盖为每进程线程数，
+    # onnx 后端的 intra_op 线程数同样使用每进程线程数，否则各进程会超额占用核心
+    from .bert_service import bert_service
+    configure_torch_threads(torch_threads, 1 if torch_threads > 0 else 0)
+    bert_service.torch_threads = torch_threads
+    if model_name:
+        bert_service.model_name = model_name
+    bert_service.load_model()
+    _service = bert_service
+
+
+def _classify_chunk(rows: List[Dict]) -> List[Dict]:
+    return annotate_rows(
+        rows,
+        lambda texts: _service.compute_logits(texts, use_cache=False),
+        temperature=_options["temperature"],
+        text_field=_options["text_field"],
+    )
+
+
+def classify_file(
+    input_path,
+    output_path,
+    workers: int = 0,
+    threads_per_worker: int = 0,
+    chunk_rows: int = CHUNK_ROWS,
+    temperature: float = 1.2,
+    text_field: str = "text",
+    model_name: Optional[str] = None,
+) -> Dict:
+    """分类整个文件并按输入顺序写出，返回行数、耗时与吞吐。
+
+    workers 为 0 时使用全部可用核心；threads_per_worker 为 0 时按核心数平均分配。
+    workers 为 1 时在当前进程内执行。
+    """
+    cpus = available_cpus()
+    workers = workers or cpus
+    threads = threads_per_worker or max(1, cpus // workers)
+    initargs = (model_name, threads, temperature, text_field)
+    chunks = iter_chunks(read_rows(input_path), chunk_rows)
+    writer = _RowWriter(output_path)
+    rows = 0
+    started = time.perf_counter()
+    try:
+        if workers == 1:
+            _init_worker(*initargs)
+            for chunk in chunks:
+                writer.write(_classify_chunk(chunk))
+                rows += len(chunk)
+        else:
+            # spawn: 子进程不继承父进程已初始化的 torch 线程池
+            ctx = multiprocessing.get_context("spawn")
+            with ctx.Pool(workers, initializer=_init_worker, initargs=initargs) as pool:
+                # 在途分块有上限，按提交顺序取回结果即为输入顺序
+                pending = deque()
+                max_in_flight = workers * 2
+                for chunk in chunks:
+                    pending.append(pool.apply_async(_classify_chunk, (chunk,)))
+                    if len(pending) >= max_in_flight:
+                        done = pending.popleft().get()
+                        writer.write(done)
+                        rows += len(done)
+                while pending:
+                    done = pending.popleft().get()
+                    writer.write(done)
+                    rows += len(done)
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - started
+    return {
+        "rows": rows,
+        "workers": workers,
+        "threads_per_worker": threads,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(rows / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Offline multi-process FinBERT classification")
+    parser.add_argument("input", help="输入 CSV / JSONL / Parquet")
+    parser.add_argument("output", help="输出 CSV / JSONL（按扩展名判断格式）")
+    parser.add_argument("--workers", type=int, default=0, help="工作进程数（0 = 全部可用核心）")
+    parser.add_argument("--threads-per-worker", type=int, default=0, help="每个进程的 torch 线程数（0 = 自动平分）")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--temperature", type=float, default=1.2)
+    parser.add_argument("--text-field", default="text")
+    parser.add_argument("--model", default=None, help="模型名称或本地路径（默认 ProsusAI/finbert）")
+    args = parser.parse_args(argv)
+
+    stats = classify_file(
+        args.input,
+        args.output,
+        workers=args.workers,
+        threads_per_worker=args.threads_per_worker,
+        chunk_rows=args.chunk_rows,
+        temperature=args.temperature,
+        text_field=args.text_field,
+        model_name=args.model,
+    )
+    print(f"✅ 已分类 {stats['rows']} 行: {stats['workers']} 进程 × {stats['threads_per_worker']} 线程, "
+          f"{stats['seconds']}s, {stats['rows_per_sec']} 行/秒")
+
+
+if __name__ == "__main__":
+    main()
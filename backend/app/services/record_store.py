@@ -0,0 +1,327 @@
+"""历史记录存储
+
+以 SQLite (WAL 模式) 保存分类历史记录，替代整文件读写的 records.json:
+1. id 主键，(timestamp, id) / (label, timestamp, id) / confidence 建索引，插入与删除为 O(log N)
+2. WAL 模式下读写互不阻塞，写入由连接锁串行化，避免并发写坏文件
+3. 服务启动时（main.py startup）一次性迁移旧的 records.json（迁移后重命名为 records.json.migrated，
+   无法解析的文件重命名为 records.json.corrupt 并保留原内容）
+4. 基于 (timestamp, id) 游标的 keyset 分页与服务端过滤，查询成本只与页大小相关
+5. FTS5 全文索引（外部内容表 + 触发器增量维护），支持按相关度排序并结合四大分类字段过滤
+6. 首次访问时才打开数据库，导入模块（测试、离线命令行）不会创建或修改 data/ 下的文件
+"""
+import base64
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+BASE_DIR = Path(__file__).resolve().parent.parent  # app/
+DEFAULT_DB_PATH = BASE_DIR / "data" / "records.db"
+LEGACY_JSON_PATH = BASE_DIR / "data" / "records.json"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    id TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    label TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    timestamp TEXT NOT NULL,
+    market_direction TEXT,
+    event_type TEXT,
+    impact_strength TEXT,
+    risk_signal TEXT
+);
+DROP INDEX IF EXISTS idx_records_timestamp;
+DROP INDEX IF EXISTS idx_records_label;
+CREATE INDEX IF NOT EXISTS idx_records_timestamp_id ON records (timestamp, id);
+CREATE INDEX IF NOT EXISTS idx_records_label_timestamp_id ON records (label, timestamp, id);
+CREATE INDEX IF NOT EXISTS idx_records_confidence ON records (confidence);
+"""
+
+# 全文索引：以 records 为外部内容表，按 rowid 关联；触发器保证增删改时同步更新
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE records_fts USING fts5(text, content='records', content_rowid='rowid');
+CREATE TRIGGER records_fts_ai AFTER INSERT ON records BEGIN
+    INSERT INTO records_fts (rowid, text) VALUES (new.rowid, new.text);
+END;
+CREATE TRIGGER records_fts_ad AFTER DELETE ON records BEGIN
+    INSERT INTO records_fts (records_fts, rowid, text) VALUES ('delete', old.rowid, old.text);
+END;
+CREATE TRIGGER records_fts_au AFTER UPDATE OF text ON records BEGIN
+    INSERT INTO records_fts (records_fts, rowid, text) VALUES ('delete', old.rowid, old.text);
+    INSERT INTO records_fts (rowid, text) VALUES (new.rowid, new.text);
+END;
+INSERT INTO records_fts (records_fts) VALUES ('rebuild');
+"""
+
+TAXONOMY_FIELDS = ("market_direction", "event_type", "impact_strength", "risk_signal")
+_COLUMNS = ("id", "text", "label", "confidence", "timestamp") + TAXONOMY_FIELDS
+
+
+class RecordStore:
+    """基于 SQLite 的历史记录存储。"""
+
+    def __init__(self, db_path: Optional[Path] = None, legacy_json_path: Optional[Path] = None):
+        self.db_path = Path(db_path or DEFAULT_DB_PATH)
+        self.legacy_json_path = Path(legacy_json_path) if legacy_json_path else LEGACY_JSON_PATH
+        self._lock = threading.Lock()
+        self._open_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._fts_enabled = False
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """首次访问时打开数据库。"""
+        if self._db is None:
+            with self._open_lock:
+                if self._db is None:
+                    self._db = self._open()
+        return self._db
+
+    @property
+    def fts_enabled(self) -> bool:
+        # 是否支持 FTS5 在打开数据库时确定
+        self._conn
+        return self._fts_enabled
+
+    def _open(self) -> sqlite3.Connection:
+        os.makedirs(self.db_path.parent, exist_ok=True)
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        self._add_missing_columns(conn)
+        self._fts_enabled = self._ensure_fts(conn)
+        conn.commit()
+        return conn
+
+    def add(self, text: str, label: str, confidence: float, classification: Optional[Dict] = None) -> Dict:
+        """插入一条记录，返回带 id 与 timestamp 的完整记录；classification 为四大分类字段（可选）。"""
+        record = make_record(text, label, confidence, classification)
+        self.add_many([record])
+        return record
+
+    def add_many(self, records: List[Dict]) -> int:
+        """在单个事务中批量插入完整记录（已存在的 id 将被忽略），返回实际插入条数。"""
+        rows = [tuple(r.get(c) for c in _COLUMNS) for r in records]
+        with self._lock, self._conn:
+            # rowcount 不含全文索引触发器写入的行，与实际插入的记录数一致
+            cursor = self._conn.executemany(
+                f"INSERT OR IGNORE INTO records ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})",
+                rows,
+            )
+            return cursor.rowcount
+
+    def delete(self, record_id: str) -> bool:
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM records WHERE id = ?", (record_id,))
+            return cursor.rowcount > 0
+
+    def get(self, record_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM records WHERE id = ?", (record_id,)).fetchone()
+        return dict(row) if row else None
+
+    def list_all(self) -> List[Dict]:
+        """全部记录，最新在前。"""
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM records ORDER BY timestamp DESC, id DESC").fetchall()
+        return [dict(r) for r in rows]
+
+    def query(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        label: Optional[str] = None,
+        min_confidence: Optional[float] = None,
+        max_confidence: Optional[float] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        text: Optional[str] = None,
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """按 (timestamp, id) 倒序分页查询，返回 (本页记录, 下一页游标)；没有更多数据时游标为 None。
+
+        since / until 为 ISO 时间字符串（since 含、until 不含）；text 为大小写不敏感的子串匹配。
+        """
+        if limit < 1:
+            raise ValueError("limit must be >= 1")
+        clauses, params = [], []
+        if cursor:
+            clauses.append("(timestamp, id) < (?, ?)")
+            params.extend(decode_cursor(cursor))
+        if label:
+            clauses.append("label = ?")
+            params.append(label)
+        if min_confidence is not None:
+            clauses.append("confidence >= ?")
+            params.append(min_confidence)
+        if max_confidence is not None:
+            clauses.append("confidence <= ?")
+            params.append(max_confidence)
+        if since:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until:
+            clauses.append("timestamp < ?")
+            params.append(until)
+        if text:
+            clauses.append("instr(lower(text), lower(?)) > 0")
+            params.append(text)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT * FROM records {where} ORDER BY timestamp DESC, id DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(sql, (*params, limit + 1)).fetchall()
+
+        items = [dict(r) for r in rows[:limit]]
+        next_cursor = encode_cursor(items[-1]["timestamp"], items[-1]["id"]) if len(rows) > limit else None
+        return items, next_cursor
+
+    def search(
+        self,
+        query: str,
+        limit: int = 50,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        **taxonomy: Optional[str],
+    ) -> List[Dict]:
+        """全文检索，按相关度 (bm25) 排序，可结合四大分类字段与时间窗口过滤。
+
+        query 中的每个词都必须出现（词序无关）；返回记录附带 score 字段，越大越相关。
+        """
+        terms = query.split()
+        if not terms:
+            raise ValueError("query must not be empty")
+        if limit < 1:
+            raise ValueError("limit must be >= 1")
+        unknown = set(taxonomy) - set(TAXONOMY_FIELDS)
+        if unknown:
+            raise ValueError(f"unknown filter: {', '.join(sorted(unknown))}")
+
+        clauses, params = [], []
+        for field in TAXONOMY_FIELDS:
+            if taxonomy.get(field):
+                clauses.append(f"r.{field} = ?")
+                params.append(taxonomy[field])
+        if since:
+            clauses.append("r.timestamp >= ?")
+            params.append(since)
+        if until:
+            clauses.append("r.timestamp < ?")
+            params.append(until)
+        extra = "".join(f" AND {c}" for c in clauses)
+
+        if self.fts_enabled:
+            # 每个词加引号作为短语，避免用户输入被解析为 FTS5 查询语法
+            match = " ".join('"' + t.replace('"', '""') + '"' for t in terms)
+            sql = (
+                "SELECT r.*, -bm25(records_fts) AS score FROM records_fts "
+                "JOIN records r ON r.rowid = records_fts.rowid "
+                f"WHERE records_fts MATCH ?{extra} ORDER BY bm25(records_fts) LIMIT ?"
+            )
+            args = (match, *params, limit)
+        else:
+            like = " AND ".join("instr(lower(r.text), lower(?)) > 0" for _ in terms)
+            sql = f"SELECT r.*, 0.0 AS score FROM records r WHERE {like}{extra} ORDER BY r.timestamp DESC LIMIT ?"
+            args = (*terms, *params, limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        return [dict(r) for r in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def migrate_legacy_json(self) -> int:
+        """将旧版 records.json 导入数据库并重命名源文件，返回导入条数。"""
+        if not self.legacy_json_path.exists():
+            return 0
+        try:
+            with open(self.legacy_json_path, "r", encoding="utf-8") as f:
+                legacy = json.load(f)
+        except json.JSONDecodeError as e:
+            # 不当作已迁移：保留原文件内容，重命名后不再重复尝试
+            corrupt = self.legacy_json_path.with_name(self.legacy_json_path.name + ".corrupt")
+            os.replace(self.legacy_json_path, corrupt)
+            print(f"❌ {self.legacy_json_path.name} 无法解析，未迁移，已重命名为 {corrupt.name}: {e}")
+            return 0
+
+        records = []
+        for item in legacy:
+            if not isinstance(item, dict) or "text" not in item or "label" not in item:
+                continue
+            records.append({
+                "id": item.get("id") or str(uuid.uuid4()),
+                "text": item["text"],
+                "label": item["label"],
+                "confidence": float(item.get("confidence", 0.0)),
+                "timestamp": item.get("timestamp") or datetime.now().isoformat(),
+            })
+        inserted = self.add_many(records)
+        os.replace(self.legacy_json_path, self.legacy_json_path.with_name(self.legacy_json_path.name + ".migrated"))
+        print(f"📦 已从 {self.legacy_json_path.name} 迁移 {inserted} 条历史记录")
+        return inserted
+
+    @staticmethod
+    def _add_missing_columns(conn: sqlite3.Connection):
+        """为旧版数据库补充四大分类字段。"""
+        existing = {row["name"] for row in conn.execute("PRAGMA table_info(records)")}
+        for field in TAXONOMY_FIELDS:
+            if field not in existing:
+                conn.execute(f"ALTER TABLE records ADD COLUMN {field} TEXT")
+
+    @staticmethod
+    def _ensure_fts(conn: sqlite3.Connection) -> bool:
+        """创建全文索引并回填已有记录；当前 SQLite 不支持 FTS5 时返回 False（检索退化为子串匹配）。"""
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'records_fts'"
+        ).fetchone()
+        if exists:
+            return True
+        try:
+            conn.executescript(_FTS_SCHEMA)
+            return True
+        except sqlite3.OperationalError as e:
+            print(f"⚠️  SQLite 不支持 FTS5，全文检索退化为子串匹配: {e}")
+            return False
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+def make_record(text: str, label: str, confidence: float, classification: Optional[Dict] = None) -> Dict:
+    """生成带新 id 与当前时间戳的完整记录；classification 为 label_mapper 输出的四大分类块（可选）。"""
+    record = {
+        "id": str(uuid.uuid4()),
+        "text": text,
+        "label": label,
+        "confidence": confidence,
+        "timestamp": datetime.now().isoformat(),
+    }
+    for field in TAXONOMY_FIELDS:
+        record[field] = (classification or {}).get(field)
+    return record
+
+
+def encode_cursor(timestamp: str, record_id: str) -> str:
+    return base64.urlsafe_b64encode(f"{timestamp}|{record_id}".encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        timestamp, record_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|", 1)
+    except Exception:
+        raise ValueError("invalid cursor")
+    return timestamp, record_id
+
+
+record_store = RecordStore()
@@ -0,0 +1,130 @@
+"""历史记录异步写回 (write-behind)
+
+分类接口开启 persist 后，结果先进入进程内有界缓冲区，由后台线程批量写入记录库:
+1. 缓冲达到 flush_size 条或距上次写入超过 flush_interval 秒即触发一次批量事务
+2. 缓冲区有上限，写满时丢弃新记录并计数，不阻塞请求
+3. 应用关闭时 (shutdown_event) 调用 stop() 写完剩余记录
+4. 统计写入次数、写入耗时与丢弃条数
+"""
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List
+
+from .record_store import RecordStore, record_store
+
+WRITE_BUFFER_MAX = int(os.getenv("RECORDS_WRITE_BUFFER_MAX", "10000"))
+FLUSH_SIZE = int(os.getenv("RECORDS_FLUSH_SIZE", "200"))
+FLUSH_INTERVAL_MS = float(os.getenv("RECORDS_FLUSH_INTERVAL_MS", "1000"))
+
+
+class RecordWriter:
+    """后台线程批量写入的有界缓冲区。"""
+
+    def __init__(self, store: RecordStore, max_buffer: int = 10000, flush_size: int = 200, flush_interval: float = 1.0):
+        if max_buffer < 1 or flush_size < 1:
+            raise ValueError("max_buffer and flush_size must be >= 1")
+        self.store = store
+        self.max_buffer = max_buffer
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._buffer: deque = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        self._flush_lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+        self._total_flush = 0.0
+        self._max_flush = 0.0
+        self._last_flush = 0.0
+
+    def submit(self, record: Dict) -> bool:
+        return self.submit_many([record]) == 1
+
+    def submit_many(self, records: List[Dict]) -> int:
+        """加入缓冲区，返回被接受的条数；超出容量的部分丢弃。"""
+        with self._cond:
+            self._ensure_thread()
+            accepted = max(0, min(len(records), self.max_buffer - len(self._buffer)))
+            self._buffer.extend(records[:accepted])
+            self.dropped += len(records) - accepted
+            if len(self._buffer) >= self.flush_size:
+                self._cond.notify()
+        return accepted
+
+    def flush(self) -> int:
+        """立即写入当前缓冲的全部记录，返回写入条数。"""
+        with self._flush_lock:
+            with self._cond:
+                batch = list(self._buffer)
+                self._buffer.clear()
+            if not batch:
+                return 0
+            started = time.perf_counter()
+            try:
+                self.store.add_many(batch)
+            except Exception as e:
+                self.failed += len(batch)
+                print(f"❌ 历史记录批量写入失败，丢弃 {len(batch)} 条: {e}")
+                return 0
+            elapsed = time.perf_counter() - started
+            self.flushes += 1
+            self.written += len(batch)
+            self._total_flush += elapsed
+            self._max_flush = max(self._max_flush, elapsed)
+            self._last_flush = elapsed
+            return len(batch)
+
+    def stop(self, timeout: float = 10.0):
+        """停止后台线程并写完剩余记录。"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+        self._stopping = False
+
+    def stats(self) -> dict:
+        with self._cond:
+            buffered = len(self._buffer)
+        return {
+            "buffered": buffered,
+            "max_buffer": self.max_buffer,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "flushes": self.flushes,
+            "avg_flush_ms": round(self._total_flush / self.flushes * 1000, 3) if self.flushes else 0.0,
+            "max_flush_ms": round(self._max_flush * 1000, 3),
+            "last_flush_ms": round(self._last_flush * 1000, 3),
+        }
+
+    def _ensure_thread(self):
+        # 调用方持有 self._cond
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="record-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._stopping and len(self._buffer) < self.flush_size:
+                    self._cond.wait(self.flush_interval)
+                stopping = self._stopping
+            self.flush()
+            if stopping:
+                return
+
+
+record_writer = RecordWriter(
+    record_store,
+    max_buffer=WRITE_BUFFER_MAX,
+    flush_size=FLUSH_SIZE,
+    flush_interval=FLUSH_INTERVAL_MS / 1000.0,
+)
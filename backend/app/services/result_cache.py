@@ -0,0 +1,110 @@
+"""推理结果缓存
+
+财经新闻转载频繁，同一标题会被多次分类。本模块按 "规范化文本哈希 + 模型版本" 缓存原始 logits:
+1. 只缓存 logits，任意 temperature / top_k 组合都只需重新执行 label_mapper
+2. 容量受限的 LRU 淘汰，可选 TTL 过期
+3. 命中 / 未命中 / 淘汰计数
+4. 模型重新加载或训练完成后整体失效；模型版本取权重摘要 (weights_fingerprint)，重启后保持一致
+
+LRUCache 为通用实现，分词缓存 (token_cache) 也复用它。
+"""
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """折叠空白字符并去除首尾空白；不改变大小写，以免影响分词结果。"""
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def text_key(text: str, model_version: str = "") -> str:
+    """规范化文本与模型版本的 SHA-256 摘要。"""
+    payload = f"{model_version}\x00{normalize_text(text)}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+def weights_fingerprint(model) -> str:
+    """模型权重（state_dict 全部张量）的 blake2b 摘要，权重相同则跨进程、跨重启一致。"""
+    import torch
+
+    digest = hashlib.blake2b(digest_size=8)
+    for name, tensor in sorted(model.state_dict().items()):
+        digest.update(name.encode("utf-8"))
+        digest.update(str(tensor.dtype).encode("utf-8"))
+        digest.update(tensor.detach().cpu().contiguous().view(-1).view(torch.uint8).numpy())
+    return digest.hexdigest()
+
+
+class LRUCache:
+    """线程安全的 LRU + TTL 缓存；max_entries 为 0 时禁用。"""
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_seconds > 0 and time.monotonic() - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, value: Any):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class LogitsCache(LRUCache):
+    """按 text_key 缓存原始 logits 列表。"""
+
+
+__all__ = ["LRUCache", "LogitsCache", "normalize_text", "text_key"]
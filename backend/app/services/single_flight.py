@@ -0,0 +1,89 @@
+"""进行中请求合并 (single-flight)
+
+同一键的并发调用只执行一次计算，其余调用方等待同一个共享 Future:
+- do(): 同步调用（推理线程等）
+- do_async(): 异步调用；计算在独立任务中进行，任一调用方被取消不会影响其他等待者
+
+Future 使用 concurrent.futures.Future，因此同步与异步调用方可共享同一次计算。
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class SingleFlight:
+    """按键合并并发的相同计算。"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        future, is_leader = self._begin(key)
+        if not is_leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result=result)
+        return result
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        future, is_leader = self._begin(key)
+        if is_leader:
+            task = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda t: self._finish_task(key, future, t))
+        # 每个等待者各自包装共享 Future 并 shield：取消某个调用方只取消其自身的等待
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+            }
+
+    def _begin(self, key: str) -> Tuple[Future, bool]:
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = Future()
+            # 标记为运行中，共享 Future 此后无法被任一等待者 cancel()
+            future.set_running_or_notify_cancel()
+            self._calls[key] = future
+            self.leaders += 1
+            return future, True
+
+    def _finish(self, key: str, future: Future, result: Any = None, error: BaseException = None):
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _finish_task(self, key: str, future: Future, task: asyncio.Future):
+        if task.cancelled():
+            self._finish(key, future, error=RuntimeError("计算任务已取消"))
+        elif task.exception() is not None:
+            self._finish(key, future, error=task.exception())
+        else:
+            self._finish(key, future, result=task.result())
+
+
+__all__ = ["SingleFlight"]
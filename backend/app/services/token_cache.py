@@ -0,0 +1,86 @@
+"""分词缓存
+
+对短标题而言，分词在单次请求 CPU 时间中占比可观。本模块:
+1. 以一次批量调用 (fast tokenizer) 编码所有未命中的文本，不做 padding
+2. 按 "规范化文本 + max_length" 缓存 input_ids（容量受限的 LRU）
+3. 按批内最长序列补齐，生成 input_ids / attention_mask 张量
+4. 按序列长度分桶，使长度相近的文本同批推理，减少补齐浪费（注意力开销随补齐长度平方增长）
+
+在线推理路径使用本缓存（训练使用 token_dataset 的内存映射分词缓存）；更换 tokenizer 时需调用 clear()。
+"""
+from typing import Dict, List, Sequence
+
+import torch
+
+from .result_cache import LRUCache, normalize_text
+
+
+class TokenizationCache:
+    """text -> input_ids 的有界缓存，并负责批内补齐。"""
+
+    def __init__(self, max_entries: int = 50000, max_length: int = 512):
+        self.max_length = max_length
+        self._cache = LRUCache(max_entries=max_entries)
+
+    def encode_ids(self, tokenizer, texts: Sequence[str]) -> List[List[int]]:
+        """返回每条文本截断后的 input_ids（未补齐）。"""
+        keys = [f"{self.max_length}\x00{normalize_text(t)}" for t in texts]
+        ids: List = [self._cache.get(k) for k in keys]
+        missing = [i for i, row in enumerate(ids) if row is None]
+        if missing:
+            encoded = tokenizer(
+                [texts[i] for i in missing],
+                padding=False,
+                truncation=True,
+                max_length=self.max_length,
+            )["input_ids"]
+            for i, row in zip(missing, encoded):
+                ids[i] = row
+                self._cache.put(keys[i], row)
+        return ids
+
+    def encode(self, tokenizer, texts: Sequence[str]) -> Dict[str, torch.Tensor]:
+        """编码并补齐为模型输入张量，等价于 tokenizer(texts, padding=True, truncation=True)。"""
+        return pad_batch(self.encode_ids(tokenizer, texts), tokenizer.pad_token_id or 0)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+def pad_batch(ids: Sequence[Sequence[int]], pad_token_id: int = 0) -> Dict[str, torch.Tensor]:
+    """将变长 input_ids 右侧补齐到批内最长长度。"""
+    longest = max((len(row) for row in ids), default=0)
+    input_ids = torch.full((len(ids), longest), pad_token_id, dtype=torch.long)
+    attention_mask = torch.zeros((len(ids), longest), dtype=torch.long)
+    for i, row in enumerate(ids):
+        input_ids[i, :len(row)] = torch.tensor(row, dtype=torch.long)
+        attention_mask[i, :len(row)] = 1
+    return {"input_ids": input_ids, "attention_mask": attention_mask}
+
+
+def length_buckets(lengths: Sequence[int], max_batch_size: int, max_batch_tokens: int = 0) -> List[List[int]]:
+    """按长度升序分组，返回原始下标列表。
+
+    每组不超过 max_batch_size 条；max_batch_tokens > 0 时，组内条数 × 最长长度（即补齐后的 token 数）
+    也不超过该上限（单条超长文本独占一组）。
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    buckets: List[List[int]] = []
+    current: List[int] = []
+    for i in order:
+        # 升序遍历，加入 i 后组内最长长度即 lengths[i]
+        too_many = len(current) >= max_batch_size
+        too_wide = max_batch_tokens > 0 and (len(current) + 1) * lengths[i] > max_batch_tokens
+        if current and (too_many or too_wide):
+            buckets.append(current)
+            current = []
+        current.append(i)
+    if current:
+        buckets.append(current)
+    return buckets
+
+
+__all__ = ["TokenizationCache", "length_buckets", "pad_batch"]
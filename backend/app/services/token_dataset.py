@@ -0,0 +1,285 @@
+"""训练数据的分词缓存（内存映射）
+
+训练集只分词一次，结果以定长类型的二进制数组落盘，之后按需内存映射读取:
+1. 流式读取 CSV（可选流式近似去重），按块分词并追加写入 input_ids / attention_mask / labels / offsets，
+   内存占用与数据集大小无关
+2. 缓存键 = 文件内容 sha256 + 分词器 + max_length + 是否去重 + 标签表；数据集或分词器变化后自动重建，
+   否则再次训练直接复用，完全跳过分词
+3. 先写入临时目录，完成后原子重命名，构建中断不会留下半成品
+4. TokenDataset 以 np.memmap 读取（每个 DataLoader 工作进程各自打开），LengthBucketSampler 在
+   随机打乱的样本池内按长度分批并逐池产出批次，collate_tokens 补齐到批内最长长度
+
+文件布局 (data/token_cache/<key>/):
+    input_ids.bin (int32)、attention_mask.bin (uint8): 全部样本首尾相接
+    offsets.bin (int64, N+1): 第 i 条样本为 [offsets[i], offsets[i+1])
+    labels.bin (int64, N)
+    meta.json
+"""
+import csv
+import hashlib
+import json
+import os
+import random
+import shutil
+import uuid
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import torch
+from torch.utils.data import Dataset, Sampler
+
+from .near_duplicate import mark_near_duplicates
+from .token_cache import length_buckets
+
+BASE_DIR = Path(__file__).resolve().parent.parent  # app/
+TOKEN_CACHE_DIR = BASE_DIR / "data" / "token_cache"
+
+# 每次送入分词器的文本条数
+TOKENIZE_CHUNK_ROWS = 1024
+# 缓存格式版本：布局变化时递增，使旧缓存失效
+CACHE_FORMAT = 1
+
+# 数据集中常见的标签写法 -> FinBERT 三分类
+LABEL_ALIASES = {
+    "positive": "positive", "bullish": "positive", "pos": "positive", "利好": "positive",
+    "negative": "negative", "bearish": "negative", "neg": "negative", "利空": "negative",
+    "neutral": "neutral", "neu": "neutral", "中性": "neutral",
+}
+
+_ARRAYS = {"input_ids": np.int32, "attention_mask": np.uint8, "offsets": np.int64, "labels": np.int64}
+
+
+def resolve_label(value: Optional[str], label2id: Dict[str, int]) -> Optional[int]:
+    """将 CSV 中的标签（名称、别名或类别编号）转换为模型类别编号，无法识别时返回 None。"""
+    value = (value or "").strip().lower()
+    if not value:
+        return None
+    if value.isdigit():
+        return int(value) if int(value) < len(label2id) else None
+    return label2id.get(LABEL_ALIASES.get(value, value))
+
+
+def file_sha256(path: Path) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def tokenizer_fingerprint(tokenizer) -> str:
+    return f"{type(tokenizer).__name__}:{getattr(tokenizer, 'name_or_path', '')}:{len(tokenizer)}"
+
+
+def cache_key(content_hash: str, tokenizer, max_length: int, dedupe: bool, label2id: Dict[str, int]) -> str:
+    parts = [str(CACHE_FORMAT), content_hash, tokenizer_fingerprint(tokenizer), str(max_length), str(dedupe),
+             json.dumps(label2id, sort_keys=True)]
+    return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()[:32]
+
+
+def _iter_labeled(rows: Iterable[Dict], label2id: Dict[str, int], stats: Dict) -> Iterator[Tuple[str, int]]:
+    for row in rows:
+        label = resolve_label(row.get("label"), label2id)
+        if label is None:
+            stats["skipped_labels"] += 1
+            continue
+        yield row["text"], label
+
+
+def _chunks(items: Iterator, size: int) -> Iterator[List]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def build_token_cache(dataset_path: Path, tokenizer, label2id: Dict[str, int], cache_dir: Path = TOKEN_CACHE_DIR,
+                      max_length: int = 512, dedupe: bool = True) -> Tuple[Path, Dict]:
+    """返回 (缓存目录, meta)；已有相同键的完整缓存时直接返回，不再分词。"""
+    dataset_path = Path(dataset_path)
+    key = cache_key(file_sha256(dataset_path), tokenizer, max_length, dedupe, label2id)
+    target = Path(cache_dir) / key
+    meta_path = target / "meta.json"
+    if meta_path.exists():
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return target, {**json.load(f), "from_cache": True}
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = Path(cache_dir) / f".{key}.{uuid.uuid4().hex}.tmp"
+    os.makedirs(tmp)
+    stats = {"rows": 0, "empty": 0, "duplicates": 0, "skipped_labels": 0}
+    try:
+        files = {name: open(tmp / f"{name}.bin", "wb") for name in _ARRAYS}
+        try:
+            offset = 0
+            files["offsets"].write(np.zeros(1, dtype=np.int64).tobytes())
+            with open(dataset_path, "r", newline="", encoding="utf-8-sig") as f:
+                rows = _non_empty(csv.DictReader(f), stats)
+                if dedupe:
+                    # 近似去重索引写在临时目录的磁盘文件中，不随数据集增长占用内存
+                    rows = _drop_duplicates(mark_near_duplicates(rows, db_path=tmp / "dedupe.db"), stats)
+                for chunk in _chunks(_iter_labeled(rows, label2id, stats), TOKENIZE_CHUNK_ROWS):
+                    encoded = tokenizer([text for text, _ in chunk], truncation=True, max_length=max_length,
+                                        return_attention_mask=True)
+                    lengths = np.fromiter((len(ids) for ids in encoded["input_ids"]), dtype=np.int64,
+                                          count=len(chunk))
+                    files["input_ids"].write(np.concatenate(
+                        [np.asarray(ids, dtype=np.int32) for ids in encoded["input_ids"]]).tobytes())
+                    files["attention_mask"].write(np.concatenate(
+                        [np.asarray(mask, dtype=np.uint8) for mask in encoded["attention_mask"]]).tobytes())
+                    files["offsets"].write((offset + np.cumsum(lengths)).tobytes())
+                    files["labels"].write(np.asarray([label for _, label in chunk], dtype=np.int64).tobytes())
+                    offset += int(lengths.sum())
+                    stats["rows"] += len(chunk)
+        finally:
+            for f in files.values():
+                f.close()
+        if os.path.exists(tmp / "dedupe.db"):
+            os.remove(tmp / "dedupe.db")
+
+        meta = {
+            "key": key,
+            "dataset": dataset_path.name,
+            "num_rows": stats["rows"],
+            "num_tokens": offset,
+            "max_length": max_length,
+            "dedupe": dedupe,
+            "label2id": label2id,
+            "tokenizer": tokenizer_fingerprint(tokenizer),
+            "removed_duplicates": stats["duplicates"],
+            "skipped_empty": stats["empty"],
+            "skipped_labels": stats["skipped_labels"],
+        }
+        with open(tmp / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        try:
+            os.replace(tmp, target)
+        except OSError:
+            # 并发构建时另一方已完成
+            shutil.rmtree(tmp, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return target, {**meta, "from_cache": False}
+
+
+def _non_empty(rows: Iterable[Dict], stats: Dict) -> Iterator[Dict]:
+    for row in rows:
+        if (row.get("text") or "").strip():
+            yield row
+        else:
+            stats["empty"] += 1
+
+
+def _drop_duplicates(marked: Iterator[Tuple[Dict, bool]], stats: Dict) -> Iterator[Dict]:
+    for row, duplicate in marked:
+        if duplicate:
+            stats["duplicates"] += 1
+        else:
+            yield row
+
+
+class TokenDataset(Dataset):
+    """内存映射的分词缓存；每个工作进程首次访问时各自打开 memmap。"""
+
+    def __init__(self, cache_path: Path):
+        self.cache_path = Path(cache_path)
+        with open(self.cache_path / "meta.json", "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self._arrays: Optional[Dict[str, np.ndarray]] = None
+
+    def _open(self) -> Dict[str, np.ndarray]:
+        if self._arrays is None:
+            self._arrays = {
+                name: np.memmap(self.cache_path / f"{name}.bin", dtype=dtype, mode="r")
+                if os.path.getsize(self.cache_path / f"{name}.bin") else np.zeros(0, dtype=dtype)
+                for name, dtype in _ARRAYS.items()
+            }
+        return self._arrays
+
+    def __getstate__(self):
+        # memmap 不随 DataLoader 工作进程序列化，由子进程重新打开
+        return {**self.__dict__, "_arrays": None}
+
+    def __len__(self) -> int:
+        return self.meta["num_rows"]
+
+    def lengths(self, indices: np.ndarray) -> np.ndarray:
+        """指定样本的 token 数（只读取对应的 offsets）。"""
+        offsets = self._open()["offsets"]
+        return offsets[indices + 1] - offsets[indices]
+
+    def __getitem__(self, index: int) -> Tuple[np.ndarray, np.ndarray, int]:
+        arrays = self._open()
+        start, end = int(arrays["offsets"][index]), int(arrays["offsets"][index + 1])
+        return (np.array(arrays["input_ids"][start:end]), np.array(arrays["attention_mask"][start:end]),
+                int(arrays["labels"][index]))
+
+
+class LengthBucketSampler(Sampler):
+    """按长度分桶的批采样器：打乱后每 pool_batches 批为一个样本池，池内按长度排序切批，批次顺序再打乱。
+
+    长度相近的样本同批，减少补齐；max_batch_tokens > 0 时批内 条数 × 最长长度 不超过该值。
+    批次逐池生成，同一时刻只保留一个样本池的批次（另有每条样本 8 字节的打乱顺序数组）。
+    """
+
+    def __init__(self, dataset: TokenDataset, batch_size: int, max_batch_tokens: int = 0,
+                 pool_batches: int = 50, shuffle: bool = True, seed: int = 0):
+        if batch_size < 1:
+            raise ValueError("batch_size must be >= 1")
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.pool_size = batch_size * pool_batches
+        self.shuffle = shuffle
+        self.seed = seed
+        self.epoch = 0
+        self._num_batches: Optional[Tuple[int, int]] = None
+
+    def set_epoch(self, epoch: int):
+        self.epoch = epoch
+
+    def _pools(self) -> Iterator[Tuple[np.ndarray, List[List[int]]]]:
+        n = len(self.dataset)
+        order = np.arange(n, dtype=np.int64)
+        if self.shuffle:
+            np.random.RandomState(self.seed + self.epoch).shuffle(order)
+        for start in range(0, n, self.pool_size):
+            pool = order[start:start + self.pool_size]
+            lengths = self.dataset.lengths(pool).tolist()
+            yield pool, length_buckets(lengths, self.batch_size, self.max_batch_tokens)
+
+    def __iter__(self) -> Iterator[List[int]]:
+        rng = random.Random(self.seed + self.epoch)
+        for pool, buckets in self._pools():
+            batches = [[int(pool[i]) for i in bucket] for bucket in buckets]
+            if self.shuffle:
+                rng.shuffle(batches)
+            yield from batches
+
+    def __len__(self) -> int:
+        if self.max_batch_tokens <= 0:
+            n = len(self.dataset)
+            full, rest = divmod(n, self.pool_size)
+            return full * -(-self.pool_size // self.batch_size) + -(-rest // self.batch_size)
+        # 有 token 上限时批数取决于各池的长度分布：逐池计数（不保留批次），每个 epoch 只算一次
+        if self._num_batches is None or self._num_batches[0] != self.epoch:
+            self._num_batches = (self.epoch, sum(len(buckets) for _, buckets in self._pools()))
+        return self._num_batches[1]
+
+
+def collate_tokens(batch: List[Tuple[np.ndarray, np.ndarray, int]], pad_token_id: int = 0) -> Dict[str, torch.Tensor]:
+    """将变长样本右侧补齐到批内最长长度。"""
+    longest = max((len(ids) for ids, _, _ in batch), default=0)
+    input_ids = torch.full((len(batch), longest), pad_token_id, dtype=torch.long)
+    attention_mask = torch.zeros((len(batch), longest), dtype=torch.long)
+    for i, (ids, mask, _) in enumerate(batch):
+        input_ids[i, :len(ids)] = torch.from_numpy(ids.astype(np.int64))
+        attention_mask[i, :len(mask)] = torch.from_numpy(mask.astype(np.int64))
+    labels = torch.tensor([label for _, _, label in batch], dtype=torch.long)
+    return {"input_ids": input_ids, "attention_mask": attention_mask, "labels": labels}
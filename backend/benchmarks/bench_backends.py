@@ -0,0 +1,75 @@
+"""
+推理后端基准
+对每个推理后端（eager / int8 / onnx）报告与 eager 的一致性、批量吞吐以及单条请求 p50 / p99 延迟
+
+用法 (在 backend 目录下):
+    python -m benchmarks.bench_backends --model ProsusAI/finbert --backends eager,int8,onnx
+"""
+import argparse
+import statistics
+import time
+
+import torch
+from transformers import AutoTokenizer, BertForSequenceClassification
+
+from app.services.inference_backends import EagerBackend, check_parity, create_backend
+from app.services.token_cache import length_buckets, pad_batch
+from benchmarks.bench_tokenizer import make_headlines
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inference backend benchmark")
+    parser.add_argument("--model", default="ProsusAI/finbert")
+    parser.add_argument("--backends", default="eager,int8,onnx")
+    parser.add_argument("--texts", type=int, default=512)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--latency-requests", type=int, default=100)
+    parser.add_argument("--threads", type=int, default=0, help="torch intra-op threads (0 = default)")
+    args = parser.parse_args()
+
+    if args.threads > 0:
+        torch.set_num_threads(args.threads)
+    tokenizer = AutoTokenizer.from_pretrained(args.model, use_fast=True)
+    model = BertForSequenceClassification.from_pretrained(args.model).eval()
+    eager = EagerBackend(model)
+
+    texts = make_headlines(args.texts)
+    ids = tokenizer(texts, truncation=True, max_length=512)["input_ids"]
+    batches = [pad_batch([ids[i] for i in bucket], tokenizer.pad_token_id or 0)
+               for bucket in length_buckets([len(r) for r in ids], args.batch_size)]
+    singles = [pad_batch([row]) for row in ids[:args.latency_requests]]
+    parity_inputs = pad_batch(ids[:16], tokenizer.pad_token_id or 0)
+
+    print(f"{'backend':<8} {'parity':>10} {'texts/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for name in args.backends.split(","):
+        try:
+            kwargs = {"intra_op_threads": args.threads} if name == "onnx" else {}
+            backend = eager if name == "eager" else create_backend(name, model, **kwargs)
+            diff = check_parity(backend, eager, parity_inputs, tolerance=float("inf"))
+        except Exception as e:
+            print(f"{name:<8} unavailable: {e}")
+            continue
+
+        backend.forward(batches[0])  # warm-up
+        start = time.perf_counter()
+        for batch in batches:
+            backend.forward(batch)
+        throughput = len(texts) / (time.perf_counter() - start)
+
+        latencies = []
+        for inputs in singles:
+            t0 = time.perf_counter()
+            backend.forward(inputs)
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+        print(f"{name:<8} {diff:>10.2e} {throughput:>10.1f} "
+              f"{statistics.median(latencies):>8.2f} {percentile(latencies, 99):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+HTML 提取吞吐微基准（离线）
+对保存的 HTML 页面分别运行各提取实现，输出 页/秒 与 MB/秒，并检查提取结果是否一致。
+文件名以 topic_ 开头的页面按列表页提取链接，其余按文章页提取正文。
+
+用法 (在 backend 目录下):
+    python -m benchmarks.bench_extraction --repeat 50
+    python -m benchmarks.bench_extraction --fixtures /path/to/saved/pages --parsers bs4,lxml
+"""
+import argparse
+import time
+from pathlib import Path
+
+from app.services.html_extract import get_extractor
+
+FIXTURE_DIR = Path(__file__).resolve().parent / "fixtures" / "html"
+PAGE_URL = "https://finance.yahoo.com/topic/stock-market-news/"
+
+
+def load_pages(directory: Path):
+    pages = []
+    for path in sorted(Path(directory).glob("*.htm*")):
+        pages.append((path.name, path.name.startswith("topic_"), path.read_text(encoding="utf-8", errors="replace")))
+    if not pages:
+        raise SystemExit(f"{directory} 中没有 .html 文件")
+    return pages
+
+
+def extract(extractor, page):
+    _, is_listing, html = page
+    if is_listing:
+        return extractor.extract_listing(html, PAGE_URL)
+    return extractor.extract_article(html)
+
+
+def bench(extractor, pages, repeat):
+    total_bytes = sum(len(html.encode("utf-8")) for _, _, html in pages) * repeat
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            extract(extractor, page)
+    elapsed = time.perf_counter() - start
+    print(f"{extractor.name:<8} {len(pages) * repeat / elapsed:>10,.1f} pages/s  "
+          f"{total_bytes / elapsed / 1e6:>8.2f} MB/s  ({elapsed * 1000:.1f} ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTML extraction throughput benchmark")
+    parser.add_argument("--fixtures", default=str(FIXTURE_DIR), help="保存的 HTML 页面目录")
+    parser.add_argument("--parsers", default="bs4,lxml")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    pages = load_pages(Path(args.fixtures))
+    extractors = [get_extractor(name) for name in args.parsers.split(",")]
+    print(f"{len(pages)} pages × {args.repeat}")
+
+    reference = [extract(extractors[0], page) for page in pages]
+    for extractor in extractors[1:]:
+        for page, expected in zip(pages, reference):
+            if extract(extractor, page) != expected:
+                print(f"⚠️  {extractor.name} 与 {extractors[0].name} 的提取结果不一致: {page[0]}")
+
+    for extractor in extractors:
+        bench(extractor, pages, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
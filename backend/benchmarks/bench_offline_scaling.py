@@ -0,0 +1,54 @@
+"""
+离线多进程分类扩展性基准
+生成一份合成新闻 CSV，分别以不同进程数运行 offline_classify，报告 行/秒 与相对单进程的加速比
+
+每个进程的 torch 线程数 = 可用核心数 / 进程数，单进程基线即一个进程使用全部核心。
+耗时包含各进程加载模型的时间，行数足够多时可忽略。
+
+用法 (在 backend 目录下):
+    python -m benchmarks.bench_offline_scaling --model ProsusAI/finbert --rows 20000 --workers 1,2,4,8,16,32
+"""
+import argparse
+import csv
+import os
+import tempfile
+
+from app.services.offline_classify import available_cpus, classify_file
+from benchmarks.bench_tokenizer import make_headlines
+
+
+def main():
+    cpus = available_cpus()
+    default_workers = ",".join(str(n) for n in (1, 2, 4, 8, 16, 32, 64) if n <= cpus)
+    parser = argparse.ArgumentParser(description="Offline classification scaling benchmark")
+    parser.add_argument("--model", default="ProsusAI/finbert")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--workers", default=default_workers)
+    parser.add_argument("--chunk-rows", type=int, default=256)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = os.path.join(tmp, "news.csv")
+        with open(input_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["text"])
+            writer.writerows([t] for t in make_headlines(args.rows))
+
+        print(f"{args.rows} rows, {cpus} cpus")
+        print(f"{'workers':>8} {'threads':>8} {'seconds':>9} {'rows/s':>10} {'speedup':>8}")
+        baseline = None
+        for n in (int(w) for w in args.workers.split(",")):
+            stats = classify_file(
+                input_path,
+                os.path.join(tmp, f"out_{n}.csv"),
+                workers=n,
+                chunk_rows=args.chunk_rows,
+                model_name=args.model,
+            )
+            baseline = baseline or stats["rows_per_sec"]
+            print(f"{n:>8} {stats['threads_per_worker']:>8} {stats['seconds']:>9.2f} "
+                  f"{stats['rows_per_sec']:>10.1f} {stats['rows_per_sec'] / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("bs4")
+
+# Adjust path to allow importing async_fetcher without installing package
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_APP_PATH = os.path.abspath(os.path.join(CURRENT_DIR, "..", "app"))
+if BACKEND_APP_PATH not in sys.path:
+    sys.path.append(BACKEND_APP_PATH)
+
+from services.async_fetcher import AsyncFetcher
+from services.crawl_index import CrawlIndex
+from services.crawler_service import CrawlerService
+
+ARTICLE_DELAY = 0.3
+BODY = "Shares of Example Corp rose sharply on Tuesday after quarterly earnings beat analyst estimates. " * 4
+
+
+def _article(n: int) -> str:
+    return (
+        f"<html><head><meta property='og:image' content='http://img/{n}.png'></head><body>"
+        f"<h1>Story {n}</h1><div class='caas-body'><p>{BODY}</p></div></body></html>"
+    )
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    hits = {}
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: str = "", headers=None):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        hits = _StubHandler.hits
+        hits[self.path] = hits.get(self.path, 0) + 1
+        if self.path == "/topic":
+            links = "".join(f"<a href='/news/story-{i}.html'>story {i}</a>" for i in range(6))
+            links += "<a href='/news/broken.html'>broken</a><a href='http://elsewhere.example/news/x'>x</a>"
+            self._send(200, f"<html><body>{links}</body></html>")
+        elif self.path.startswith("/news/story-"):
+            time.sleep(ARTICLE_DELAY)
+            self._send(200, _article(int(self.path.split("-")[1].split(".")[0])))
+        elif self.path == "/news/broken.html":
+            self._send(500)
+        elif self.path == "/flaky":
+            if hits[self.path] < 3:
+                self._send(503, headers={"Retry-After": "0"})
+            else:
+                self._send(200, "ok")
+        else:
+            self._send(404)
+
+
+@pytest.fixture
+def stub_server():
+    _StubHandler.hits = {}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_all_runs_concurrently_and_preserves_order(stub_server):
+    urls = [f"{stub_server}/news/story-{i}.html" for i in range(6)]
+
+    async def run():
+        async with AsyncFetcher(host_rps=0) as fetcher:
+            started = time.monotonic()
+            results = await fetcher.fetch_all(urls)
+            return results, time.monotonic() - started
+
+    results, elapsed = asyncio.run(run())
+    assert [r["url"] for r in results] == urls
+    assert all(r["status"] == 200 and "Story" in r["text"] for r in results)
+    assert elapsed < ARTICLE_DELAY * len(urls) / 2
+
+
+def test_retries_transient_errors(stub_server):
+    async def run():
+        async with AsyncFetcher(max_retries=3, backoff=0.01) as fetcher:
+            return await fetcher.fetch(f"{stub_server}/flaky"), fetcher.stats()
+
+    result, stats = asyncio.run(run())
+    assert result["status"] == 200 and result["text"] == "ok" and result["error"] is None
+    assert result["attempts"] == 3
+    assert stats["retries"] == 2 and stats["failures"] == 0
+
+
+def test_failure_is_reported_per_url(stub_server):
+    async def run():
+        async with AsyncFetcher(max_retries=1, backoff=0.01) as fetcher:
+            return await fetcher.fetch_all([f"{stub_server}/news/broken.html", "http://127.0.0.1:1/unreachable"])
+
+    broken, unreachable = asyncio.run(run())
+    assert broken["status"] == 500 and broken["error"] == "HTTP 500" and broken["attempts"] == 2
+    assert unreachable["status"] is None and unreachable["error"]
+
+
+def test_host_rate_limit_spaces_requests(stub_server):
+    async def run():
+        async with AsyncFetcher(host_rps=20, host_burst=1) as fetcher:
+            started = time.monotonic()
+            await fetcher.fetch_all([f"{stub_server}/missing-{i}" for i in range(5)])
+            return time.monotonic() - started
+
+    # 首个请求消耗初始令牌，其余 4 个请求间隔 1/20 秒
+    assert asyncio.run(run()) >= 4 / 20 * 0.9
+
+
+def test_crawler_skips_failed_articles(stub_server):
+    crawler = CrawlerService()
+    crawler.sources["yahoo"] = f"{stub_server}/topic"
+    crawler.crawl_index = CrawlIndex(":memory:")
+
+    async def run():
+        async with AsyncFetcher(host_rps=0, max_retries=0) as fetcher:
+            return await crawler.crawl_async("yahoo", dedup=False, max_articles=10, fetcher=fetcher)
+
+    headlines = asyncio.run(run())
+    assert sorted(h["text"].split(".")[0] for h in headlines) == [f"Story {i}" for i in range(6)]
+    assert all(h["image_url"].startswith("http://img/") for h in headlines)
+    assert "/news/x" not in _StubHandler.hits  # 其他主机的链接不抓取
@@ -0,0 +1,61 @@
+import asyncio
+import os
+import sys
+
+# Adjust path to allow importing batcher without installing package
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_APP_PATH = os.path.abspath(os.path.join(CURRENT_DIR, "..", "app"))
+if BACKEND_APP_PATH not in sys.path:
+    sys.path.append(BACKEND_APP_PATH)
+
+from services.batcher import MicroBatcher
+
+
+def test_concurrent_requests_merged_into_one_batch():
+    calls = []
+
+    def infer(items):
+        calls.append(list(items))
+        return [item * 10 for item in items]
+
+    async def main():
+        batcher = MicroBatcher(infer, max_batch_size=8, max_wait_ms=50)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(main())
+    assert results == [0, 10, 20, 30, 40]
+    assert len(calls) == 1
+
+
+def test_batch_flushed_when_full():
+    calls = []
+
+    def infer(items):
+        calls.append(len(items))
+        return list(items)
+
+    async def main():
+        batcher = MicroBatcher(infer, max_batch_size=3, max_wait_ms=1000)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(7)))
+        await batcher.stop()
+        return results
+
+    assert asyncio.run(main()) == list(range(7))
+    assert max(calls) <= 3
+    assert sum(calls) == 7
+
+
+def test_infer_error_propagates_to_every_caller():
+    def infer(items):
+        raise ValueError("boom")
+
+    async def main():
+        batcher = MicroBatcher(infer, max_batch_size=4, max_wait_ms=5)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, ValueError) for r in results)
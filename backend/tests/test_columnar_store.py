@@ -0,0 +1,84 @@
+import csv
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+# Adjust path to allow importing columnar_store without installing package
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_APP_PATH = os.path.abspath(os.path.join(CURRENT_DIR, "..", "app"))
+if BACKEND_APP_PATH not in sys.path:
+    sys.path.append(BACKEND_APP_PATH)
+
+from services.columnar_store import ColumnarStore
+
+
+def write_csv(path, n):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["text", "source", "label"])
+        for i in range(n):
+            writer.writerow([f"headline {i}\nsecond line", "test", "" if i % 3 else "positive"])
+
+
+@pytest.fixture
+def store(tmp_path):
+    write_csv(tmp_path / "news.csv", 25)
+    return ColumnarStore(tmp_path, tmp_path / "columnar", row_group_rows=4)
+
+
+def test_convert_caches_row_count_and_column_stats(store):
+    meta = store.convert("news.csv")
+
+    assert meta["num_rows"] == 25
+    assert meta["num_row_groups"] == 7
+    label = next(c for c in meta["columns"] if c["name"] == "label")
+    assert label["empty_count"] == 16
+    assert label["max_length"] == len("positive")
+    assert store.meta("news.csv") == meta
+
+
+def test_read_page_random_access_and_projection(store):
+    store.convert("news.csv")
+
+    page = store.read_page("news.csv", offset=9, limit=3)
+    assert [r["text"] for r in page] == [f"headline {i}\nsecond line" for i in (9, 10, 11)]
+    assert store.read_page("news.csv", offset=24, limit=5, columns=["label"]) == [{"label": "positive"}]
+    assert store.read_page("news.csv", offset=30, limit=5) == []
+    with pytest.raises(ValueError):
+        store.read_page("news.csv", columns=["missing"])
+
+
+def test_iter_rows_skips_and_rechunks(store):
+    store.convert("news.csv")
+
+    chunks = list(store.iter_rows("news.csv", skip_rows=10, chunk_rows=6))
+    assert [len(c) for c in chunks] == [6, 6, 3]
+    assert chunks[0][0]["text"].startswith("headline 10")
+
+
+def test_meta_is_stale_after_source_changes(store, tmp_path):
+    store.convert("news.csv")
+    with open(tmp_path / "news.csv", "a", encoding="utf-8") as f:
+        f.write("late row,test,\n")
+
+    assert store.meta("news.csv") is None
+    assert store.convert("news.csv")["num_rows"] == 26
+
+    store.remove("news.csv")
+    assert not store.parquet_path("news.csv").exists()
+
+
+def test_convert_utf8_bom_csv(tmp_path):
+    with open(tmp_path / "bom.csv", "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(["text", "label"])
+        writer.writerows([["stocks surge", "positive"], ["shares slide", "negative"]])
+    store = ColumnarStore(tmp_path, tmp_path / "columnar")
+
+    meta = store.convert("bom.csv")
+
+    assert [c["name"] for c in meta["columns"]] == ["text", "label"]
+    assert [r["text"] for r in store.read_page("bom.csv")] == ["stocks surge", "shares slide"]
@@ -0,0 +1,129 @@
+import asyncio
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("bs4")
+
+# Adjust path to allow importing crawl_index without installing package
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_APP_PATH = os.path.abspath(os.path.join(CURRENT_DIR, "..", "app"))
+if BACKEND_APP_PATH not in sys.path:
+    sys.path.append(BACKEND_APP_PATH)
+
+from services.async_fetcher import AsyncFetcher
+from services.crawl_index import CrawlIndex, content_hash
+from services.crawler_service import CrawlerService
+
+BODY = "Regional lenders rallied after the central bank signalled it would keep rates on hold for the quarter. " * 3
+
+
+class _Site:
+    """可变的站点内容：列表页分页，文章支持 ETag，其中 no-etag 文章不提供校验头。"""
+
+    def __init__(self):
+        self.pages = [["/news/a-1", "/news/a-2"], ["/news/a-3", "/news/no-etag"]]
+        self.versions = {}
+        self.hits = {}
+
+    def article(self, path):
+        version = self.versions.get(path, 1)
+        return f"<html><body><h1>{path} v{version}</h1><div class='caas-body'><p>{BODY}</p></div></body></html>", f'"{version}"'
+
+
+def _handler(site: _Site):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body="", etag=None):
+            data = body.encode("utf-8")
+            self.send_response(status)
+            if etag:
+                self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            site.hits[self.path] = site.hits.get(self.path, 0) + 1
+            if self.path.startswith("/topic"):
+                n = int(self.path.split("=")[1]) if "=" in self.path else 0
+                body = "".join(f"<a href='{link}'>x</a>" for link in site.pages[n])
+                if n + 1 < len(site.pages):
+                    body += f"<a rel='next' href='/topic?page={n + 1}'>more</a>"
+                etag = f'"{content_hash(body)[:16]}"'
+                if self.headers.get("If-None-Match") == etag:
+                    return self._send(304, etag=etag)
+                return self._send(200, body, etag)
+            body, etag = site.article(self.path)
+            if self.path == "/news/no-etag":
+                return self._send(200, body)
+            if self.headers.get("If-None-Match") == etag:
+                return self._send(304, etag=etag)
+            self._send(200, body, etag)
+
+    return Handler
+
+
+@pytest.fixture
+def site():
+    site = _Site()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(site))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    site.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield site
+    server.shutdown()
+    server.server_close()
+
+
+def _crawl(crawler, **kwargs):
+    async def run():
+        async with AsyncFetcher(host_rps=0, max_retries=0) as fetcher:
+            return await crawler.crawl_async("yahoo", dedup=False, fetcher=fetcher, **kwargs)
+    return sorted(h["text"].split(" v")[0] for h in asyncio.run(run()))
+
+
+def test_record_tracks_changes():
+    index = CrawlIndex(":memory:")
+    assert index.record("http://x/a", etag='"1"', text_hash="h1") is True
+    assert index.record("http://x/a", text_hash="h1") is False
+    assert index.record("http://x/a") is False  # 304：保留原有哈希与校验头
+    assert index.get("http://x/a")["etag"] == '"1"'
+    assert index.record("http://x/a", etag='"2"', text_hash="h2") is True
+    assert CrawlIndex.conditional_headers(index.get("http://x/a")) == {"If-None-Match": '"2"'}
+    assert set(index.get_many(["http://x/a", "http://x/b"])) == {"http://x/a"}
+
+
+def test_incremental_crawl_fetches_only_new_or_changed(site):
+    crawler = CrawlerService()
+    crawler.sources["yahoo"] = f"{site.url}/topic"
+    crawler.crawl_index = CrawlIndex(":memory:")
+
+    # 首次爬取沿 rel="next" 翻页，抓取全部文章（不受旧的 5 篇上限限制）
+    assert _crawl(crawler) == ["/news/a-1", "/news/a-2", "/news/a-3", "/news/no-etag"]
+
+    # 站点没有变化：列表页 304，不再抓取任何文章
+    hits_before = dict(site.hits)
+    assert _crawl(crawler) == []
+    assert site.hits["/topic"] == hits_before["/topic"] + 1
+    assert all(site.hits[p] == hits_before[p] for p in hits_before if p.startswith("/news/"))
+
+    # 新增文章并修改一篇旧文章：新文章直接抓取，旧文章条件请求，未变化的返回 304
+    site.pages[0].insert(0, "/news/b-1")
+    site.versions["/news/a-2"] = 2
+    assert _crawl(crawler) == ["/news/a-2", "/news/b-1"]
+    assert site.hits["/news/a-1"] == 2 and site.hits["/news/a-3"] == 1  # 第二页返回 304，其中的文章不再检查
+    assert site.hits["/news/no-etag"] == 1  # 无校验头的已爬取文章默认不重新抓取
+
+
+def test_non_incremental_crawl_ignores_index(site):
+    crawler = CrawlerService()
+    crawler.sources["yahoo"] = f"{site.url}/topic"
+    crawler.crawl_index = CrawlIndex(":memory:")
+    assert len(_crawl(crawler, max_articles=2)) == 2
+    assert len(_crawl(crawler, incremental=False)) == 4
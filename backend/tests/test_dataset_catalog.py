@@ -0,0 +1,84 @@
+import csv
+import hashlib
+import os
+import sys
+
+# Adjust path to allow importing dataset_catalog without installing package
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_APP_PATH = os.path.abspath(os.path.join(CURRENT_DIR, "..", "app"))
+if BACKEND_APP_PATH not in sys.path:
+    sys.path.append(BACKEND_APP_PATH)
+
+import pytest
+
+from services.dataset_catalog import DatasetCatalog, profile_csv
+
+
+def write_csv(path, labels):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["text", "label"])
+        for i, label in enumerate(labels):
+            writer.writerow([f"headline {i}, with comma\nand newline", label])
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    dataset_dir = tmp_path / "datasets"
+    dataset_dir.mkdir()
+    catalog = DatasetCatalog(tmp_path / "catalog.db", dataset_dir, reconcile_interval=3600)
+    yield catalog
+    catalog.close()
+
+
+def test_profile_csv_single_pass(tmp_path):
+    path = tmp_path / "a.csv"
+    write_csv(path, ["positive", "", "positive", "negative"])
+
+    profile = profile_csv(path)
+
+    assert profile["row_count"] == 4
+    assert profile["columns"] == ["text", "label"]
+    assert profile["content_hash"] == hashlib.sha256(path.read_bytes()).hexdigest()
+    assert profile["label_distribution"] == {"positive": 2, "": 1, "negative": 1}
+
+
+def test_refresh_profiles_and_remove(catalog):
+    write_csv(catalog.dataset_dir / "a.csv", ["positive"] * 3)
+
+    entry = catalog.refresh("a.csv")
+    assert entry["size"] > 0
+    catalog.profile_pending()
+    entry = catalog.get("a.csv")
+    assert entry["row_count"] == 3
+    assert entry["label_distribution"] == {"positive": 3}
+
+    os.remove(catalog.dataset_dir / "a.csv")
+    assert catalog.refresh("a.csv") is None
+    assert catalog.get("a.csv") is None
+
+
+def test_reconcile_and_sorted_pagination(catalog):
+    for i, name in enumerate(["a.csv", "b.csv", "c.csv"]):
+        write_csv(catalog.dataset_dir / name, ["x"] * (i + 1))
+        os.utime(catalog.dataset_dir / name, ns=(i * 10**9, i * 10**9))
+    (catalog.dataset_dir / "notes.txt").write_text("ignored")
+
+    items, total = catalog.list(limit=2)
+    assert total == 3
+    assert [i["filename"] for i in items] == ["c.csv", "b.csv"]
+    items, _ = catalog.list(limit=2, offset=2)
+    assert [i["filename"] for i in items] == ["a.csv"]
+
+    catalog.profile_pending()
+    items, _ = catalog.list(sort="row_count", descending=False)
+    assert [i["row_count"] for i in items] == [1, 2, 3]
+
+    # 文件系统变化在下一次对账时同步
+    os.remove(catalog.dataset_dir / "a.csv")
+    write_csv(catalog.dataset_dir / "d.csv", [])
+    catalog.reconcile()
+    assert sorted(i["filename"] for i in catalog.list(sort="filename")[0]) == ["b.csv", "c.csv", "d.csv"]
+
+    with pytest.raises(ValueError):
+        catalog.list(sort="bogus")
@@ -0,0 +1,161 @@
+import csv
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("numpy")
+
+# Adjust path to allow importing dataset_jobs without installing package
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_APP_PATH = os.path.abspath(os.path.join(CURRENT_DIR, "..", "app"))
+if BACKEND_APP_PATH not in sys.path:
+    sys.path.append(BACKEND_APP_PATH)
+
+from services.dataset_jobs import DatasetClassifyJob
+from services.inference_executor import InferenceExecutor
+
+
+class FakeService:
+    def __init__(self, on_call=None):
+        self.executor = InferenceExecutor(num_threads=1, max_pending=4)
+        self.calls = 0
+        self.on_call = on_call
+
+    def compute_logits(self, texts, use_cache=True):
+        self.calls += 1
+        if self.on_call:
+            self.on_call(self.calls)
+        return [[float(len(t) % 3), 0.5, -0.5] for t in texts]
+
+
+def write_dataset(path, n, encoding="utf-8"):
+    with open(path, "w", newline="", encoding=encoding) as f:
+        writer = csv.DictWriter(f, fieldnames=["text", "source", "label"])
+        writer.writeheader()
+        for i in range(n):
+            writer.writerow({"text": f"headline number {i}" if i % 7 else "", "source": "test", "label": ""})
+
+
+def read_output(job):
+    with open(job.output_path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def test_job_classifies_all_rows_in_chunks(tmp_path):
+    write_dataset(tmp_path / "news.csv", 25)
+    service = FakeService()
+    job = DatasetClassifyJob("news.csv", service, chunk_rows=10, dataset_dir=tmp_path, output_dir=tmp_path / "out")
+    job.start()
+    job.join(10)
+
+    assert job.status == "completed"
+    assert service.calls == 3
+    rows = read_output(job)
+    assert [r["text"] for r in rows] == [f"headline number {i}" if i % 7 else "" for i in range(25)]
+    assert rows[1]["market_direction"] in {"bullish", "bearish", "neutral"}
+    assert rows[0]["market_direction"] == ""  # empty text is passed through unclassified
+    assert not job.checkpoint_path.exists()
+    assert job.to_dict()["progress"] == 100.0
+
+
+def test_job_reads_utf8_bom_dataset(tmp_path):
+    write_dataset(tmp_path / "news.csv", 12, encoding="utf-8-sig")
+    job = DatasetClassifyJob("news.csv", FakeService(), chunk_rows=5, dataset_dir=tmp_path, output_dir=tmp_path / "out")
+    job.start()
+    job.join(10)
+
+    assert job.status == "completed", job.message
+    assert job.total_rows == 12
+    rows = read_output(job)
+    assert list(rows[0])[0] == "text"
+    assert rows[1]["market_direction"] in {"bullish", "bearish", "neutral"}
+
+
+def test_cancelled_job_resumes_from_checkpoint(tmp_path):
+    write_dataset(tmp_path / "news.csv", 25)
+    holder = {}
+
+    def cancel_after_second_chunk(calls):
+        if calls == 2:
+            holder["job"].cancel()
+
+    service = FakeService(on_call=cancel_after_second_chunk)
+    job = DatasetClassifyJob("news.csv", service, chunk_rows=10, dataset_dir=tmp_path, output_dir=tmp_path / "out")
+    holder["job"] = job
+    job.start()
+    job.join(10)
+    assert job.status == "cancelled"
+    assert job.rows_done == 20
+    assert job.checkpoint_path.exists()
+
+    resumed_service = FakeService()
+    resumed = DatasetClassifyJob("news.csv", resumed_service, chunk_rows=10, dataset_dir=tmp_path, output_dir=tmp_path / "out")
+    resumed.start()
+    resumed.join(10)
+    assert resumed.status == "completed"
+    assert resumed_service.calls == 1  # only the remaining chunk
+    rows = read_output(resumed)
+    assert len(rows) == 25
+    assert rows[-1]["text"] == "headline number 24"
+
+
+def test_job_reads_columnar_copy_when_fresh(tmp_path):
+    pytest.importorskip("pyarrow")
+    from services.columnar_store import ColumnarStore
+
+    write_dataset(tmp_path / "news.csv", 25)
+    store = ColumnarStore(tmp_path, tmp_path / "columnar", row_group_rows=8)
+    store.convert("news.csv")
+    service = FakeService()
+    job = DatasetClassifyJob("news.csv", service, chunk_rows=10, dataset_dir=tmp_path,
+                             output_dir=tmp_path / "out", columnar=store)
+    job.start()
+    job.join(10)
+
+    assert job.status == "completed"
+    assert job.total_rows == 25
+    assert [r["text"] for r in read_output(job)] == [f"headline number {i}" if i % 7 else "" for i in range(25)]
+
+
+def cancelled_job(tmp_path, temperature=1.2):
+    holder = {}
+
+    def cancel_after_first_chunk(calls):
+        holder["job"].cancel()
+
+    job = DatasetClassifyJob("news.csv", FakeService(on_call=cancel_after_first_chunk), temperature=temperature,
+                             chunk_rows=10, dataset_dir=tmp_path, output_dir=tmp_path / "out")
+    holder["job"] = job
+    job.start()
+    job.join(10)
+    assert job.status == "cancelled" and job.checkpoint_path.exists()
+    return job
+
+
+@pytest.mark.parametrize("change", ["replace_dataset", "temperature"])
+def test_stale_checkpoint_restarts_from_scratch(tmp_path, change):
+    write_dataset(tmp_path / "news.csv", 25)
+    cancelled_job(tmp_path)
+
+    temperature = 1.2
+    if change == "replace_dataset":
+        with open(tmp_path / "news.csv", "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=["text", "source", "label"])
+            writer.writeheader()
+            writer.writerows({"text": f"replaced {i}", "source": "new", "label": ""} for i in range(15))
+    else:
+        temperature = 2.0
+
+    service = FakeService()
+    job = DatasetClassifyJob("news.csv", service, temperature=temperature, chunk_rows=10, dataset_dir=tmp_path,
+                             output_dir=tmp_path / "out")
+    job.start()
+    job.join(10)
+    assert job.status == "completed"
+    rows = read_output(job)
+    if change == "replace_dataset":
+        assert service.calls == 2
+        assert [r["text"] for r in rows] == [f"replaced {i}" for i in range(15)]
+    else:
+        assert service.calls == 3 and len(rows) == 25
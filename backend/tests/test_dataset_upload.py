@@ -0,0 +1,95 @@
+import hashlib
+import os
+import sys
+
+# Adjust path to allow importing dataset_upload without installing package
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_APP_PATH = os.path.abspath(os.path.join(CURRENT_DIR, "..", "app"))
+if BACKEND_APP_PATH not in sys.path:
+    sys.path.append(BACKEND_APP_PATH)
+
+import pytest
+
+from services.dataset_catalog import DatasetCatalog, profile_csv
+from services.dataset_upload import DatasetUpload, InvalidDatasetError
+
+GOOD = (
+    'text,label\r\n'
+    '"利好消息: 股价上涨, 创新高",positive\r\n'
+    '"multi\nline ""quoted"" text",negative\r\n'
+    '\r\n'
+    'plain row,positive\r\n'
+).encode("utf-8")
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    catalog = DatasetCatalog(tmp_path / "catalog.db", tmp_path / "datasets", reconcile_interval=3600)
+    yield catalog
+    catalog.close()
+
+
+def upload(catalog, name, data, chunk=7):
+    job = DatasetUpload(name, catalog.dataset_dir, catalog=catalog)
+    for i in range(0, len(data), chunk):
+        job.feed(data[i:i + chunk])
+    return job.finish()
+
+
+def leftover_tmp(catalog):
+    return [p for p in os.listdir(catalog.dataset_dir) if p.endswith(".tmp")]
+
+
+def test_streamed_upload_counts_rows_and_labels(catalog):
+    result = upload(catalog, "news.csv", GOOD)
+
+    path = catalog.dataset_dir / "news.csv"
+    assert path.read_bytes() == GOOD
+    assert result["rows"] == 3
+    assert result["content_hash"] == hashlib.sha256(GOOD).hexdigest()
+    entry = catalog.get("news.csv")
+    assert entry["label_distribution"] == {"positive": 2, "negative": 1}
+    # 与目录后台计算的结果一致
+    profile = profile_csv(path)
+    assert (entry["row_count"], entry["columns"]) == (profile["row_count"], profile["columns"])
+    assert leftover_tmp(catalog) == []
+
+
+def test_identical_upload_is_stored_once(catalog):
+    upload(catalog, "news.csv", GOOD)
+    result = upload(catalog, "copy.csv", GOOD, chunk=1024)
+
+    assert result["duplicate_of"] == "news.csv"
+    assert result["filename"] == "news.csv"
+    assert not (catalog.dataset_dir / "copy.csv").exists()
+    assert leftover_tmp(catalog) == []
+
+
+def test_malformed_row_is_rejected_before_the_end(catalog):
+    data = b"text,label\nok,positive\nbad,row,extra\n" + b"more,positive\n" * 1000
+    job = DatasetUpload("bad.csv", catalog.dataset_dir, catalog=catalog)
+    with pytest.raises(InvalidDatasetError, match="第 3 行"):
+        for i in range(0, len(data), 64):
+            job.feed(data[i:i + 64])
+    assert i < 128
+    assert leftover_tmp(catalog) == []
+    assert not (catalog.dataset_dir / "bad.csv").exists()
+
+
+@pytest.mark.parametrize("data, message", [
+    (b"title,label\nx,y\n", "text"),
+    (b"text,text\nx,y\n", "重复"),
+    (b'text,label\n"unterminated,positive\n', "引号"),
+    (b"text,label\n\xff\xfe\n", "UTF-8"),
+    (b"", "为空"),
+])
+def test_invalid_content_is_rejected(catalog, data, message):
+    with pytest.raises(InvalidDatasetError, match=message):
+        upload(catalog, "bad.csv", data)
+    assert leftover_tmp(catalog) == []
+
+
+def test_filename_is_validated(catalog):
+    for name in ("../evil.csv", "data.txt", ".hidden.csv", None):
+        with pytest.raises(InvalidDatasetError):
+            DatasetUpload(name, catalog.dataset_dir)
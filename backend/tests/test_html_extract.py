@@ -0,0 +1,80 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("bs4")
+
+# Adjust path to allow importing html_extract without installing package
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_APP_PATH = os.path.abspath(os.path.join(CURRENT_DIR, "..", "app"))
+if BACKEND_APP_PATH not in sys.path:
+    sys.path.append(BACKEND_APP_PATH)
+
+from services.html_extract import SoupExtractor, get_extractor
+
+FIXTURE_DIR = Path(CURRENT_DIR).parent / "benchmarks" / "fixtures" / "html"
+PAGE_URL = "https://finance.yahoo.com/topic/stock-market-news/"
+
+ARTICLE = """<html><head><meta property="og:image" content="https://img/1.png"></head><body>
+<h1>Fed <em>holds</em> rates</h1><p>Outside the article body but long enough to count as a paragraph here.</p>
+<div class="caas-body wide"><p>First   paragraph.</p><p>Second <a href="/q">link</a> paragraph.</p></div>
+</body></html>"""
+FALLBACK = "<html><body><h1>T</h1><p>short</p><p>" + "long paragraph text " * 5 + "</p></body></html>"
+LISTING = """<html><head><link rel="next" href="?page=2"></head><body>
+<a href="/news/a.html">a</a><a href="/news/a.html">dup</a><a href="/about">nav</a>
+<a href="https://other.example.com/news/b.html">other host</a><a href="https://finance.yahoo.com/m/c">c</a>
+</body></html>"""
+
+
+@pytest.fixture(params=["bs4", "lxml"])
+def extractor(request):
+    if request.param == "lxml":
+        pytest.importorskip("lxml")
+    return get_extractor(request.param)
+
+
+def test_extract_article(extractor):
+    assert extractor.extract_article(ARTICLE) == {
+        "title": "Fedholdsrates",
+        "content": "First   paragraph. Secondlinkparagraph.",
+        "image_url": "https://img/1.png",
+    }
+    fallback = extractor.extract_article(FALLBACK)
+    assert fallback["content"] == ("long paragraph text " * 5).strip()
+    assert extractor.extract_article("") == {"title": "", "content": "", "image_url": ""}
+
+
+def test_extract_article_skips_script_and_style(extractor):
+    html = ("<html><body><h1>T<script>track()</script></h1><div class=\"caas-body\">"
+            "<p>Hello<b>world</b> a &amp; b<script>var x=1;</script></p>"
+            "<p>Before<style>p{color:red}</style><noscript>Enable JS</noscript>after</p>"
+            "<noscript><p>Please enable JavaScript</p></noscript></div></body></html>")
+    assert extractor.extract_article(html)["content"] == "Helloworlda & b Beforeafter"
+    assert extractor.extract_article(html)["title"] == "T"
+
+
+def test_extract_listing(extractor):
+    links, next_url = extractor.extract_listing(LISTING, PAGE_URL)
+    assert links == ["https://finance.yahoo.com/news/a.html", "https://finance.yahoo.com/m/c"]
+    assert next_url == PAGE_URL + "?page=2"
+
+
+def test_extractors_agree_on_saved_pages():
+    pytest.importorskip("lxml")
+    soup, fast = SoupExtractor(), get_extractor("lxml")
+    pages = sorted(FIXTURE_DIR.glob("*.html"))
+    assert pages
+    for path in pages:
+        html = path.read_text(encoding="utf-8")
+        if path.name.startswith("topic_"):
+            assert fast.extract_listing(html, PAGE_URL) == soup.extract_listing(html, PAGE_URL)
+            assert len(soup.extract_listing(html, PAGE_URL)[0]) > 100
+        else:
+            assert fast.extract_article(html) == soup.extract_article(html)
+
+
+def test_unknown_parser():
+    with pytest.raises(ValueError):
+        get_extractor("regex")
@@ -0,0 +1,150 @@
+import os
+import sys
+
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+# Adjust path to allow importing inference_backends without installing package
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_APP_PATH = os.path.abspath(os.path.join(CURRENT_DIR, "..", "app"))
+if BACKEND_APP_PATH not in sys.path:
+    sys.path.append(BACKEND_APP_PATH)
+
+from services import bert_service as bert_module
+from services.inference_backends import (
+    EagerBackend,
+    InferenceBackend,
+    OnnxBackend,
+    QuantizedBackend,
+    check_parity,
+    create_backend,
+)
+
+VOCAB = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "fed", "holds", "rates", "oil", "stocks", "rally", "slump"]
+
+
+@pytest.fixture(scope="module")
+def model():
+    # 随机初始化的小型 BERT，无需下载
+    torch.manual_seed(0)
+    config = transformers.BertConfig(vocab_size=len(VOCAB), hidden_size=32, num_hidden_layers=2,
+                                     num_attention_heads=2, intermediate_size=64, num_labels=3)
+    return transformers.BertForSequenceClassification(config).eval()
+
+
+@pytest.fixture
+def inputs():
+    input_ids = torch.tensor([[2, 5, 6, 7, 3, 0, 0], [2, 8, 11, 9, 10, 7, 3]])
+    return {"input_ids": input_ids, "attention_mask": (input_ids != 0).long()}
+
+
+class ShiftedBackend(InferenceBackend):
+    """在参考结果上叠加偏移，用于触发一致性校验失败。"""
+
+    name = "shifted"
+
+    def __init__(self, model, shift=5.0):
+        super().__init__(model)
+        self.shift = shift
+
+    def forward(self, inputs):
+        logits = EagerBackend(self.model).forward(inputs)
+        logits[:, 0] += self.shift
+        return logits
+
+
+def test_create_backend(model):
+    assert isinstance(create_backend("eager", model), EagerBackend)
+    assert isinstance(create_backend("int8", model), QuantizedBackend)
+    with pytest.raises(ValueError):
+        create_backend("tensorrt", model)
+
+
+def test_eager_backend_matches_model(model, inputs):
+    with torch.no_grad():
+        expected = model(**inputs).logits
+    logits = EagerBackend(model).forward(inputs)
+    assert logits.shape == (2, 3)
+    assert torch.equal(logits, expected)
+    assert check_parity(EagerBackend(model), EagerBackend(model), inputs) == 0.0
+
+
+def test_int8_backend_within_tolerance(model, inputs):
+    backend = create_backend("int8", model)
+    diff = check_parity(backend, EagerBackend(model), inputs)
+    assert 0.0 <= diff <= 0.05
+    # 量化不修改原模型
+    assert type(model.classifier) is torch.nn.Linear
+
+
+def test_onnx_backend_within_tolerance(model, inputs, tmp_path):
+    pytest.importorskip("onnx")
+    pytest.importorskip("onnxruntime")
+    backend = OnnxBackend(model, export_path=tmp_path / "model.onnx")
+    assert (tmp_path / "model.onnx").exists()
+    assert check_parity(backend, EagerBackend(model), inputs) <= 1e-4
+
+
+def test_onnx_export_uses_private_temp_file(model, inputs, tmp_path, monkeypatch):
+    pytest.importorskip("onnx")
+    pytest.importorskip("onnxruntime")
+    export_path = tmp_path / "model.onnx"
+    written = []
+    original = OnnxBackend._export
+
+    def record_export(self, path):
+        written.append(path)
+        # 导出期间目标文件仍是其他进程写了一半的内容，不应被读取
+        assert export_path.read_bytes() == b"partial file from another worker"
+        original(self, path)
+
+    monkeypatch.setattr(OnnxBackend, "_export", record_export)
+    backends = []
+    for _ in range(2):
+        export_path.write_bytes(b"partial file from another worker")
+        backends.append(OnnxBackend(model, export_path=export_path))
+
+    assert len(set(written)) == 2 and export_path not in written
+    assert all(check_parity(b, EagerBackend(model), inputs) <= 1e-4 for b in backends)
+    assert [p.name for p in tmp_path.iterdir()] == ["model.onnx"]
+
+
+def test_check_parity_rejects_divergent_backend(model, inputs):
+    with pytest.raises(ValueError):
+        check_parity(ShiftedBackend(model), EagerBackend(model), inputs, tolerance=1e-3)
+    assert check_parity(ShiftedBackend(model, shift=0.0), EagerBackend(model), inputs, tolerance=1e-6) == 0.0
+
+
+@pytest.fixture
+def service(model, tmp_path):
+    vocab = tmp_path / "vocab.txt"
+    vocab.write_text("\n".join(VOCAB) + "\n", encoding="utf-8")
+    service = bert_module.FinBERTService()
+    service.model = model
+    service.tokenizer = transformers.BertTokenizer(str(vocab))
+    return service
+
+
+@pytest.mark.parametrize("failure", ["unavailable", "parity"])
+def test_init_backend_falls_back_to_eager(service, monkeypatch, failure):
+    def fake_create_backend(name, model, **kwargs):
+        if failure == "unavailable":
+            raise RuntimeError("onnx 后端需要安装 onnxruntime")
+        return ShiftedBackend(model)
+
+    monkeypatch.setattr(bert_module, "create_backend", fake_create_backend)
+    service.backend_name = "onnx"
+    service._init_backend()
+    assert service.backend_name == "eager"
+    assert isinstance(service.backend, EagerBackend)
+    assert service.backend_parity_diff == 0.0
+
+
+def test_init_backend_uses_requested_backend(service):
+    service.backend_name = "int8"
+    service._init_backend()
+    assert service.backend_name == "int8"
+    assert isinstance(service.backend, QuantizedBackend)
+    assert 0.0 <= service.backend_parity_diff <= 0.05
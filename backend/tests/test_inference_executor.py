@@ -0,0 +1,43 @@
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+# Adjust path to allow importing inference_executor without installing package
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_APP_PATH = os.path.abspath(os.path.join(CURRENT_DIR, "..", "app"))
+if BACKEND_APP_PATH not in sys.path:
+    sys.path.append(BACKEND_APP_PATH)
+
+from services.inference_executor import InferenceExecutor, ServerBusyError
+
+
+def test_run_returns_result_and_records_stats():
+    executor = InferenceExecutor(num_threads=2, max_pending=4)
+    result = asyncio.run(executor.run(lambda a, b: a + b, 2, b=3))
+    executor.shutdown()
+    assert result == 5
+    stats = executor.stats()
+    assert stats["completed"] == 1
+    assert stats["queue_depth"] == 0
+    assert stats["running"] == 0
+
+
+def test_saturated_executor_rejects_with_retry_after():
+    executor = InferenceExecutor(num_threads=1, max_pending=2)
+    release = threading.Event()
+    futures = [executor.submit(release.wait) for _ in range(2)]
+
+    with pytest.raises(ServerBusyError) as exc_info:
+        executor.submit(release.wait)
+    assert exc_info.value.retry_after >= 1
+    assert executor.stats()["rejected"] == 1
+
+    release.set()
+    for future in futures:
+        future.result(timeout=5)
+    executor.shutdown()
+    # Capacity is released once the backlog drains
+    assert executor.stats()["queue_depth"] == 0
@@ -1,14 +1,17 @@
 import math
 import os
+import random
 import sys
 
+import pytest
+
 # Adjust path to allow importing label_mapper without installing package
 CURRENT_DIR = os.path.dirname(__file__)
 BACKEND_APP_PATH = os.path.abspath(os.path.join(CURRENT_DIR, "..", "app"))
 if BACKEND_APP_PATH not in sys.path:
     sys.path.append(BACKEND_APP_PATH)
 
-from services.label_mapper import map_finbert_logits_to_labels
+from services.label_mapper import map_finbert_logits_to_labels, map_finbert_logits_batch
 
 
 MARKET_DIRECTION_LABELS = {"bullish", "bearish", "neutral"}
@@ -86,3 +89,24 @@ def test_zero_logits_uniform_distribution():
     assert max(scores) - min(scores) < 1e-9
     # Sum of event type probabilities should be ~1
     assert abs(sum(scores) - 1.0) < 5e-6
+
+
+def test_batch_matches_scalar_path():
+    np = pytest.importorskip("numpy")
+    rng = random.Random(0)
+    rows = [[rng.gauss(0, 3) for _ in range(3)] for _ in range(500)]
+    # Exact ties and integer logits exercise the tie-breaking / boundary fallback
+    rows += [[0.0, 0.0, 0.0], [2.0, -3.0, 1.0], [1.0, 1.0, -1.0]]
+    rows += [[float(rng.randint(-3, 3)) for _ in range(3)] for _ in range(200)]
+    for temperature in (0.7, 1.2, 2.0):
+        for top_k in (1, 3, 4, 6):
+            expected = [map_finbert_logits_to_labels(r, top_k=top_k, temperature=temperature) for r in rows]
+            actual = map_finbert_logits_batch(np.array(rows), top_k=top_k, temperature=temperature)
+            assert actual == expected
+
+
+def test_batch_rejects_wrong_shape():
+    pytest.importorskip("numpy")
+    with pytest.raises(ValueError):
+        map_finbert_logits_batch([[1.0, 2.0]])
+    assert map_finbert_logits_batch([[0.1, 0.2, 0.3]])[0] == map_finbert_logits_to_labels([0.1, 0.2, 0.3])
@@ -0,0 +1,43 @@
+import os
+import sys
+
+import pytest
+
+# Adjust path to allow importing long_document without installing package
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_APP_PATH = os.path.abspath(os.path.join(CURRENT_DIR, "..", "app"))
+if BACKEND_APP_PATH not in sys.path:
+    sys.path.append(BACKEND_APP_PATH)
+
+from services.long_document import pool_logits, split_windows
+
+
+def test_windows_overlap_and_cover_whole_text():
+    windows = split_windows(list(range(1000)), cls_id=-1, sep_id=-2, max_length=512, overlap=64)
+    assert all(len(w) <= 512 and w[0] == -1 and w[-1] == -2 for w in windows)
+    assert windows[0][1] == 0
+    assert windows[-1][-2] == 999
+    # Consecutive windows share `overlap` tokens
+    assert windows[0][-2] - windows[1][1] + 1 == 64
+
+
+def test_window_count_is_capped():
+    windows = split_windows(list(range(20000)), cls_id=-1, sep_id=-2, max_windows=4)
+    assert len(windows) == 4
+    assert windows[0][1] == 0
+    assert windows[-1][-2] == 19999
+
+
+def test_short_text_is_single_window():
+    assert split_windows([7, 8, 9], cls_id=101, sep_id=102) == [[101, 7, 8, 9, 102]]
+
+
+def test_pooling_methods():
+    rows = [[1.0, 2.0, 3.0], [3.0, 0.0, 1.0]]
+    assert pool_logits(rows, "mean") == [2.0, 1.0, 2.0]
+    assert pool_logits(rows, "max") == [3.0, 2.0, 3.0]
+    attention = pool_logits([[4.0, 0.0, 0.0], [0.0, 1.0, 0.0]], "attention")
+    # The window with the stronger top logit dominates
+    assert attention[0] > 3.5
+    with pytest.raises(ValueError):
+        pool_logits(rows, "median")
@@ -0,0 +1,104 @@
+import csv
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("numpy")
+
+# Adjust path to allow importing near_duplicate without installing package
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_APP_PATH = os.path.abspath(os.path.join(CURRENT_DIR, "..", "app"))
+if BACKEND_APP_PATH not in sys.path:
+    sys.path.append(BACKEND_APP_PATH)
+
+from services.near_duplicate import MinHasher, NearDuplicateIndex, dedupe_csv, dedupe_rows, jaccard
+
+STORY = (
+    "Apple shares jump after record iPhone sales beat Wall Street expectations in the holiday quarter, "
+    "the company said on Thursday, as demand in China rebounded and services revenue hit a new high"
+)
+SYNDICATED = STORY.replace("jump", "jumped") + ". (Reuters)"
+UNRELATED = "Oil prices slide as OPEC signals output increase amid weak demand from China and rising US stockpiles"
+
+
+def test_signature_estimates_jaccard():
+    hasher = MinHasher()
+    assert jaccard(hasher.signature(STORY), hasher.signature(STORY)) == 1.0
+    assert jaccard(hasher.signature(STORY), hasher.signature("  " + STORY.upper() + "\n")) == 1.0
+    assert jaccard(hasher.signature(STORY), hasher.signature(SYNDICATED)) > 0.7
+    assert jaccard(hasher.signature(STORY), hasher.signature(UNRELATED)) < 0.2
+
+
+def test_index_is_incremental_and_persisted(tmp_path):
+    index = NearDuplicateIndex(tmp_path / "news.db")
+    assert index.check_and_add(STORY, payload={"source": "YAHOO"}) is None
+    assert index.check_and_add(UNRELATED) is None
+    match = index.check_and_add(SYNDICATED)
+    assert match["payload"] == {"source": "YAHOO"}
+    assert index.count() == 2
+    index.close()
+
+    reopened = NearDuplicateIndex(tmp_path / "news.db")
+    assert reopened.query(SYNDICATED)["payload"] == {"source": "YAHOO"}
+    assert reopened.query("Completely different text about central bank rate decisions") is None
+    # 相同 key 再次加入时只更新载荷
+    reopened.add(STORY, payload={"source": "CNBC"})
+    assert reopened.count() == 2
+    assert reopened.query(STORY)["payload"] == {"source": "CNBC"}
+    reopened.close()
+
+    # 数据库在首次访问时打开，参数不一致在首次访问时报错
+    mismatched = NearDuplicateIndex(tmp_path / "news.db", bands=16)
+    with pytest.raises(ValueError):
+        mismatched.count()
+
+
+def test_dedupe_rows_keeps_first_occurrence():
+    rows = [{"text": STORY}, {"text": UNRELATED}, {"text": SYNDICATED}, {"text": ""}, {"text": ""}]
+    kept, removed = dedupe_rows(rows)
+    assert removed == 1
+    assert [r["text"] for r in kept] == [STORY, UNRELATED, "", ""]
+
+
+def test_dedupe_csv(tmp_path):
+    source = tmp_path / "news.csv"
+    with open(source, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["text", "label"])
+        writer.writeheader()
+        writer.writerows([{"text": t, "label": "x"} for t in (STORY, SYNDICATED, UNRELATED, STORY)])
+
+    result = dedupe_csv(source, tmp_path / "news.dedup.csv")
+
+    assert result == {"rows": 4, "kept": 2, "removed": 2}
+    with open(tmp_path / "news.dedup.csv", newline="", encoding="utf-8") as f:
+        assert [r["text"] for r in csv.DictReader(f)] == [STORY, UNRELATED]
+
+
+def test_remove_forgets_item():
+    index = NearDuplicateIndex(":memory:")
+    assert index.check_and_add(STORY) is None
+    assert index.remove(STORY) is True
+    assert index.count() == 0 and index.query(SYNDICATED) is None
+    assert index.remove(STORY) is False
+    assert index.check_and_add(SYNDICATED) is None
+
+
+def test_remove_uses_item_index(tmp_path):
+    index = NearDuplicateIndex(tmp_path / "news.db")
+    index.add(STORY)
+    plan = index._conn.execute("EXPLAIN QUERY PLAN DELETE FROM bands WHERE item_id = ?", (1,)).fetchall()
+    assert any("idx_bands_item" in str(tuple(row)) for row in plan)
+    index.close()
+
+
+def test_dedupe_csv_reads_utf8_bom(tmp_path):
+    source = tmp_path / "news.csv"
+    with open(source, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.DictWriter(f, fieldnames=["text"])
+        writer.writeheader()
+        writer.writerows([{"text": STORY}, {"text": SYNDICATED}])
+
+    assert dedupe_csv(source, tmp_path / "news.dedup.csv") == {"rows": 2, "kept": 1, "removed": 1}
+    with open(tmp_path / "news.dedup.csv", newline="", encoding="utf-8") as f:
+        assert csv.DictReader(f).fieldnames == ["text"]
@@ -0,0 +1,165 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("bs4")
+
+# Adjust path to allow importing news_pipeline without installing package
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_APP_PATH = os.path.abspath(os.path.join(CURRENT_DIR, "..", "app"))
+if BACKEND_APP_PATH not in sys.path:
+    sys.path.append(BACKEND_APP_PATH)
+
+from services.crawler_service import CrawlerService
+from services.inference_executor import ServerBusyError
+from services.near_duplicate import NearDuplicateIndex
+from services.news_pipeline import NewsPipeline
+from services.record_store import RecordStore
+
+
+class FakeService:
+    """记录每批大小的假推理服务；前 busy 次调用返回 ServerBusyError，之后 fail 次调用抛出 RuntimeError。"""
+
+    def __init__(self, busy: int = 0, delay: float = 0.0, fail: int = 0):
+        self.batches = []
+        self.busy = busy
+        self.delay = delay
+        self.fail = fail
+
+    async def classify_documents_async(self, texts, temperature=1.2, top_k=5, pooling="mean"):
+        if self.busy:
+            self.busy -= 1
+            raise ServerBusyError("busy", retry_after=0)
+        if self.fail:
+            self.fail -= 1
+            raise RuntimeError("模型未加载")
+        await asyncio.sleep(self.delay)
+        self.batches.append(len(texts))
+        return [{
+            "classification": {"market_direction": "bullish", "event_type": "macro_policy",
+                               "impact_strength": "high", "risk_signal": "none"},
+            "top_k": [{"label": "macro_policy", "score": 0.9}],
+        } for _ in texts]
+
+
+def make_pipeline(tmp_path, sources, **kwargs):
+    crawler = CrawlerService()
+    # 默认阈值的临时索引：跨来源去重不应吞掉其他模拟来源的文章
+    crawler.near_dup = NearDuplicateIndex(":memory:")
+    store = RecordStore(db_path=tmp_path / "records.db", legacy_json_path=tmp_path / "records.json")
+    kwargs.setdefault("retry_backoff", 0.0)
+    return NewsPipeline(crawler, store, sources=sources, **kwargs), store
+
+
+def test_run_once_streams_mock_articles_into_store(tmp_path):
+    pipeline, store = make_pipeline(tmp_path, ["reuters", "cnbc", "bloomberg"], batch_size=4, batch_wait_ms=20)
+    service = FakeService(busy=1)
+
+    async def run():
+        pipeline.start(service, schedule=False)
+        enqueued = await pipeline.run_once()
+        await pipeline.drain()
+        stats = pipeline.stats()
+        # 同一来源再次爬取：全部为重复文章
+        again = await pipeline.run_once()
+        await pipeline.stop()
+        return enqueued, again, stats
+
+    enqueued, again, stats = asyncio.run(run())
+    assert enqueued == 15 and again == 0
+    assert store.count() == 15
+    assert max(service.batches) <= 4 and sum(service.batches) == 15
+    records = store.list_all()
+    assert {r["label"] for r in records} == {"macro_policy"}
+    assert records[0]["market_direction"] == "bullish"
+    assert stats["stages"]["crawl"]["items"] == 15
+    assert stats["stages"]["classify"]["items"] == 15 and stats["stages"]["classify"]["errors"] == 0
+    assert stats["stages"]["store"]["items"] == 15 and stats["stages"]["store"]["backlog"] == 0
+    assert stats["latency_seconds"]["max"] is not None
+    assert not pipeline.stats()["running"]
+
+
+def test_bounded_queue_applies_backpressure(tmp_path):
+    pipeline, store = make_pipeline(tmp_path, ["bloomberg"], queue_max=1, batch_size=1, batch_wait_ms=0)
+    service = FakeService(delay=0.02)
+
+    async def run():
+        pipeline.start(service, schedule=False)
+        crawl = asyncio.ensure_future(pipeline.run_once())
+        backlogs = []
+        while not crawl.done():
+            backlogs.append(pipeline.stats()["stages"]["classify"]["backlog"])
+            await asyncio.sleep(0.005)
+        await pipeline.stop()
+        return crawl.result(), backlogs
+
+    enqueued, backlogs = asyncio.run(run())
+    assert enqueued == 5
+    assert max(backlogs) <= 1
+    assert store.count() == 5
+
+
+def test_scheduler_runs_cycles_until_stopped(tmp_path):
+    pipeline, store = make_pipeline(tmp_path, ["reuters"], interval=0.05, batch_wait_ms=10)
+
+    async def run():
+        pipeline.start(FakeService())
+        while pipeline.cycles < 3:
+            await asyncio.sleep(0.01)
+        await pipeline.stop()
+
+    asyncio.run(run())
+    assert store.count() == 5
+    assert not pipeline.stats()["scheduled"]
+
+
+def test_transient_classify_failure_is_retried(tmp_path):
+    pipeline, store = make_pipeline(tmp_path, ["reuters"], batch_size=8, max_retries=2)
+
+    async def run():
+        pipeline.start(FakeService(fail=2), schedule=False)
+        await pipeline.run_once()
+        await pipeline.stop()
+
+    asyncio.run(run())
+    assert store.count() == 5
+    assert pipeline.stats()["stages"]["classify"]["errors"] == 2
+    assert pipeline.released == 0
+
+
+def test_failed_articles_are_released_for_recrawl(tmp_path):
+    pipeline, store = make_pipeline(tmp_path, ["reuters"], batch_size=8, max_retries=1)
+
+    async def run():
+        pipeline.start(FakeService(fail=2), schedule=False)
+        first = await pipeline.run_once()
+        await pipeline.drain()
+        # 分类失败的文章未被标记为已爬取，再次爬取时重新入队并入库
+        second = await pipeline.run_once()
+        await pipeline.stop()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == 5 and second == 5
+    assert pipeline.released == 5
+    assert store.count() == 5
+
+
+def test_stop_releases_unprocessed_articles(tmp_path):
+    pipeline, store = make_pipeline(tmp_path, ["reuters"], batch_size=1, batch_wait_ms=0)
+
+    async def run():
+        pipeline.start(FakeService(delay=0.2), schedule=False)
+        await pipeline.run_once()
+        await pipeline.stop(drain_timeout=0.05)
+        pipeline.start(FakeService(), schedule=False)
+        again = await pipeline.run_once()
+        await pipeline.stop()
+        return again
+
+    again = asyncio.run(run())
+    assert pipeline.released == 5
+    assert again == 5 and store.count() == 5
@@ -0,0 +1,122 @@
+import csv
+import json
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("numpy")
+
+# Adjust path to allow importing offline_classify without installing package
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_APP_PATH = os.path.abspath(os.path.join(CURRENT_DIR, "..", "app"))
+if BACKEND_APP_PATH not in sys.path:
+    sys.path.append(BACKEND_APP_PATH)
+
+from services import offline_classify
+
+
+class FakeService:
+    def __init__(self):
+        self.batches = []
+
+    def compute_logits(self, texts, use_cache=True):
+        self.batches.append(len(texts))
+        return [[1.0, 0.0, -1.0] if "surge" in t else [-1.0, 1.0, 0.0] for t in texts]
+
+
+@pytest.fixture
+def fake_service(monkeypatch):
+    service = FakeService()
+    monkeypatch.setattr(offline_classify, "_service", service)
+    return service
+
+
+def test_iter_chunks_keeps_order_and_remainder():
+    chunks = list(offline_classify.iter_chunks(iter(range(7)), 3))
+    assert chunks == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_csv_roundtrip_in_input_order(tmp_path, fake_service):
+    src = tmp_path / "news.csv"
+    with open(src, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "text"])
+        for i in range(10):
+            writer.writerow([i, f"stocks surge {i}" if i % 2 else f"shares slide {i}"])
+
+    stats = offline_classify.classify_file(src, tmp_path / "out.csv", workers=1, chunk_rows=4)
+
+    assert stats["rows"] == 10
+    assert fake_service.batches == [4, 4, 2]
+    with open(tmp_path / "out.csv", newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [r["id"] for r in rows] == [str(i) for i in range(10)]
+    assert rows[1]["market_direction"] != rows[0]["market_direction"]
+    assert float(rows[0]["event_score"]) > 0
+
+
+def test_jsonl_custom_text_field(tmp_path, fake_service):
+    src = tmp_path / "news.jsonl"
+    src.write_text(
+        "\n".join(json.dumps({"headline": h}) for h in ["stocks surge", "", "bank default"]) + "\n",
+        encoding="utf-8",
+    )
+
+    offline_classify.classify_file(src, tmp_path / "out.jsonl", workers=1, text_field="headline")
+
+    rows = [json.loads(line) for line in (tmp_path / "out.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert [r["headline"] for r in rows] == ["stocks surge", "", "bank default"]
+    assert "market_direction" not in rows[1]
+    assert rows[0]["logit_positive"] == 1.0
+
+
+def test_init_worker_applies_per_worker_threads_after_service_import(monkeypatch):
+    events = []
+
+    class LoadableService:
+        model_name = "base"
+        torch_threads = 8  # 构造时按 FINBERT_TORCH_THREADS 设置的值
+
+        def load_model(self):
+            events.append(("load", self.model_name, self.torch_threads))
+
+    fake_module = type(sys)("services.bert_service")
+    fake_module.bert_service = LoadableService()
+    monkeypatch.setitem(sys.modules, "services.bert_service", fake_module)
+    monkeypatch.setattr(offline_classify, "_service", None)
+    monkeypatch.setattr(offline_classify, "configure_torch_threads", lambda intra, inter: events.append(("threads", intra, inter)))
+
+    offline_classify._init_worker("tuned", 2, 1.0, "text")
+
+    assert events == [("threads", 2, 1), ("load", "tuned", 2)]
+    assert offline_classify._service is fake_module.bert_service
+
+
+def test_annotate_rows_coerces_non_string_text():
+    seen = []
+
+    def infer(texts):
+        seen.extend(texts)
+        return [[1.0, 0.0, -1.0]] * len(texts)
+
+    rows = [{"text": 12345}, {"text": None}, {"text": "stocks surge"}, {}]
+    offline_classify.annotate_rows(rows, infer)
+
+    assert seen == ["12345", "stocks surge"]
+    assert "market_direction" in rows[0] and "market_direction" not in rows[1]
+
+
+def test_csv_with_utf8_bom(tmp_path, fake_service):
+    src = tmp_path / "news.csv"
+    with open(src, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(["text", "id"])
+        writer.writerows([["stocks surge", 1], ["shares slide", 2]])
+
+    stats = offline_classify.classify_file(src, tmp_path / "out.csv", workers=1)
+
+    assert stats["rows"] == 2 and fake_service.batches == [2]
+    with open(tmp_path / "out.csv", newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert rows[0]["text"] == "stocks surge" and rows[0]["market_direction"]
@@ -0,0 +1,111 @@
+import json
+import os
+import sys
+
+# Adjust path to allow importing record_store without installing package
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_APP_PATH = os.path.abspath(os.path.join(CURRENT_DIR, "..", "app"))
+if BACKEND_APP_PATH not in sys.path:
+    sys.path.append(BACKEND_APP_PATH)
+
+from services.record_store import RecordStore
+
+
+def make_store(tmp_path, legacy=None):
+    legacy_path = tmp_path / "records.json"
+    if legacy is not None:
+        legacy_path.write_text(json.dumps(legacy), encoding="utf-8")
+    return RecordStore(db_path=tmp_path / "records.db", legacy_json_path=legacy_path)
+
+
+def test_add_list_delete(tmp_path):
+    store = make_store(tmp_path)
+    first = store.add("Fed holds rates", "neutral", 0.8)
+    second = store.add("Bank defaults", "bearish", 0.9)
+    assert [r["id"] for r in store.list_all()] == [second["id"], first["id"]]
+    assert store.delete(first["id"]) is True
+    assert store.delete(first["id"]) is False
+    assert store.count() == 1
+    store.close()
+
+
+def test_legacy_json_is_migrated_once(tmp_path):
+    legacy = [
+        {"id": "b", "text": "newer", "label": "bullish", "confidence": 0.7, "timestamp": "2024-01-02T00:00:00"},
+        {"id": "a", "text": "older", "label": "bearish", "confidence": 0.6, "timestamp": "2024-01-01T00:00:00"},
+    ]
+    store = make_store(tmp_path, legacy)
+    # 构造时不访问磁盘，迁移由服务启动时显式执行
+    assert not (tmp_path / "records.db").exists()
+    assert (tmp_path / "records.json").exists()
+    assert store.migrate_legacy_json() == 2
+    assert [r["id"] for r in store.list_all()] == ["b", "a"]
+    assert not (tmp_path / "records.json").exists()
+    assert (tmp_path / "records.json.migrated").exists()
+    store.close()
+
+    reopened = make_store(tmp_path)
+    assert reopened.migrate_legacy_json() == 0
+    assert reopened.count() == 2
+    reopened.close()
+
+
+def test_corrupt_legacy_json_is_kept_aside(tmp_path):
+    (tmp_path / "records.json").write_text('[{"id": "a", "text": "trunc', encoding="utf-8")
+    store = make_store(tmp_path)
+    assert store.migrate_legacy_json() == 0
+    assert store.count() == 0
+    assert not (tmp_path / "records.json.migrated").exists()
+    assert (tmp_path / "records.json.corrupt").read_text(encoding="utf-8") == '[{"id": "a", "text": "trunc'
+    store.close()
+
+
+def test_keyset_pagination_and_filters(tmp_path):
+    store = make_store(tmp_path)
+    store.add_many([
+        {"id": f"r{i:02d}", "text": f"headline {i} {'default' if i % 3 == 0 else 'rally'}",
+         "label": "bearish" if i % 2 else "bullish", "confidence": i / 20,
+         "timestamp": f"2024-01-{i + 1:02d}T00:00:00"}
+        for i in range(20)
+    ])
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = store.query(limit=6, cursor=cursor)
+        seen.extend(r["id"] for r in page)
+        if cursor is None:
+            break
+    assert seen == [f"r{i:02d}" for i in reversed(range(20))]
+
+    page, _ = store.query(label="bearish", min_confidence=0.5, text="DEFAULT")
+    assert [r["id"] for r in page] == ["r15"]
+
+    page, _ = store.query(since="2024-01-03T00:00:00", until="2024-01-05T00:00:00")
+    assert [r["id"] for r in page] == ["r03", "r02"]
+    store.close()
+
+
+def test_full_text_search_with_taxonomy_filters(tmp_path):
+    from services.record_store import make_record
+
+    store = make_store(tmp_path)
+    bearish_risk = {"market_direction": "bearish", "event_type": "risk_warning",
+                    "impact_strength": "high", "risk_signal": "default_risk"}
+    bullish = {"market_direction": "bullish", "event_type": "financial_report",
+               "impact_strength": "medium", "risk_signal": "none"}
+    a = make_record("Evergrande misses bond payment, default looms", "risk_warning", 0.9, bearish_risk)
+    b = make_record("Analysts see default risk fading as earnings beat", "financial_report", 0.6, bullish)
+    c = make_record("Default swaps widen; default fears spread to lenders", "risk_warning", 0.8, bearish_risk)
+    store.add_many([a, b, c])
+
+    hits = store.search("default", market_direction="bearish", event_type="risk_warning")
+    assert {h["id"] for h in hits} == {a["id"], c["id"]}
+    # More occurrences rank higher
+    assert hits[0]["id"] == c["id"]
+
+    # Index follows deletes incrementally
+    store.delete(c["id"])
+    assert [h["id"] for h in store.search("default", market_direction="bearish")] == [a["id"]]
+    # User input is not parsed as FTS syntax
+    assert store.search('default" OR "x') == []
+    store.close()
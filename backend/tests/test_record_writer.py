@@ -0,0 +1,49 @@
+import os
+import sys
+import time
+
+# Adjust path to allow importing record_writer without installing package
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_APP_PATH = os.path.abspath(os.path.join(CURRENT_DIR, "..", "app"))
+if BACKEND_APP_PATH not in sys.path:
+    sys.path.append(BACKEND_APP_PATH)
+
+from services.record_store import RecordStore, make_record
+from services.record_writer import RecordWriter
+
+
+def make_store(tmp_path):
+    return RecordStore(db_path=tmp_path / "records.db", legacy_json_path=tmp_path / "records.json")
+
+
+def test_flush_by_size_and_on_stop(tmp_path):
+    store = make_store(tmp_path)
+    writer = RecordWriter(store, max_buffer=100, flush_size=3, flush_interval=60)
+    writer.submit_many([make_record(f"t{i}", "macro_policy", 0.5) for i in range(2)])
+    time.sleep(0.05)
+    assert store.count() == 0  # below flush_size and interval not reached
+
+    writer.submit(make_record("t2", "macro_policy", 0.5))
+    deadline = time.time() + 5
+    while store.count() < 3 and time.time() < deadline:
+        time.sleep(0.01)
+    assert store.count() == 3
+
+    writer.submit(make_record("t3", "macro_policy", 0.5))
+    writer.stop()
+    assert store.count() == 4
+    stats = writer.stats()
+    assert stats["written"] == 4
+    assert stats["buffered"] == 0
+    store.close()
+
+
+def test_full_buffer_drops_and_counts(tmp_path):
+    store = make_store(tmp_path)
+    writer = RecordWriter(store, max_buffer=2, flush_size=10, flush_interval=60)
+    accepted = writer.submit_many([make_record(f"t{i}", "risk_warning", 0.9) for i in range(5)])
+    assert accepted == 2
+    assert writer.stats()["dropped"] == 3
+    writer.stop()
+    assert store.count() == 2
+    store.close()
@@ -0,0 +1,71 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# Adjust path to allow importing the API package (app.api.records) without installing package
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_PATH = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if BACKEND_PATH not in sys.path:
+    sys.path.append(BACKEND_PATH)
+
+from app.api import records
+from app.services.record_store import RecordStore
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    store = RecordStore(db_path=tmp_path / "records.db", legacy_json_path=tmp_path / "records.json")
+    monkeypatch.setattr(records, "record_store", store)
+    app = FastAPI()
+    app.include_router(records.router, prefix="/api")
+    yield TestClient(app)
+    store.close()
+
+
+def test_posted_taxonomy_fields_are_stored_and_filterable(client):
+    body = {
+        "text": "Fed signals rate cuts as inflation cools",
+        "label": "macro_policy",
+        "confidence": 0.91,
+        "market_direction": "bullish",
+        "event_type": "macro_policy",
+        "impact_strength": "high",
+        "risk_signal": "none",
+    }
+    created = client.post("/api/records", json=body).json()
+    assert created["id"] and created["timestamp"]
+    assert {k: created[k] for k in body} == body
+
+    client.post("/api/records", json={"text": "Plain record", "label": "other", "confidence": 0.5})
+    listed = client.get("/api/records").json()
+    assert [r["market_direction"] for r in listed] == [None, "bullish"]
+
+    found = client.get("/api/records/search", params={"q": "inflation", "market_direction": "bullish"}).json()
+    assert [r["id"] for r in found] == [created["id"]]
+    assert client.get("/api/records/search", params={"q": "inflation", "market_direction": "bearish"}).json() == []
+
+
+def test_store_calls_run_off_the_event_loop(client, monkeypatch):
+    loops = []
+    add = records.record_store.add
+
+    def add_and_check_loop(*args, **kwargs):
+        try:
+            loops.append(asyncio.get_running_loop())
+        except RuntimeError:
+            loops.append(None)
+        return add(*args, **kwargs)
+
+    monkeypatch.setattr(records.record_store, "add", add_and_check_loop)
+    response = client.post("/api/records", json={"text": "Oil slides", "label": "commodity", "confidence": 0.7})
+
+    assert response.status_code == 200
+    assert loops == [None]  # 在线程池中执行，而非事件循环线程
@@ -0,0 +1,60 @@
+import os
+import sys
+import time
+
+import pytest
+
+# Adjust path to allow importing result_cache without installing package
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_APP_PATH = os.path.abspath(os.path.join(CURRENT_DIR, "..", "app"))
+if BACKEND_APP_PATH not in sys.path:
+    sys.path.append(BACKEND_APP_PATH)
+
+from services.result_cache import LogitsCache, text_key
+
+
+def test_key_ignores_whitespace_but_not_model_version():
+    assert text_key("Fed  holds rates\n", "v1") == text_key(" Fed holds rates", "v1")
+    assert text_key("Fed holds rates", "v1") != text_key("Fed holds rates", "v2")
+
+
+def test_lru_eviction_and_counters():
+    cache = LogitsCache(max_entries=2)
+    cache.put("a", [1.0, 2.0, 3.0])
+    cache.put("b", [4.0, 5.0, 6.0])
+    assert cache.get("a") == [1.0, 2.0, 3.0]  # "a" becomes most recent
+    cache.put("c", [7.0, 8.0, 9.0])
+    assert cache.get("b") is None
+    assert cache.get("c") == [7.0, 8.0, 9.0]
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+    assert stats["entries"] == 2
+
+
+def test_ttl_expiry_and_disabled_cache():
+    cache = LogitsCache(max_entries=4, ttl_seconds=0.01)
+    cache.put("a", [0.0, 0.0, 0.0])
+    time.sleep(0.02)
+    assert cache.get("a") is None
+
+    disabled = LogitsCache(max_entries=0)
+    disabled.put("a", [0.0, 0.0, 0.0])
+    assert disabled.get("a") is None
+    assert len(disabled) == 0
+
+
+def test_weights_fingerprint_is_stable_and_tracks_weights():
+    torch = pytest.importorskip("torch")
+    from services.result_cache import weights_fingerprint
+
+    def build():
+        torch.manual_seed(0)
+        return torch.nn.Sequential(torch.nn.Linear(4, 3), torch.nn.Linear(3, 2))
+
+    model = build()
+    assert weights_fingerprint(model) == weights_fingerprint(build())
+    with torch.no_grad():
+        model[1].bias[0] += 1e-3
+    assert weights_fingerprint(model) != weights_fingerprint(build())
@@ -0,0 +1,82 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+
+# Adjust path to allow importing single_flight without installing package
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_APP_PATH = os.path.abspath(os.path.join(CURRENT_DIR, "..", "app"))
+if BACKEND_APP_PATH not in sys.path:
+    sys.path.append(BACKEND_APP_PATH)
+
+from services.single_flight import SingleFlight
+
+
+def test_concurrent_async_callers_share_one_computation():
+    flight = SingleFlight()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return [1.0, 2.0, 3.0]
+
+    async def main():
+        return await asyncio.gather(*(flight.do_async("k", compute) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert results == [[1.0, 2.0, 3.0]] * 5
+    assert len(calls) == 1
+    assert flight.stats() == {"in_flight": 0, "leaders": 1, "coalesced": 4}
+
+
+def test_sync_callers_share_one_computation_and_errors():
+    flight = SingleFlight()
+    calls = []
+    results = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return "logits"
+
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", compute))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == ["logits"] * 4
+    assert len(calls) == 1
+
+    def fail():
+        raise ValueError("boom")
+
+    try:
+        flight.do("k", fail)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError")
+    # A finished key starts a fresh computation
+    assert flight.do("k", lambda: "again") == "again"
+
+
+def test_cancelling_one_async_waiter_does_not_affect_others():
+    flight = SingleFlight()
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return "logits"
+
+    async def main():
+        waiters = [asyncio.ensure_future(flight.do_async("k", compute)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        waiters[0].cancel()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        return results
+
+    results = asyncio.run(main())
+    assert isinstance(results[0], asyncio.CancelledError)
+    assert results[1:] == ["logits", "logits"]
+    assert flight.in_flight() == 0
@@ -0,0 +1,51 @@
+import os
+import sys
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+# Adjust path to allow importing token_cache without installing package
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_APP_PATH = os.path.abspath(os.path.join(CURRENT_DIR, "..", "app"))
+if BACKEND_APP_PATH not in sys.path:
+    sys.path.append(BACKEND_APP_PATH)
+
+from services.token_cache import TokenizationCache
+
+
+class FakeTokenizer:
+    pad_token_id = 0
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts, padding=False, truncation=True, max_length=512):
+        self.calls.append(list(texts))
+        return {"input_ids": [[101] + [len(w) for w in t.split()][:max_length - 2] + [102] for t in texts]}
+
+
+def test_encode_pads_to_longest_and_masks():
+    tokenizer = FakeTokenizer()
+    cache = TokenizationCache(max_entries=10)
+    batch = cache.encode(tokenizer, ["bank rate hike", "fed"])
+    assert batch["input_ids"].tolist() == [[101, 4, 4, 4, 102], [101, 3, 102, 0, 0]]
+    assert batch["attention_mask"].tolist() == [[1, 1, 1, 1, 1], [1, 1, 1, 0, 0]]
+
+
+def test_cached_texts_are_not_tokenized_again():
+    tokenizer = FakeTokenizer()
+    cache = TokenizationCache(max_entries=10)
+    cache.encode_ids(tokenizer, ["bank rate hike", "fed"])
+    cache.encode_ids(tokenizer, ["bank  rate hike ", "stocks surge"])
+    assert tokenizer.calls == [["bank rate hike", "fed"], ["stocks surge"]]
+    assert cache.stats()["hits"] == 1
+
+
+def test_length_buckets_group_similar_lengths_and_respect_limits():
+    from services.token_cache import length_buckets
+
+    lengths = [300, 10, 12, 500, 11, 290]
+    buckets = length_buckets(lengths, max_batch_size=3, max_batch_tokens=700)
+    assert buckets == [[1, 4, 2], [5, 0], [3]]
+    assert sorted(i for b in buckets for i in b) == list(range(len(lengths)))
@@ -0,0 +1,167 @@
+import csv
+import os
+import sys
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+
+# Adjust path to allow importing token_dataset without installing package
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_APP_PATH = os.path.abspath(os.path.join(CURRENT_DIR, "..", "app"))
+if BACKEND_APP_PATH not in sys.path:
+    sys.path.append(BACKEND_APP_PATH)
+
+from services import token_dataset
+from services.token_dataset import (
+    LengthBucketSampler,
+    TokenDataset,
+    build_token_cache,
+    collate_tokens,
+    resolve_label,
+)
+
+LABEL2ID = {"positive": 0, "negative": 1, "neutral": 2}
+
+
+class FakeTokenizer:
+    """按空格切词的假分词器：每个词映射为其长度 + 1，首尾加 101 / 102。"""
+
+    name_or_path = "fake"
+
+    def __init__(self):
+        self.calls = 0
+
+    def __len__(self):
+        return 200
+
+    def __call__(self, texts, truncation=True, max_length=512, return_attention_mask=True):
+        self.calls += 1
+        ids = [([101] + [len(w) + 1 for w in text.split()] + [102])[:max_length] for text in texts]
+        return {"input_ids": ids, "attention_mask": [[1] * len(x) for x in ids]}
+
+
+def write_dataset(path, rows, encoding="utf-8"):
+    with open(path, "w", newline="", encoding=encoding) as f:
+        writer = csv.DictWriter(f, fieldnames=["text", "label"])
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
+
+
+def sample_rows():
+    rows = [{"text": " ".join(["word"] * (i % 7 + 1)) + f" item{i}", "label": ["bullish", "negative", "2"][i % 3]}
+            for i in range(30)]
+    rows.append({"text": "", "label": "positive"})
+    rows.append({"text": "unlabeled row", "label": "unknown"})
+    return rows
+
+
+def test_resolve_label():
+    assert resolve_label("Bullish", LABEL2ID) == 0
+    assert resolve_label("利空", LABEL2ID) == 1
+    assert resolve_label(" neutral ", LABEL2ID) == 2
+    assert resolve_label("1", LABEL2ID) == 1
+    assert resolve_label("7", LABEL2ID) is None
+    assert resolve_label("", LABEL2ID) is None
+    assert resolve_label(None, LABEL2ID) is None
+
+
+def test_cache_is_built_once_and_reused(tmp_path, monkeypatch):
+    monkeypatch.setattr(token_dataset, "TOKENIZE_CHUNK_ROWS", 8)
+    dataset_path = write_dataset(tmp_path / "news.csv", sample_rows())
+    tokenizer = FakeTokenizer()
+
+    path, meta = build_token_cache(dataset_path, tokenizer, LABEL2ID, cache_dir=tmp_path / "cache", dedupe=False)
+    assert not meta["from_cache"]
+    assert meta["num_rows"] == 30 and meta["skipped_empty"] == 1 and meta["skipped_labels"] == 1
+    assert tokenizer.calls == 4
+
+    again, meta2 = build_token_cache(dataset_path, tokenizer, LABEL2ID, cache_dir=tmp_path / "cache", dedupe=False)
+    assert again == path and meta2["from_cache"] and tokenizer.calls == 4
+    assert [p.name for p in (tmp_path / "cache").iterdir()] == [path.name]
+
+    dataset = TokenDataset(path)
+    assert len(dataset) == 30
+    ids, mask, label = dataset[3]
+    assert ids.tolist() == [101] + [5] * 4 + [6, 102] and mask.tolist() == [1] * 7 and label == 0
+    assert dataset[4][2] == 1 and dataset[5][2] == 2
+    assert dataset.lengths(np.array([0, 3])).tolist() == [4, 7]
+
+    # 数据集内容变化后重建
+    write_dataset(dataset_path, sample_rows()[:10])
+    rebuilt, meta3 = build_token_cache(dataset_path, tokenizer, LABEL2ID, cache_dir=tmp_path / "cache", dedupe=False)
+    assert rebuilt != path and not meta3["from_cache"] and meta3["num_rows"] == 10
+
+
+def test_cache_reads_utf8_bom_dataset(tmp_path):
+    dataset_path = write_dataset(tmp_path / "news.csv", sample_rows(), encoding="utf-8-sig")
+    _, meta = build_token_cache(dataset_path, FakeTokenizer(), LABEL2ID, cache_dir=tmp_path / "cache", dedupe=False)
+    assert meta["num_rows"] == 30 and meta["skipped_empty"] == 1
+
+
+def test_cache_drops_near_duplicates(tmp_path):
+    text = "Federal Reserve holds interest rates steady as inflation cools and markets rally on the news today"
+    rows = [{"text": text, "label": "positive"}, {"text": text + " !", "label": "positive"},
+            {"text": "Oil prices slump after OPEC output surprise", "label": "negative"}]
+    dataset_path = write_dataset(tmp_path / "news.csv", rows)
+    path, meta = build_token_cache(dataset_path, FakeTokenizer(), LABEL2ID, cache_dir=tmp_path / "cache")
+    assert meta["num_rows"] == 2 and meta["removed_duplicates"] == 1
+    assert not (path / "dedupe.db").exists()
+
+
+def test_length_bucket_sampler_covers_every_index(tmp_path):
+    dataset_path = write_dataset(tmp_path / "news.csv", sample_rows())
+    path, _ = build_token_cache(dataset_path, FakeTokenizer(), LABEL2ID, cache_dir=tmp_path / "cache", dedupe=False)
+    dataset = TokenDataset(path)
+
+    sampler = LengthBucketSampler(dataset, batch_size=4, pool_batches=2, seed=1)
+    sampler.set_epoch(1)
+    first = list(sampler)
+    assert len(first) == len(sampler)
+    assert sorted(i for batch in first for i in batch) == list(range(30))
+    assert all(len(batch) <= 4 for batch in first)
+    sampler.set_epoch(2)
+    assert list(sampler) != first
+
+    capped = LengthBucketSampler(dataset, batch_size=8, max_batch_tokens=20, shuffle=False)
+    for batch in capped:
+        assert len(batch) * max(dataset.lengths(np.array(batch)).tolist()) <= 20
+
+
+def test_length_bucket_sampler_yields_pool_by_pool(tmp_path, monkeypatch):
+    dataset_path = write_dataset(tmp_path / "news.csv", sample_rows())
+    path, _ = build_token_cache(dataset_path, FakeTokenizer(), LABEL2ID, cache_dir=tmp_path / "cache", dedupe=False)
+    dataset = TokenDataset(path)
+    pools = []
+    lengths = dataset.lengths
+    monkeypatch.setattr(dataset, "lengths", lambda indices: pools.append(len(indices)) or lengths(indices))
+
+    batches = iter(LengthBucketSampler(dataset, batch_size=4, pool_batches=2))
+    next(batches)
+    assert pools == [8]  # 只读取了第一个样本池
+    assert len(list(batches)) == 7
+    assert pools == [8, 8, 8, 6]
+
+
+def test_collate_tokens_pads_to_longest():
+    batch = [(np.array([101, 5, 102], dtype=np.int32), np.ones(3, dtype=np.uint8), 1),
+             (np.array([101, 102], dtype=np.int32), np.ones(2, dtype=np.uint8), 2)]
+    out = collate_tokens(batch, pad_token_id=0)
+    assert out["input_ids"].tolist() == [[101, 5, 102], [101, 102, 0]]
+    assert out["attention_mask"].tolist() == [[1, 1, 1], [1, 1, 0]]
+    assert out["labels"].tolist() == [1, 2]
+    assert out["input_ids"].dtype == torch.long
+
+
+def test_dataloader_with_workers(tmp_path):
+    dataset_path = write_dataset(tmp_path / "news.csv", sample_rows())
+    path, _ = build_token_cache(dataset_path, FakeTokenizer(), LABEL2ID, cache_dir=tmp_path / "cache", dedupe=False)
+    dataset = TokenDataset(path)
+    dataset[0]  # 主进程已打开 memmap，工作进程需各自重新打开
+    loader = torch.utils.data.DataLoader(dataset, batch_sampler=LengthBucketSampler(dataset, batch_size=8),
+                                         num_workers=1, collate_fn=collate_tokens,
+                                         multiprocessing_context="spawn")
+    labels = torch.cat([batch["labels"] for batch in loader])
+    assert sorted(labels.tolist()) == sorted([0, 1, 2] * 10)
@@ -1,5 +1,5 @@
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import csv
 import os
 import time
@@ -10,6 +10,33 @@ TARGET_URL = "https://finance.yahoo.com/topic/stock-market-news/"
 OUTPUT_DIR = "../../backend/app/data/datasets"
 OUTPUT_FILE = os.path.join(OUTPUT_DIR, f"crawled_news_{datetime.now().strftime('%Y%m%d')}.csv")
 
+# 已安装 lxml 时使用 C 实现的解析器，否则回退到 html.parser
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+
+def extract_headlines(html):
+    """提取候选标题：只解析 h3 / a 标签，按文本哈希集合去重（保持页面顺序）。"""
+    soup = BeautifulSoup(html, HTML_PARSER, parse_only=SoupStrainer(['h3', 'a']))
+    headlines = []
+    seen = set()
+    # Try finding h3 tags which are often used for headlines in lists
+    for tag in soup.find_all(['h3', 'a']):
+        text = tag.get_text(strip=True)
+        # Filter out short or irrelevant text
+        if len(text) > 20 and not text.startswith("Yahoo") and "Privacy" not in text:
+            if text not in seen:
+                seen.add(text)
+                headlines.append({
+                    'text': text,
+                    'source': 'Yahoo Finance',
+                    'crawled_at': datetime.now().isoformat()
+                })
+    return headlines
+
 def crawl_yahoo_finance():
     print(f"Starting crawl of {TARGET_URL}...")
     headers = {
@@ -20,24 +47,9 @@ def crawl_yahoo_finance():
         response = requests.get(TARGET_URL, headers=headers)
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
         # Yahoo Finance structure often changes, looking for common headline tags
         # This is a heuristic approach
-        headlines = []
-        
-        # Try finding h3 tags which are often used for headlines in lists
-        for tag in soup.find_all(['h3', 'a']):
-            text = tag.get_text(strip=True)
-            # Filter out short or irrelevant text
-            if len(text) > 20 and not text.startswith("Yahoo") and "Privacy" not in text:
-                # Simple deduplication
-                if text not in [h['text'] for h in headlines]:
-                    headlines.append({
-                        'text': text,
-                        'source': 'Yahoo Finance',
-                        'crawled_at': datetime.now().isoformat()
-                    })
+        headlines = extract_headlines(response.text)
         
         print(f"Found {len(headlines)} potential headlines.")
         
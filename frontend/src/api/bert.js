@@ -42,11 +42,28 @@ export const classifyNews = async (text) => {
 };
 
 /**
- * 获取所有历史记录
- * @returns {Promise<Array>}
+ * 分页获取历史记录（最新在前），每次只请求一页
+ * 下一页游标在响应头 X-Next-Cursor 中，没有更多数据时为 null；传回 cursor 即可加载下一页
+ * @param {string|null} cursor - 上一页返回的游标，首页传 null
+ * @param {number} limit - 每页条数
+ * @returns {Promise<{records: Array, nextCursor: string|null}>}
  */
-export const getRecords = async () => {
-  return request('/records');
+export const getRecords = async (cursor = null, limit = 50) => {
+  const params = new URLSearchParams({ limit: String(limit) });
+  if (cursor) params.set('cursor', cursor);
+  const endpoint = `/records?${params}`;
+  try {
+    const response = await fetch(`${API_BASE_URL}${endpoint}`);
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new Error(errorData.detail || `API Error: ${response.status}`);
+    }
+    const records = await response.json();
+    return { records, nextCursor: response.headers.get('X-Next-Cursor') };
+  } catch (error) {
+    console.error(`Request failed for ${endpoint}:`, error);
+    throw error;
+  }
 };
 
 /**
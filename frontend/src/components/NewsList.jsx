@@ -1,7 +1,7 @@
 import React from 'react';
 import NewsItem from './NewsItem';
 
-const NewsList = ({ records, onDelete, onRetry }) => {
+const NewsList = ({ records, onDelete, onRetry, hasMore = false, onLoadMore, loadingMore = false }) => {
   if (!records || records.length === 0) {
     return (
       <div className="text-center py-12 bg-white rounded-2xl border border-dashed border-slate-300">
@@ -26,7 +26,7 @@ const NewsList = ({ records, onDelete, onRetry }) => {
           历史记录
         </h3>
         <span className="text-sm text-slate-500 bg-slate-100 px-2 py-1 rounded-md">
-          共 {records.length} 条
+          {hasMore ? `已加载 ${records.length} 条` : `共 ${records.length} 条`}
         </span>
       </div>
       <div className="grid gap-4">
@@ -39,6 +39,17 @@ const NewsList = ({ records, onDelete, onRetry }) => {
           />
         ))}
       </div>
+      {hasMore && (
+        <div className="flex justify-center">
+          <button
+            onClick={onLoadMore}
+            disabled={loadingMore}
+            className="px-4 py-2 text-sm font-medium text-slate-600 bg-white border border-slate-200 rounded-lg hover:bg-slate-50 disabled:opacity-50"
+          >
+            {loadingMore ? '加载中...' : '加载更多'}
+          </button>
+        </div>
+      )}
     </div>
   );
 };
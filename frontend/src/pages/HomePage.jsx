@@ -12,22 +12,39 @@ const HomePage = () => {
   const [currentResult, setCurrentResult] = useState(null);
   const [currentText, setCurrentText] = useState('');
   const [records, setRecords] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [isSaving, setIsSaving] = useState(false);
 
-  // 加载历史记录
+  // 加载历史记录（只加载第一页，其余按需加载）
   useEffect(() => {
     loadRecords();
   }, []);
 
   const loadRecords = async () => {
     try {
-      const data = await getRecords();
-      setRecords(data);
+      const page = await getRecords();
+      setRecords(page.records);
+      setNextCursor(page.nextCursor);
     } catch (err) {
       console.error("Failed to load records", err);
     }
   };
 
+  const loadMoreRecords = async () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const page = await getRecords(nextCursor);
+      setRecords((prev) => [...prev, ...page.records]);
+      setNextCursor(page.nextCursor);
+    } catch (err) {
+      setError("加载更多记录失败: " + err.message);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleClassify = async (text) => {
     setLoading(true);
     setError(null);
@@ -118,6 +135,9 @@ const HomePage = () => {
             records={records} 
             onDelete={handleDelete} 
             onRetry={handleRetry}
+            hasMore={Boolean(nextCursor)}
+            onLoadMore={loadMoreRecords}
+            loadingMore={loadingMore}
           />
         </main>
       </div>